@@ -1,11 +1,36 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import datetime
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import io
-import zipfile
+import os
+from functools import partial
+from pathlib import Path, PurePosixPath
+
+from hr_cache import FrameCache, content_hash, estimate_size
+from hr_charts import (abgang_abteilung_figur, abteilungen_figur, alle_figuren, alter_abteilung_figur,
+                       altersverteilung_figur, arbeitszeit_figur, ausreisser_figur, benchmark_figur,
+                       bewegungen_figur, dienstjahre_figur, dj_abteilung_figur, dj_gruppen_figur,
+                       fehlend_figur, gehalt_figur, geschlecht_figur, jubilaeen_figur, kalender_figur,
+                       karriere_figur, level_figur, matrix_figur, monatsvergleich_figur, prognose_figur,
+                       rente_kategorien_figur, rente_kumuliert_figur, rente_pro_jahr_figur,
+                       rentenalter_kumuliert_figur, rentenalter_welle_figur, standorte_figur, verlust_figur,
+                       wissensverlust_figur)
+from hr_engine import (ANALYSE_STUFEN, BENCHMARK, DJ_GRUPPEN_NAMEN, KARRIERE_MINDESTANTEIL, QUAL_SPALTEN,
+                       SPALTEN,
+                       analyze_base, analyze_retirement, career_flow, combine, drop_duplicates, duplicate_check,
+                       prepare, read_upload, subset_prep)
+from hr_events import RENTE, EventIndex
+from hr_export import charts_zip
+from hr_filter import FILTER_ROLLEN, build_group_index, filter_key, filter_text
+from hr_group import entities, entity_overview, entity_prep, group_hash, read_group, upload_members
+from hr_ingest import HAS_PYARROW, read_header
+from hr_jobs import JOB_WORKER, JobPool
+from hr_mapping import MappingStore, header_fingerprint, unique_mapping
+from hr_perf import Messung, log_einrichten
+from hr_projection import AUSTRITTSQUOTEN, ProjectionScenario, project
+from hr_risk import RiskModel, parse_level_gewichte
+from hr_snapshot import ID_SPALTE, SnapshotStore, kennzahlen, naechster_stand, snapshot_frame, verlauf_eintrag, vergleichen
 
 # ============================================
 # SEITEN-EINSTELLUNGEN
@@ -116,21 +141,648 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ============================================
-# BENCHMARK DATEN
+# CACHE (gilt über Reruns und Sitzungen hinweg)
+# ============================================
+CACHE_MB = 512
+
+@st.cache_resource
+def daten_cache():
+    return FrameCache(CACHE_MB * 2**20)
+
+# ============================================
+# HINTERGRUND-JOBS (ein Pool für alle Sitzungen)
+# ============================================
+JOB_SOFORT_S = 0.5     # so lange wartet ein Rerun auf den Job, bevor er den Fortschritt zeigt
+JOB_ABFRAGE_S = 1.0    # Abfrage-Intervall der Fortschrittsanzeige
+PROGNOSE_PROZESSE = int(os.environ.get('HR_PROGNOSE_PROZESSE', os.cpu_count() or 1))   # je Prognose-Job
+
+@st.cache_resource
+def job_pool():
+    return JobPool(JOB_WORKER)
+
+@st.fragment(run_every=JOB_ABFRAGE_S)
+def job_fortschritt(job, text="Ihre Daten werden analysiert...", abbrechen="Analyse abbrechen", zuruecksetzen=None):
+    """Fortschritt des laufenden Jobs; ist er fertig, wird die ganze Seite neu aufgebaut.
+
+    zuruecksetzen: Sitzungswerte, die beim Abbrechen gesetzt werden (Standard: Analyse-Job und Datei leeren).
+    """
+    if job.fertig:
+        st.rerun()
+    stufe = f"{job.stufe} ({job.stufen.index(job.stufe) + 1}/{len(job.stufen)})" if job.stufe in job.stufen else "Wartet auf einen freien Platz"
+    st.progress(job.fortschritt, text=f"🔄 {text} {stufe}")
+
+    def abbruch():
+        # als Callback: läuft vor den Widgets, darf also auch deren Werte setzen
+        job_pool().loslassen(job)
+        for schl, wert in (zuruecksetzen or {'analyse_job': None, 'analyse_datei': None}).items():
+            st.session_state[schl] = wert
+
+    if st.button(f"⏹ {abbrechen}", on_click=abbruch):
+        st.rerun()
+
+# Zeitmessung je Abschnitt als JSON-Zeilen auf stderr (siehe hr_perf.py)
+log_einrichten()
+
+# Auswahl für den ganzen Bestand, wenn mehrere Gesellschaften hochgeladen wurden
+KONZERN = 'Gesamter Konzern'
+
+# ============================================
+# MONATSSTÄNDE (Parquet auf der lokalen Platte)
+# ============================================
+SNAPSHOT_ORDNER = Path(os.environ.get('HR_SNAPSHOT_DIR', Path.home() / '.hr_analyse' / 'snapshots'))
+SNAPSHOT_NAME = 'mitarbeiter'
+
+# ============================================
+# SPALTENZUORDNUNGEN (je Aufbau der Kopfzeile bestätigt)
+# ============================================
+ZUORDNUNG_DATEI = Path(os.environ.get('HR_ZUORDNUNG_DATEI', Path.home() / '.hr_analyse' / 'spaltenzuordnung.json'))
+
+# ============================================
+# ABSCHNITTE DER ERGEBNISSEITE
 # ============================================
-BENCHMARK = {
-    "Niedersachsen": {"alter": 44.6, "frauen": 50.3, "teilzeit": 28.4, "gehalt": 3650},
-    "NRW": {"alter": 44.2, "frauen": 50.8, "teilzeit": 27.8, "gehalt": 3850},
-    "Bayern": {"alter": 43.8, "frauen": 50.1, "teilzeit": 26.5, "gehalt": 4200},
-    "Baden-Wuerttemberg": {"alter": 43.5, "frauen": 49.8, "teilzeit": 27.2, "gehalt": 4350},
-    "Hessen": {"alter": 43.9, "frauen": 50.5, "teilzeit": 26.8, "gehalt": 4150},
-    "Berlin": {"alter": 42.8, "frauen": 51.2, "teilzeit": 29.5, "gehalt": 3750},
-    "Hamburg": {"alter": 42.5, "frauen": 51.0, "teilzeit": 28.2, "gehalt": 4450},
-    "Sachsen": {"alter": 46.2, "frauen": 50.6, "teilzeit": 25.8, "gehalt": 3150},
-    "Deutschland": {"alter": 44.3, "frauen": 50.5, "teilzeit": 27.5, "gehalt": 3950}
-}
+# Jeder Abschnitt ist ein Fragment: er wird nur gebaut, wenn sein Tab offen
+# ist, und seine Regler rechnen nur ihn selbst neu.
+
+def diagramm_merken(name, fig):
+    """Diagramm, das von Reglern abhängt, für den ZIP-Download in dieser Einstellung."""
+    st.session_state['diagramme'][name] = fig
+
+@st.fragment
+def abschnitt_qualitaet(res, entfernt=0):
+    st.markdown("## 🔍 Datenqualitäts-Check")
+    
+    st.markdown("""
+    <div class="help-text">
+    <b>💡 Was zeigt das?</b><br><br>
+    Hier sehen Sie auf einen Blick:<br>
+    • 🔴 <b>Fehlende Daten</b> = Leere Zellen in Ihrer Excel<br>
+    • 🟡 <b>Ausreißer</b> = Werte die ungewöhnlich hoch oder niedrig sind (könnten Tippfehler sein),
+      auch im Vergleich zur eigenen Abteilung, zum Level oder zum Standort
+    </div>
+    """, unsafe_allow_html=True)
+    
+    q = res.qualitaet
+    fehlend_data = q.fehlend
+    ausreisser_data = q.ausreisser
+    ausreisser_details = q.details
+    
+    # Visualisierung
+    c1, c2 = st.columns(2)
+    
+    with c1:
+        st.markdown("### 📊 Fehlende Daten pro Spalte")
+        if fehlend_data:
+            st.plotly_chart(fehlend_figur(q), use_container_width=True)
+            
+            # Zusammenfassung
+            kritisch = len([x for x in fehlend_data if '🔴' in x['Status']])
+            warnung = len([x for x in fehlend_data if '🟡' in x['Status']])
+            if kritisch > 0:
+                st.error(f"🔴 {kritisch} Spalte(n) haben mehr als 20% fehlende Daten!")
+            elif warnung > 0:
+                st.warning(f"🟡 {warnung} Spalte(n) haben 5-20% fehlende Daten")
+            else:
+                st.success("🟢 Alle Spalten haben weniger als 5% fehlende Daten")
+        else:
+            st.info("Keine Spalten zum Prüfen gefunden")
+    
+    with c2:
+        st.markdown("### ⚠️ Ausreißer & Fehler")
+        if ausreisser_data:
+            fig = ausreisser_figur(q)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.success("🟢 Keine offensichtlichen Ausreißer gefunden!")
+                fig = go.Figure()
+                fig.add_annotation(
+                    text="✅ Alles OK!",
+                    xref="paper", yref="paper",
+                    x=0.5, y=0.5,
+                    showarrow=False,
+                    font=dict(size=40, color='#2ecc71')
+                )
+                fig.update_layout(height=400)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            # Kritische Fehler zählen
+            krit_aus = len([x for x in ausreisser_data if '🔴' in x['Status'] and x['Anzahl'] > 0])
+            warn_aus = len([x for x in ausreisser_data if '🟡' in x['Status'] and x['Anzahl'] > 0])
+            
+            if krit_aus > 0:
+                st.error(f"🔴 {krit_aus} kritische(r) Fehler gefunden!")
+            elif warn_aus > 0:
+                st.warning(f"🟡 {warn_aus} mögliche(r) Ausreißer - bitte prüfen")
+            else:
+                st.success("🟢 Keine Ausreißer gefunden")
+    
+    # Details zu Ausreißern
+    if ausreisser_details:
+        with st.expander("📋 Details zu den gefundenen Problemen (klicken zum Öffnen)"):
+            st.markdown("**Betroffene Datensätze:**")
+            for detail in ausreisser_details[:15]:  # Max 15 anzeigen
+                st.markdown(detail)
+            if len(ausreisser_details) > 15:
+                st.markdown(f"*... und {len(ausreisser_details) - 15} weitere*")
+    
+    # Gesamtbewertung
+    st.markdown("### 📊 Gesamtbewertung Datenqualität")
+    
+    fehlend_score = q.fehlend_score
+    ausreisser_score = q.ausreisser_score
+    gesamt_score = q.gesamt_score
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Vollständigkeit", f"{fehlend_score:.0f}%", 
+            help="Wie viele Felder sind ausgefüllt?")
+    with col2:
+        st.metric("Plausibilität", f"{ausreisser_score:.0f}%",
+            help="Wie viele Werte sind plausibel?")
+    with col3:
+        farbe = "🟢" if gesamt_score >= 80 else ("🟡" if gesamt_score >= 60 else "🔴")
+        st.metric(f"{farbe} Gesamtscore", f"{gesamt_score:.0f}%")
+    
+    if gesamt_score >= 80:
+        st.success("✅ **Gute Datenqualität!** Sie können die Analyse starten.")
+    elif gesamt_score >= 60:
+        st.warning("⚠️ **Mittlere Datenqualität.** Einige Analysen könnten ungenau sein.")
+    else:
+        st.error("❌ **Datenqualität verbesserungswürdig.** Bitte prüfen Sie die markierten Probleme.")
+    
+    # ============================================
+    # INTERAKTIVE MISSING VALUES MATRIX
+    # ============================================
+    st.markdown("---")
+    st.markdown("## 🗺️ Daten-Matrix: Wo fehlen Daten? Wo sind Ausreißer?")
+    
+    st.markdown("""
+    <div class="help-text">
+    <b>💡 So lesen Sie diese Matrix:</b><br><br>
+    • Jede <b>Zeile</b> = ein Mitarbeiter (oben = erster, unten = letzter)<br>
+    • Jede <b>Spalte</b> = ein Datenfeld<br>
+    • <span style="color:#2ecc71"><b>■ Grün</b></span> = Daten vorhanden und OK<br>
+    • <span style="color:#e74c3c"><b>■ Rot</b></span> = Daten fehlen (leere Zelle)<br>
+    • <span style="color:#f39c12"><b>■ Orange</b></span> = Ausreißer / ungewöhnlicher Wert<br><br>
+    <b>Tipp:</b> Fahren Sie mit der Maus über die Matrix um Details zu sehen!
+    </div>
+    """, unsafe_allow_html=True)
+    
+    mx = res.matrix
+    if mx is not None:
+        if mx.modus != 'zeilen':
+            st.info(f"ℹ️ Bei {mx.n_gesamt} Mitarbeitern fasst jede Zeile mehrere Mitarbeiter zusammen. "
+                    "Die Farbe zeigt den Anteil fehlender oder auffälliger Werte.")
+        st.plotly_chart(matrix_figur(mx), use_container_width=True)
+        
+        # Legende
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(f"🟢 **OK:** {mx.ok_gesamt} Felder")
+        with col2:
+            st.markdown(f"🔴 **Fehlend:** {mx.fehlend_gesamt} Felder")
+        with col3:
+            st.markdown(f"🟡 **Ausreißer:** {mx.ausreisser_gesamt} Felder")
+    
+    # ============================================
+    # TABELLE MIT PROBLEM-DATENSÄTZEN
+    # ============================================
+    st.markdown("### 📋 Datensätze mit Problemen")
+    
+    probleme = res.probleme
+    
+    if probleme:
+        df_probleme = probleme.frame(limit=50)  # Max 50 anzeigen
+        st.dataframe(df_probleme, use_container_width=True, height=300)
+        
+        if len(probleme) > 50:
+            st.info(f"ℹ️ Zeigt 50 von {len(probleme)} Datensätzen mit Problemen")
+        
+        # Download-Button für Problem-Liste (CSV wird erst beim Klick erzeugt)
+        st.download_button(
+            label="📥 Problem-Liste als CSV herunterladen",
+            data=probleme.csv,
+            file_name="Problem_Datensaetze.csv",
+            mime="text/csv"
+        )
+    else:
+        st.success("🎉 **Keine Datensätze mit Problemen gefunden!**")
+    
+    # ============================================
+    # DOPPELTE DATENSÄTZE
+    # ============================================
+    st.markdown("### 👥 Doppelte Datensätze")
+    
+    duplikate = res.duplikate
+    if entfernt:
+        st.info(f"ℹ️ {entfernt} doppelte Datensätze wurden vor der Analyse entfernt.")
+    if duplikate:
+        st.dataframe(duplikate.frame(limit=50), use_container_width=True, height=300)
+        if len(duplikate) > 50:
+            st.info(f"ℹ️ Zeigt 50 von {len(duplikate)} betroffenen Datensätzen")
+        if duplikate.konflikt.any():
+            st.warning("⚠️ Gleiche ID mit abweichendem Geburts- oder Eintrittsjahr: Beim Entfernen bleibt "
+                       "das erste Vorkommen – bitte prüfen, welcher Datensatz stimmt.")
+    elif not entfernt:
+        st.success("🎉 **Keine doppelten Datensätze gefunden!**")
+
+@st.fragment
+def abschnitt_rente(res):
+    rente, jahr, rentenalter = res.rente, res.jahr, res.rentenalter
+    st.markdown("## 🎯 Wann gehen Ihre Mitarbeiter in Rente?")
+    
+    r5 = rente.r5
+    r10 = rente.r10
+    
+    if r5 > 0:
+        st.error(f"""
+        ⚠️ **ACHTUNG:** {r5} Mitarbeiter ({round(r5/rente.anzahl*100,1)}%) 
+        erreichen in den nächsten **5 Jahren** das Rentenalter!
+        """)
+    
+    if r10 > 0:
+        st.warning(f"""
+        ℹ️ Weitere {r10} Mitarbeiter ({round(r10/rente.anzahl*100,1)}%) 
+        gehen in **5-10 Jahren** in Rente.
+        """)
+    
+    c1, c2 = st.columns(2)
+    
+    with c1:
+        st.plotly_chart(rente_kategorien_figur(rente), use_container_width=True)
+    
+    with c2:
+        fig = rente_pro_jahr_figur(rente, jahr)
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+    
+    c1, c2 = st.columns(2)
+    
+    with c1:
+        st.plotly_chart(altersverteilung_figur(rente), use_container_width=True)
+    
+    with c2:
+        st.plotly_chart(rente_kumuliert_figur(rente), use_container_width=True)
+    
+    # Nach Abteilung
+    if rente.alter_abteilung is not None:
+        st.markdown("### Nach Abteilung:")
+        c1, c2 = st.columns(2)
+        
+        with c1:
+            st.plotly_chart(alter_abteilung_figur(rente), use_container_width=True)
+        
+        with c2:
+            st.plotly_chart(abgang_abteilung_figur(rente), use_container_width=True)
+
+    # Alle Rentenalter im Vergleich (vorberechnet, der Regler schlägt nur nach)
+    sweep = res.rente_vergleich
+    if sweep is not None:
+        with st.expander("🔀 Was wäre, wenn? Alle Rentenalter im Vergleich"):
+            c1, c2 = st.columns(2)
+
+            with c1:
+                st.plotly_chart(rentenalter_welle_figur(sweep), use_container_width=True)
+
+            with c2:
+                st.plotly_chart(rentenalter_kumuliert_figur(sweep, rentenalter), use_container_width=True)
+
+            st.caption(f"Eingestellt: {rentenalter} Jahre (dunkle Balken). "
+                       "Beim Verschieben des Reglers werden diese Werte nur nachgeschlagen.")
+
+@st.fragment
+def abschnitt_dienstjahre(res, prep, h):
+    treue, jahr, rentenalter = res.treue, res.jahr, res.rentenalter
+    if treue is not None:
+        st.markdown("## 🏆 Wie lange sind Ihre Mitarbeiter dabei?")
+        
+        st.info(f"ℹ️ **{treue.lang} Mitarbeiter** sind schon **20 Jahre oder länger** bei Ihnen!")
+        
+        c1, c2 = st.columns(2)
+        
+        with c1:
+            st.plotly_chart(dienstjahre_figur(treue), use_container_width=True)
+        
+        with c2:
+            st.plotly_chart(dj_gruppen_figur(treue), use_container_width=True)
+        
+        # Jubiläen
+        st.markdown("### 🎉 Wer hat bald Jubiläum?")
+        c1, c2 = st.columns(2)
+        
+        with c1:
+            st.plotly_chart(jubilaeen_figur(treue), use_container_width=True)
+        
+        with c2:
+            fig = dj_abteilung_figur(treue)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
+
+    # Kalender: Jubiläen und Renteneintritte für einen frei wählbaren Zeitraum
+    if prep.cols['ein'] or prep.cols['geb']:
+        st.markdown("### 📅 Jubiläums- und Rentenkalender")
+        ereignisse = daten_cache().get(('ereignisse', h, jahr), lambda: EventIndex(prep.df, prep.cols, jahr))
+
+        k1, k2 = st.columns(2)
+        with k1:
+            von, bis = st.slider("Zeitraum", min_value=jahr, max_value=jahr + 40, value=(jahr, jahr + 3))
+        with k2:
+            auswahl_abt = st.multiselect("Abteilungen (leer = alle)", ereignisse.abteilungen)
+        abt_filter = auswahl_abt or None
+
+        anz = ereignisse.anzahl(von, bis, rentenalter)
+        if abt_filter:
+            anz = anz.loc[auswahl_abt]
+        jubi_anz = anz.drop(columns=RENTE)
+
+        m1, m2 = st.columns(2)
+        with m1:
+            st.metric(f"🎉 Jubiläen {von}–{bis}", int(jubi_anz.to_numpy().sum()))
+        with m2:
+            st.metric(f"🎯 Renteneintritte {von}–{bis}", int(anz[RENTE].sum()))
+
+        c1, c2 = st.columns(2)
+
+        with c1:
+            fig = kalender_figur(ereignisse.pro_jahr(von, bis, rentenalter, abteilungen=abt_filter))
+            st.plotly_chart(fig, use_container_width=True)
+            diagramm_merken('24_Jubilaeen_Rente_Kalender.html', fig)
+
+        with c2:
+            tabelle = anz.loc[:, anz.sum() > 0]
+            tabelle = tabelle[tabelle.sum(axis=1) > 0]
+            st.dataframe(tabelle, use_container_width=True, height=400)
+
+        liste = ereignisse.kalender(von, bis, rentenalter, abteilungen=abt_filter, limit=100)
+        st.dataframe(liste, use_container_width=True, height=300)
+        gesamt = int(anz.to_numpy().sum())
+        if gesamt > 100:
+            st.info(f"ℹ️ Zeigt 100 von {gesamt} Einträgen")
+
+        # CSV wird erst beim Klick erzeugt
+        st.download_button(
+            label="📥 Kalender als CSV herunterladen",
+            data=partial(ereignisse.csv, von, bis, rentenalter, abteilungen=abt_filter),
+            file_name=f"Kalender_{von}_{bis}.csv",
+            mime="text/csv"
+        )
+
+@st.fragment
+def abschnitt_wissen(res, modell):
+    wissen = res.wissen
+    st.markdown("## ⚠️ Droht Ihnen Wissensverlust?")
+    
+    st.markdown(f"""
+    <div class="help-text">
+    <b>Was bedeutet das?</b><br><br>
+    🔴 <b>KRITISCH</b> = Mitarbeiter mit {modell.krit_dj}+ Jahren Erfahrung, die in {modell.krit_jbr} Jahren gehen<br>
+    🟡 <b>WARNUNG</b> = Mitarbeiter mit {modell.warn_dj}+ Jahren Erfahrung, die in {modell.warn_jbr} Jahren gehen<br>
+    🟢 <b>OK</b> = Noch genug Zeit für Wissenstransfer
+    </div>
+    """, unsafe_allow_html=True)
+    if modell.level_gewichte or modell.knappheit_faktor != 1.0:
+        st.caption("Erfahrung gewichtet: " + ", ".join(
+            [f"{lvl} ×{g:g}" for lvl, g in modell.level_gewichte]
+            + ([f"Einzelpositionen ×{modell.knappheit_faktor:g}"] if modell.knappheit_faktor != 1.0 else [])))
+    
+    krit = wissen.krit
+    warn = wissen.warn
+    
+    m1, m2, m3 = st.columns(3)
+    with m1:
+        if krit > 0:
+            st.error(f"🔴 **{krit}** KRITISCH")
+        else:
+            st.success(f"🔴 **{krit}** KRITISCH")
+    with m2:
+        if warn > 0:
+            st.warning(f"🟡 **{warn}** WARNUNG")
+        else:
+            st.success(f"🟡 **{warn}** WARNUNG")
+    with m3:
+        st.metric("📉 Erfahrungsjahre die verloren gehen", f"{wissen.verl5:.0f} Jahre")
+    
+    c1, c2 = st.columns(2)
+    
+    with c1:
+        st.plotly_chart(wissensverlust_figur(wissen), use_container_width=True)
+    
+    with c2:
+        st.plotly_chart(verlust_figur(wissen), use_container_width=True)
+
+@st.fragment
+def abschnitt_prognose(res, prep, h, messung):
+    jahr, rentenalter = res.jahr, res.rentenalter
+    st.markdown("## 🔮 Wie entwickelt sich Ihr Personalbestand?")
+    st.markdown("""
+    <div class="help-text">
+    Die Prognose spielt die nächsten Jahre viele Male durch: Renteneintritte,
+    Kündigungen (abhängig von der Betriebszugehörigkeit) und Nachbesetzungen.
+    Das Band zeigt, in welchem Bereich der Bestand in 90% der Fälle liegt.
+    </div>
+    """, unsafe_allow_html=True)
+
+    with st.expander("⚙️ Annahmen der Prognose"):
+        p1, p2, p3 = st.columns(3)
+        with p1:
+            horizont = st.slider("Jahre in die Zukunft", min_value=10, max_value=20, value=15)
+        with p2:
+            laeufe = st.select_slider("Anzahl Simulationen", options=[500, 1000, 2000, 5000], value=1000)
+        with p3:
+            ersatz = st.slider("Nachbesetzte Abgänge (%)", min_value=0, max_value=100, value=90,
+                help="100% = jede Stelle wird nach Rente oder Kündigung wieder besetzt")
+        st.markdown("**Kündigungen pro Jahr nach Betriebszugehörigkeit (%)**")
+        quoten = []
+        for spalte, name, quote in zip(st.columns(len(DJ_GRUPPEN_NAMEN)), DJ_GRUPPEN_NAMEN, AUSTRITTSQUOTEN):
+            with spalte:
+                quoten.append(st.number_input(name, min_value=0.0, max_value=50.0,
+                                              value=round(quote * 100, 1), step=0.5) / 100)
+
+    job = st.session_state.get('prognose_job')
+    if not st.toggle("🔮 Prognose berechnen", key='prognose'):
+        if job is not None:
+            job_pool().loslassen(job)
+            st.session_state['prognose_job'] = None
+        return
+
+    # Im Hintergrund wie die Analyse: die Seite bleibt bedienbar, der Prozess-Pool
+    # (forkserver, siehe hr_projection) verteilt die Läufe auf die Kerne
+    szenario = ProjectionScenario(horizont, laeufe, ersatz / 100, tuple(quoten))
+    schluessel = ('prognose', h, jahr, rentenalter, szenario)
+
+    def prognose(job_messung):
+        def rechnen():
+            with job_messung.abschnitt('Prognose-Simulation', res.n):
+                return project(prep, rentenalter, szenario, jobs=PROGNOSE_PROZESSE)
+        return daten_cache().get(schluessel, rechnen)
+
+    if job is None or job.schluessel != schluessel or job.abgebrochen:
+        if job is not None:
+            job_pool().loslassen(job)
+        job = job_pool().starten(schluessel, prognose, ['Prognose-Simulation'],
+                                 messung.speicher, messung.kontext)
+        st.session_state['prognose_job'] = job
+    job.warten(JOB_SOFORT_S)
+    if job.fehler is not None:
+        raise job.fehler
+    if not job.fertig or job.abgebrochen:
+        job_fortschritt(job, "Prognose wird berechnet...", "Prognose abbrechen",
+                        {'prognose_job': None, 'prognose': False})
+        return
+    if not job.abgeholt:
+        messung.eintraege.extend(job.messung.eintraege)
+        job.abgeholt = True
+
+    prog = job.ergebnis
+    baender = prog.baender()
+
+    auswahl = st.selectbox("Abteilung", ['Gesamt'] + prog.abteilungen)
+    b = baender.loc[auswahl]
+    heute, ende = b['Mittel'].iloc[0], b['P50'].iloc[-1]
+
+    m1, m2, m3 = st.columns(3)
+    with m1:
+        st.metric("👥 Heute", f"{heute:.0f}")
+    with m2:
+        st.metric(f"🔮 {prog.jahre[-1]} (wahrscheinlich)", f"{ende:.0f}",
+                  delta=f"{ende - heute:+.0f}")
+    with m3:
+        st.metric("↕️ Bereich (90%)", f"{b['P5'].iloc[-1]:.0f} – {b['P95'].iloc[-1]:.0f}")
+
+    c1, c2 = st.columns(2)
+
+    with c1:
+        fig = prognose_figur(prog, b, auswahl)
+        st.plotly_chart(fig, use_container_width=True)
+        diagramm_merken('23_Personalprognose.html', fig)
+
+    with c2:
+        st.plotly_chart(bewegungen_figur(prog.bewegungen()), use_container_width=True)
+
+    letzte = baender.xs(prog.jahre[-1], level='Jahr')
+    tabelle = pd.DataFrame({
+        'Heute': baender.xs(prog.jahre[0], level='Jahr')['Mittel'].round().astype(int),
+        f'{prog.jahre[-1]} (5%)': letzte['P5'].round().astype(int),
+        f'{prog.jahre[-1]} (wahrscheinlich)': letzte['P50'].round().astype(int),
+        f'{prog.jahre[-1]} (95%)': letzte['P95'].round().astype(int),
+    })
+    st.dataframe(tabelle, use_container_width=True)
+    st.caption(f"{prog.laeufe} Simulationen. Eingestellte bekommen das typische Einstiegsalter "
+               "ihrer Abteilung; ohne Geburtsjahr wird kein Renteneintritt angenommen.")
+
+@st.fragment
+def abschnitt_karriere(res, prep, h):
+    karriere = res.karriere
+    st.markdown("## 📈 Wie haben sich Ihre Mitarbeiter entwickelt?")
+    
+    # Beispiele zeigen
+    if karriere.beispiele:
+        st.markdown("### Beispiele (mindestens 5 Jahre dabei):")
+        for von, nach, dj in karriere.beispiele:
+            st.markdown(f"- **{von}** → **{nach}** *(nach {dj} Jahren)*")
+    
+    # Sankey über alle vorhandenen Stufen (Einstieg → Abteilung → Level → Position)
+    if karriere.sankey is not None:
+        st.markdown(f"### Karriere-Flow: {' → '.join(karriere.sankey['stufen'])}")
+        anteil = st.slider(
+            "Kleine Gruppen als „Sonstige“ zusammenfassen (unter % je Stufe)",
+            min_value=0.0, max_value=10.0, value=KARRIERE_MINDESTANTEIL * 100, step=0.5, format="%.1f",
+            help="Hält das Diagramm übersichtlich, wenn es sehr viele verschiedene Positionen gibt"
+        )
+        sk = karriere.sankey
+        if anteil != KARRIERE_MINDESTANTEIL * 100:
+            sk = daten_cache().get(('karriere', h, res.jahr, anteil),
+                                   lambda: career_flow(prep.df, prep.cols, anteil / 100))
+        fig = karriere_figur(sk)
+        st.plotly_chart(fig, use_container_width=True)
+        diagramm_merken('13_Karriere_Flow.html', fig)
+
+@st.fragment
+def abschnitt_weitere(res):
+    st.markdown("## 📊 Weitere Auswertungen")
+    
+    vt = res.verteilung
+    
+    # Je zwei Diagramme nebeneinander; fehlt eine Spalte, bleibt ihr Platz leer
+    for links, rechts in [(geschlecht_figur, abteilungen_figur), (level_figur, arbeitszeit_figur),
+                          (gehalt_figur, standorte_figur)]:
+        c1, c2 = st.columns(2)
+        for spalte, bauen in ((c1, links), (c2, rechts)):
+            fig = bauen(vt)
+            if fig is not None:
+                with spalte:
+                    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def abschnitt_benchmark(res):
+    st.markdown(f"## 📊 Vergleich: Sie vs. {res.region}")
+    
+    fig = benchmark_figur(res.benchmark, res.region)
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def abschnitt_monatsvergleich(res, prep, h, modell):
+    jahr, rentenalter = res.jahr, res.rentenalter
+    cache = daten_cache()
+    daten = cache.get(('snapshot', h, jahr), lambda: snapshot_frame(prep))
+    st.markdown("## 📅 Was hat sich seit dem letzten Monat verändert?")
+    
+    store = SnapshotStore(SNAPSHOT_ORDNER)
+    version = store.version(SNAPSHOT_NAME)
+    if version is None:
+        alt, diff, kz = None, None, kennzahlen(daten, jahr, rentenalter, modell)
+        st.info("ℹ️ Es ist noch kein Monatsstand gespeichert. Speichern Sie diesen Stand – "
+                "beim nächsten Upload sehen Sie dann, was sich verändert hat.")
+    else:
+        # Nur Eintritte, Austritte und geänderte Mitarbeiter werden neu bewertet
+        alt = cache.get(('snapshot_alt', version), lambda: store.laden(SNAPSHOT_NAME))
+        diff, alt_kz, kz = cache.get(('vergleich', h, jahr, rentenalter, modell, version),
+                                     lambda: vergleichen(alt, daten, jahr, rentenalter, modell))
+        st.markdown(f"Verglichen mit dem gespeicherten Stand **{alt.stichtag}** "
+                    f"({diff.unveraendert} Mitarbeiter unverändert):")
+        
+        m1, m2, m3, m4, m5 = st.columns(5)
+        with m1:
+            st.metric("➕ Eintritte", len(diff.eintritte))
+        with m2:
+            st.metric("➖ Austritte", len(diff.austritte))
+        with m3:
+            st.metric("🏢 Abteilungswechsel", diff.wechsel['Abteilung'])
+        with m4:
+            st.metric("📶 Level-Wechsel", diff.wechsel['Level'])
+        with m5:
+            st.metric("💶 Gehaltsänderungen", diff.wechsel['Gehalt'])
+        
+        k1, k2, k3 = st.columns(3)
+        with k1:
+            st.metric("🎯 Rente in 5 Jahren", kz.r5, delta=kz.r5 - alt_kz.r5, delta_color='inverse')
+        with k2:
+            st.metric("🔴 Kritischer Wissensverlust", kz.krit, delta=kz.krit - alt_kz.krit,
+                      delta_color='inverse')
+        with k3:
+            st.metric("📉 Erfahrungsjahre (5 Jahre)", f"{kz.verl5:.0f}",
+                      delta=f"{kz.verl5 - alt_kz.verl5:+.0f}", delta_color='inverse')
+        
+        fig = monatsvergleich_figur(alt.stichtag, alt_kz, kz, jahr)
+        st.plotly_chart(fig, use_container_width=True)
+        diagramm_merken('21_Monatsvergleich.html', fig)
+        
+        verlauf = alt.verlauf + [verlauf_eintrag("aktuell", kz, diff)]
+        st.markdown("### Verlauf der gespeicherten Monatsstände")
+        st.dataframe(pd.DataFrame(verlauf).rename(columns={
+            'stichtag': 'Stand', 'mitarbeiter': 'Mitarbeiter', 'r5': 'Rente ≤5 J',
+            'r10': 'Rente 5-10 J', 'krit': 'Kritisch', 'warn': 'Warnung',
+            'verl5': 'Erfahrungsjahre ≤5 J', 'eintritte': 'Eintritte',
+            'austritte': 'Austritte', 'geaendert': 'Geändert'}),
+            hide_index=True, use_container_width=True)
+    
+    if st.button("💾 Diesen Stand als Monatsstand speichern"):
+        store.speichern(SNAPSHOT_NAME, naechster_stand(alt, daten, kz, diff))
+        st.success("✅ Monatsstand gespeichert. Der nächste Upload wird damit verglichen.")
 
-F = ['#3498db','#e74c3c','#2ecc71','#9b59b6','#f39c12','#1abc9c','#e67e22','#34495e']
+# Beim Öffnen der Ergebnisse zuerst gezeigter Abschnitt (die meisten schauen hier zuerst)
+ABSCHNITT_START = '🎯 Rente'
 
 # ============================================
 # KOPFZEILE
@@ -190,9 +842,7 @@ with tab1:
     """, unsafe_allow_html=True)
     
     # Vorlage erstellen
-    spalten = ['Mitarbeiter_ID','Geburtsjahr','Eintrittsjahr','Geschlecht','Abteilung',
-               'Einstiegsposition','Aktuelle_Position','Karrierelevel','Gehalt_Brutto_Jahr',
-               'Arbeitszeit','Wochenstunden','Standort','Bildungsabschluss','Vertragsart']
+    spalten = SPALTEN
     df_vorlage = pd.DataFrame(columns=spalten, index=range(500))
     
     buffer = io.BytesIO()
@@ -235,14 +885,80 @@ with tab2:
     
     # DATEI UPLOAD
     st.markdown("### 1️⃣ Excel-Datei auswählen:")
-    uploaded_file = st.file_uploader(
+    uploaded_files = st.file_uploader(
         "Klicken Sie hier oder ziehen Sie Ihre Datei hierher",
-        type=['xlsx', 'xls'],
-        help="Nur Excel-Dateien (.xlsx oder .xls)"
+        type=['xlsx', 'xls', 'csv', 'parquet', 'zip'],
+        accept_multiple_files=True,
+        help="Excel-Dateien (.xlsx oder .xls), bei sehr großen Datenmengen auch CSV oder Parquet. "
+             "Für den ganzen Konzern: mehrere Dateien (eine je Gesellschaft) oder ein ZIP davon"
     )
     
-    if uploaded_file:
-        st.success(f"✅ Datei geladen: **{uploaded_file.name}**")
+    if len(uploaded_files) == 1:
+        st.success(f"✅ Datei geladen: **{uploaded_files[0].name}**")
+    elif uploaded_files:
+        st.success(f"✅ {len(uploaded_files)} Dateien geladen: **{', '.join(f.name for f in uploaded_files)}**")
+    
+    # SPALTENZUORDNUNG: je Aufbau der Kopfzeile einmal prüfen, danach gespeichert
+    dateien, kopfzeilen, zuordnungen = [], [], {}
+    if uploaded_files:
+        try:
+            # Mehrere Dateien oder ein ZIP: eine Gesellschaft je Datei
+            dateien = [d for f in uploaded_files for d in upload_members(f.name, f.getvalue())]
+            kopfzeilen = [daten_cache().get(('kopf', content_hash(inhalt)),
+                                            lambda: read_header(io.BytesIO(inhalt), PurePosixPath(name).name))
+                          for name, inhalt in dateien]
+        except Exception as e:
+            st.error(f"❌ Die Datei kann nicht gelesen werden: {e}")
+            dateien = []
+    
+    if dateien:
+        store = MappingStore(ZUORDNUNG_DATEI)
+        aufbauten = {}   # Fingerabdruck -> (Kopfzeile, [Dateinamen])
+        for (name, _), kopf in zip(dateien, kopfzeilen):
+            aufbauten.setdefault(header_fingerprint(kopf), (kopf, []))[1].append(name)
+        for fp, (kopf, _) in aufbauten.items():
+            zuordnungen[fp] = store.zuordnung(kopf)[0]
+        
+        with st.expander("🧭 Spaltenzuordnung prüfen (optional)"):
+            st.markdown("Welche Spalte Ihrer Datei enthält welche Angabe? Einmal gespeichert, "
+                        "wird die Zuordnung für jede Datei mit demselben Aufbau übernommen.")
+            fp = next(iter(aufbauten))
+            if len(aufbauten) > 1:
+                fp = st.selectbox(
+                    "Aufbau", list(aufbauten),
+                    format_func=lambda f: aufbauten[f][1][0] + (f" (+{len(aufbauten[f][1]) - 1} weitere)"
+                                                               if len(aufbauten[f][1]) > 1 else "")
+                )
+            kopf = aufbauten[fp][0]
+            cols, gespeichert = store.zuordnung(kopf)
+            st.caption("✅ Gespeicherte Zuordnung" if gespeichert else "🔍 Automatisch erkannt – bitte prüfen")
+            
+            optionen = [None] + list(kopf)
+            gewaehlt = {}
+            felder = st.columns(3)
+            for i, (rolle, titel) in enumerate(QUAL_SPALTEN):
+                with felder[i % 3]:
+                    gewaehlt[rolle] = st.selectbox(
+                        titel, optionen, index=optionen.index(cols[rolle]),
+                        format_func=lambda c: "(nicht vorhanden)" if c is None else str(c),
+                        key=f"zuordnung_{fp}_{rolle}"
+                    )
+            gewaehlt, doppelt = unique_mapping(gewaehlt)
+            if doppelt:
+                titel = dict(QUAL_SPALTEN)
+                st.warning("⚠️ Jede Spalte kann nur eine Angabe enthalten. Nicht verwendet für: "
+                           + ", ".join(titel[r] for r in doppelt))
+            zuordnungen[fp] = gewaehlt
+            
+            b1, b2 = st.columns(2)
+            with b1:
+                if st.button("💾 Zuordnung für diesen Aufbau speichern"):
+                    store.speichern(kopf, gewaehlt)
+                    st.success("Gespeichert – beim nächsten Upload mit diesem Aufbau entfällt die Erkennung.")
+            with b2:
+                if gespeichert and st.button("🗑️ Gespeicherte Zuordnung löschen"):
+                    store.entfernen(kopf)
+                    st.info("Gelöscht – ab dem nächsten Upload wird wieder automatisch erkannt.")
     
     st.markdown("---")
     
@@ -270,6 +986,30 @@ with tab2:
             help="Ihre Zahlen werden mit dem Durchschnitt dieser Region verglichen"
         )
     
+    with st.expander("⚙️ Einstellungen Wissensverlust (optional)"):
+        st.markdown("Ab wann gilt ein Mitarbeiter als **kritisch** bzw. als **Warnung**?")
+        k1, k2, k3, k4 = st.columns(4)
+        with k1:
+            krit_dj = st.number_input("🔴 Kritisch ab Dienstjahren", min_value=0, max_value=60, value=15)
+        with k2:
+            krit_jbr = st.number_input("🔴 ...und höchstens Jahre bis Rente", min_value=0, max_value=30, value=5)
+        with k3:
+            warn_dj = st.number_input("🟡 Warnung ab Dienstjahren", min_value=0, max_value=60, value=10)
+        with k4:
+            warn_jbr = st.number_input("🟡 ...und höchstens Jahre bis Rente", min_value=0, max_value=30, value=10)
+        level_text = st.text_input(
+            "Gewichte je Karrierelevel",
+            placeholder="z. B. Senior=1,2; Lead=1,5",
+            help="Die Dienstjahre werden mit dem Gewicht multipliziert, bevor die Schwellen geprüft werden"
+        )
+        knappheit = st.slider(
+            "Faktor für Positionen, die nur eine Person innehat",
+            min_value=1.0, max_value=3.0, value=1.0, step=0.1,
+            help="1,0 = aus. Wissen von Einzelpositionen ist schwerer zu ersetzen"
+        )
+    modell = RiskModel(krit_dj, krit_jbr, warn_dj, warn_jbr, parse_level_gewichte(level_text),
+                       knappheit_max=1, knappheit_faktor=knappheit)
+    
     st.markdown("---")
     
     # START BUTTON
@@ -279,1090 +1019,272 @@ with tab2:
         "🚀  ANALYSE STARTEN",
         type="primary",
         use_container_width=True,
-        disabled=uploaded_file is None
+        disabled=not dateien
     )
     
-    if uploaded_file is None:
+    if not uploaded_files:
         st.warning("⚠️ Bitte laden Sie zuerst eine Excel-Datei hoch (siehe Schritt 1)")
     
     # ============================================
     # ANALYSE DURCHFÜHREN
     # ============================================
-    if analyse_button and uploaded_file:
+    # Die Analyse bleibt sichtbar, bis eine andere Datei hochgeladen wird.
+    # So rechnet z.B. ein neues Rentenalter nur die Rentenabschnitte neu.
+    datei_id = tuple(getattr(f, 'file_id', f.name) for f in uploaded_files)
+    if analyse_button and dateien:
+        st.session_state['analyse_datei'] = datei_id
+    analyse_aktiv = bool(dateien) and st.session_state.get('analyse_datei') == datei_id
+    
+    if analyse_aktiv:
         
-        # Lade-Animation
-        with st.spinner("🔄 Bitte warten... Ihre Daten werden analysiert..."):
+        # Zeitmessung; Berechnungen aus dem Cache tauchen nicht auf
+        messung = Messung(speicher=st.session_state.get('perf_speicher', False))
+        
+        # Die Analyse läuft als Job im Hintergrund; die Seite bleibt bedienbar
+        with st.container():
             try:
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
-                df = df.dropna(how='all')
+                spalten = [zuordnungen[header_fingerprint(kopf)] for kopf in kopfzeilen]
+                h = content_hash(dateien[0][1]) if len(dateien) == 1 else group_hash(dateien)
+                messung.kontext['datei'] = h[:12]
+                h = content_hash(f"{h}{[sorted(c.items()) for c in spalten]}".encode())
+                cache = daten_cache()
+                jahr = datetime.now().year
+                auswahl = st.session_state.get('gesellschaft', KONZERN)
+                fk = filter_key({rolle: st.session_state.get(f'filter_{rolle}', []) for rolle in FILTER_ROLLEN})
+                bereinigen = st.session_state.get('duplikate_entfernen', False)
                 
-                if len(df) == 0:
-                    st.error("❌ Die Excel-Datei ist leer! Bitte füllen Sie zuerst Daten ein.")
-                else:
-                    # Spalten finden
-                    def find(names):
-                        for c in df.columns:
-                            for n in names:
-                                if n in str(c).lower().replace('_','').replace(' ',''):
-                                    return c
-                        return None
+                def einlesen(messung):
+                    with messung.abschnitt('Einlesen'):
+                        if len(dateien) == 1:
+                            df = read_upload(io.BytesIO(dateien[0][1]), dateien[0][0], spalten[0], kopfzeilen[0])
+                        else:
+                            df = read_group(dateien, spalten=spalten, kopfzeilen=kopfzeilen)
+                    with messung.abschnitt('Vorbereitung', len(df)):
+                        return prepare(df, jahr, spalten[0] if len(dateien) == 1 else None)
+                
+                def rechnen(messung):
+                    """Läuft im Job-Thread: alles, was nicht schon im Cache liegt."""
+                    # Einlesen + Alter/DJ/Gehalt nur einmal pro Dateiinhalt und Spaltenzuordnung
+                    gesamt = prep = cache.get(('prep', h, jahr), lambda: einlesen(messung))
+                    # Doppelte Datensätze über die ganze Datei (auch über Gesellschaften hinweg)
+                    duplikate = cache.get(('duplikate', h, jahr), lambda: duplicate_check(gesamt.df, gesamt.cols))
+                    hb = h
+                    if bereinigen and duplikate.wiederholung.any():
+                        gesamt = prep = cache.get(('prep', h, jahr, 'bereinigt'),
+                                                  lambda: drop_duplicates(gesamt, duplikate))
+                        hb = (h, 'bereinigt')
+                    gesellschaft = auswahl if auswahl in entities(gesamt) else None
+                    hg = hb
+                    if gesellschaft:
+                        prep = cache.get(('prep', hb, jahr, gesellschaft), lambda: entity_prep(gesamt, gesellschaft))
+                        hg = (hb, gesellschaft)
+                    # Filter: Zeilen aus dem Gruppen-Index, PreparedData nur für die Teilmenge
+                    index = cache.get(('gruppen', hg, jahr), lambda: build_group_index(prep.df, prep.cols))
+                    maske = index.maske(fk) if fk else None
+                    if maske is not None:
+                        prep = cache.get(('prep', hg, jahr, fk), lambda: subset_prep(prep, maske))
+                        hg = (hg, fk)
+                    if len(prep.df) == 0:
+                        return gesamt, prep, gesellschaft, duplikate, index, None, None
+                    basis = cache.get(('basis', hg, jahr), lambda: analyze_base(prep, messung),
+                                      size=lambda b: estimate_size(b, ohne=(prep.df,)))
+                    rente_wissen = cache.get(('rente', hg, jahr, rentenalter, modell),
+                                             lambda: analyze_retirement(prep, rentenalter, messung, modell,
+                                                                        basis.rente_vergleich))
+                    return gesamt, prep, gesellschaft, duplikate, index, basis, rente_wissen
+                
+                # Gleiche Eingaben = gleicher Job; ein zweiter Klick rechnet nicht von vorn
+                schluessel = (h, jahr, bereinigen, auswahl, fk, rentenalter, modell)
+                job = st.session_state.get('analyse_job')
+                if job is None or job.schluessel != schluessel or job.abgebrochen:
+                    if job is not None:
+                        job_pool().loslassen(job)
+                    job = job_pool().starten(schluessel, rechnen, ANALYSE_STUFEN,
+                                             messung.speicher, messung.kontext)
+                    st.session_state['analyse_job'] = job
+                job.warten(JOB_SOFORT_S)
+                if job.fehler is not None:
+                    raise job.fehler
+                
+                if job.fertig and not job.abgebrochen:
+                    gesamt, prep, gesellschaft, duplikate, index, basis, rente_wissen = job.ergebnis
+                    # Berechnungszeiten nur beim ersten Anzeigen des Ergebnisses
+                    if not job.abgeholt:
+                        messung.eintraege.extend(job.messung.eintraege)
+                        job.abgeholt = True
                     
-                    col_geb = find(['geburtsjahr','jahrgang'])
-                    col_ein = find(['eintrittsjahr','eintritt'])
-                    col_ges = find(['geschlecht'])
-                    col_abt = find(['abteilung'])
-                    col_lvl = find(['karrierelevel','level'])
-                    col_geh = find(['gehalt','brutto'])
-                    col_az = find(['arbeitszeit'])
-                    col_ein_pos = find(['einstiegsposition','einstieg'])
-                    col_akt_pos = find(['aktuelleposition','aktuelle','position'])
-                    col_ort = find(['standort'])
+                    # Doppelte Datensätze: Hinweis und Bereinigung vor der Analyse
+                    doppelt = int(duplikate.wiederholung.sum())
+                    entfernt = doppelt if bereinigen else 0
+                    if doppelt:
+                        st.warning(f"⚠️ **{doppelt} doppelte Datensätze** gefunden (gleiche Mitarbeiter-ID oder "
+                                   "gleiche Merkmale ohne ID). Details im Abschnitt Datenqualität.")
+                        st.checkbox("Doppelte Datensätze vor der Analyse entfernen (das erste Vorkommen bleibt)",
+                                    key='duplikate_entfernen')
+                    if entfernt:
+                        h = (h, 'bereinigt')
                     
-                    jahr = datetime.now().year
+                    # Drill-down: alle Abschnitte für eine einzelne Gesellschaft
+                    gesellschaften = entities(gesamt)
+                    if len(gesellschaften) > 1:
+                        st.markdown("### 🏢 Gesellschaft")
+                        st.dataframe(entity_overview(gesamt), use_container_width=True)
+                        st.selectbox("Welche Gesellschaft möchten Sie auswerten?",
+                                     [KONZERN] + gesellschaften, key='gesellschaft')
+                    if gesellschaft:
+                        h = (h, gesellschaft)
                     
-                    if col_geb: 
-                        df['Alter'] = jahr - pd.to_numeric(df[col_geb], errors='coerce')
-                    if col_ein: 
-                        df['DJ'] = jahr - pd.to_numeric(df[col_ein], errors='coerce')
-                    if col_geh: 
-                        df['Gehalt'] = pd.to_numeric(df[col_geh].astype(str).str.replace('[^0-9.]','',regex=True), errors='coerce')
+                    # Globale Filter: gelten für alle Abschnitte und Downloads
+                    # Auswahl aus einer anderen Datei/Gesellschaft: unbekannte Werte streichen und
+                    # neu rechnen, statt ungefiltert (oder leer) mit veralteter Filterleiste anzuzeigen
+                    rollen = [r for r in FILTER_ROLLEN if r in index.werte]
+                    veraltet = False
+                    for rolle in FILTER_ROLLEN:
+                        schl = f'filter_{rolle}'
+                        if schl not in st.session_state:
+                            continue
+                        optionen = set(index.werte[rolle]) if rolle in rollen else set()
+                        gueltig = [w for w in st.session_state[schl] if w in optionen]
+                        if len(gueltig) != len(st.session_state[schl]):
+                            st.session_state[schl] = gueltig
+                            veraltet = True
+                    if veraltet:
+                        st.rerun()
+                    with st.expander("🔎 Filter", expanded=bool(fk)):
+                        if not rollen:
+                            st.info("Keine Spalten zum Filtern gefunden")
+                        for rolle, fspalte in zip(rollen, st.columns(max(len(rollen), 1))):
+                            with fspalte:
+                                st.multiselect(FILTER_ROLLEN[rolle], list(index.werte[rolle]),
+                                               key=f'filter_{rolle}', placeholder="Alle")
+                    if fk:
+                        h = (h, fk)
+                
+                if not job.fertig or job.abgebrochen:
+                    job_fortschritt(job)
+                elif len(prep.df) == 0 and fk:
+                    st.warning("Keine Mitarbeiter passen zu den gewählten Filtern.")
+                elif len(prep.df) == 0:
+                    st.error("❌ Die Excel-Datei ist leer! Bitte füllen Sie zuerst Daten ein.")
+                else:
+                    res = combine(basis, prep, rentenalter, region, rente_wissen, messung)
                     
-                    charts_html = []
+                    # Diagramme, die von Reglern abhängen, gelten nur für diese Analyse
+                    if st.session_state.get('diagramme_fuer') != schluessel:
+                        st.session_state['diagramme_fuer'] = schluessel
+                        st.session_state['diagramme'] = {}
                     
                     # ============================================
                     # ERFOLGS-MELDUNG
                     # ============================================
+                    messung.weiter('Übersicht', res.n)
                     st.markdown("---")
-                    st.success(f"✅ **{len(df)} Mitarbeiter** wurden erfolgreich geladen!")
+                    st.success(f"✅ **{res.n} Mitarbeiter** wurden erfolgreich geladen!"
+                               + (f" Auswertung für **{gesellschaft}**." if gesellschaft else "")
+                               + (f" Filter: {filter_text(fk)}." if fk else "")
+                               + (f" {entfernt} doppelte Datensätze entfernt." if entfernt else ""))
                     
                     # Übersicht
                     st.markdown("## 📋 Übersicht Ihrer Daten")
                     
                     m1, m2, m3, m4 = st.columns(4)
                     with m1:
-                        st.metric("👥 Mitarbeiter", len(df))
+                        st.metric("👥 Mitarbeiter", res.n)
                     with m2:
-                        if 'Alter' in df.columns:
-                            st.metric("🎂 Ø Alter", f"{df['Alter'].mean():.1f} Jahre")
+                        if res.alter_mean is not None:
+                            st.metric("🎂 Ø Alter", f"{res.alter_mean:.1f} Jahre")
                     with m3:
-                        if 'DJ' in df.columns:
-                            st.metric("🏆 Ø Betriebszugehörigkeit", f"{df['DJ'].mean():.1f} Jahre")
+                        if res.dj_mean is not None:
+                            st.metric("🏆 Ø Betriebszugehörigkeit", f"{res.dj_mean:.1f} Jahre")
                     with m4:
-                        if 'Gehalt' in df.columns:
-                            st.metric("💰 Ø Gehalt", f"{df['Gehalt'].mean():,.0f} €")
+                        if res.gehalt_mean is not None:
+                            st.metric("💰 Ø Gehalt", f"{res.gehalt_mean:,.0f} €")
+                    
+                    messung.stopp()
                     
                     # ============================================
-                    # DATENQUALITÄTS-CHECK
+                    # ABSCHNITTE (je ein Tab, gebaut wird nur der offene)
                     # ============================================
-                    st.markdown("---")
-                    st.markdown("## 🔍 Datenqualitäts-Check")
-                    
-                    st.markdown("""
-                    <div class="help-text">
-                    <b>💡 Was zeigt das?</b><br><br>
-                    Hier sehen Sie auf einen Blick:<br>
-                    • 🔴 <b>Fehlende Daten</b> = Leere Zellen in Ihrer Excel<br>
-                    • 🟡 <b>Ausreißer</b> = Werte die ungewöhnlich hoch oder niedrig sind (könnten Tippfehler sein)
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Alle Spalten für Qualitätscheck
-                    qual_spalten = {
-                        'Geburtsjahr': col_geb,
-                        'Eintrittsjahr': col_ein,
-                        'Geschlecht': col_ges,
-                        'Abteilung': col_abt,
-                        'Karrierelevel': col_lvl,
-                        'Gehalt': col_geh,
-                        'Arbeitszeit': col_az,
-                        'Einstiegsposition': col_ein_pos,
-                        'Aktuelle Position': col_akt_pos,
-                        'Standort': col_ort
-                    }
-                    
-                    # Fehlende Werte berechnen
-                    fehlend_data = []
-                    for name, col in qual_spalten.items():
-                        if col and col in df.columns:
-                            fehlend = df[col].isna().sum()
-                            pct = round(fehlend / len(df) * 100, 1)
-                            fehlend_data.append({
-                                'Spalte': name,
-                                'Fehlend': fehlend,
-                                'Prozent': pct,
-                                'Status': '🔴 Kritisch' if pct > 20 else ('🟡 Prüfen' if pct > 5 else '🟢 OK')
-                            })
-                    
-                    # Ausreißer berechnen
-                    ausreisser_data = []
-                    ausreisser_details = []
+                    abschnitte = [('🔍 Datenqualität', 'Datenqualität', abschnitt_qualitaet, (res, entfernt))]
+                    if res.rente is not None:
+                        abschnitte.append(('🎯 Rente', 'Rente', abschnitt_rente, (res,)))
+                    if res.treue is not None or prep.cols['ein'] or prep.cols['geb']:
+                        abschnitte.append(('🏆 Dienstjahre', 'Dienstjahre', abschnitt_dienstjahre, (res, prep, h)))
+                    if res.wissen is not None:
+                        abschnitte.append(('⚠️ Wissensverlust', 'Wissensverlust', abschnitt_wissen, (res, modell)))
+                    abschnitte.append(('🔮 Prognose', 'Personalprognose', abschnitt_prognose, (res, prep, h, messung)))
+                    if res.karriere is not None:
+                        abschnitte.append(('📈 Karriere', 'Karriere', abschnitt_karriere, (res, prep, h)))
+                    abschnitte.append(('📊 Weitere Auswertungen', 'Weitere Auswertungen', abschnitt_weitere, (res,)))
+                    if res.benchmark is not None:
+                        abschnitte.append(('⚖️ Benchmark', 'Benchmark', abschnitt_benchmark, (res,)))
+                    # Monatsstände gelten für den ganzen Bestand, nicht für eine einzelne Gesellschaft
+                    if HAS_PYARROW and gesellschaft is None and not fk and ID_SPALTE in prep.df.columns:
+                        abschnitte.append(('📅 Monatsvergleich', 'Monatsvergleich', abschnitt_monatsvergleich,
+                                           (res, prep, h, modell)))
                     
-                    # Alter prüfen
-                    if 'Alter' in df.columns:
-                        alter = df['Alter'].dropna()
-                        if len(alter) > 0:
-                            zu_jung = df[df['Alter'] < 16]
-                            zu_alt = df[df['Alter'] > 70]
-                            ausreisser_data.append({
-                                'Kategorie': 'Alter < 16 Jahre',
-                                'Anzahl': len(zu_jung),
-                                'Status': '🔴' if len(zu_jung) > 0 else '🟢'
-                            })
-                            ausreisser_data.append({
-                                'Kategorie': 'Alter > 70 Jahre',
-                                'Anzahl': len(zu_alt),
-                                'Status': '🔴' if len(zu_alt) > 0 else '🟢'
-                            })
-                            if len(zu_jung) > 0:
-                                for _, row in zu_jung.head(5).iterrows():
-                                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Alter {row['Alter']:.0f} (zu jung?)")
-                            if len(zu_alt) > 0:
-                                for _, row in zu_alt.head(5).iterrows():
-                                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Alter {row['Alter']:.0f} (zu alt?)")
-                    
-                    # Dienstjahre prüfen
-                    if 'DJ' in df.columns:
-                        dj = df['DJ'].dropna()
-                        if len(dj) > 0:
-                            negativ_dj = df[df['DJ'] < 0]
-                            sehr_lang = df[df['DJ'] > 50]
-                            ausreisser_data.append({
-                                'Kategorie': 'Negative Dienstjahre',
-                                'Anzahl': len(negativ_dj),
-                                'Status': '🔴' if len(negativ_dj) > 0 else '🟢'
-                            })
-                            ausreisser_data.append({
-                                'Kategorie': 'Dienstjahre > 50',
-                                'Anzahl': len(sehr_lang),
-                                'Status': '🟡' if len(sehr_lang) > 0 else '🟢'
-                            })
-                            if len(negativ_dj) > 0:
-                                for _, row in negativ_dj.head(5).iterrows():
-                                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['DJ']:.0f} Dienstjahre (negativ!)")
-                            if len(sehr_lang) > 0:
-                                for _, row in sehr_lang.head(5).iterrows():
-                                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['DJ']:.0f} Dienstjahre (sehr lang)")
-                    
-                    # Gehalt prüfen
-                    if 'Gehalt' in df.columns:
-                        gehalt = df['Gehalt'].dropna()
-                        if len(gehalt) > 0:
-                            mean_g = gehalt.mean()
-                            std_g = gehalt.std()
-                            sehr_niedrig = df[(df['Gehalt'] < 15000) & (df['Gehalt'].notna())]
-                            sehr_hoch = df[(df['Gehalt'] > 300000) & (df['Gehalt'].notna())]
-                            # Statistische Ausreißer (mehr als 3 Standardabweichungen)
-                            stat_ausreisser = df[(df['Gehalt'].notna()) & ((df['Gehalt'] < mean_g - 3*std_g) | (df['Gehalt'] > mean_g + 3*std_g))]
-                            
-                            ausreisser_data.append({
-                                'Kategorie': 'Gehalt < 15.000€',
-                                'Anzahl': len(sehr_niedrig),
-                                'Status': '🟡' if len(sehr_niedrig) > 0 else '🟢'
-                            })
-                            ausreisser_data.append({
-                                'Kategorie': 'Gehalt > 300.000€',
-                                'Anzahl': len(sehr_hoch),
-                                'Status': '🔴' if len(sehr_hoch) > 0 else '🟢'
-                            })
-                            ausreisser_data.append({
-                                'Kategorie': 'Statistische Ausreißer (±3σ)',
-                                'Anzahl': len(stat_ausreisser),
-                                'Status': '🟡' if len(stat_ausreisser) > 0 else '🟢'
-                            })
-                            if len(sehr_niedrig) > 0:
-                                for _, row in sehr_niedrig.head(3).iterrows():
-                                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['Gehalt']:,.0f}€ (sehr niedrig)")
-                            if len(sehr_hoch) > 0:
-                                for _, row in sehr_hoch.head(3).iterrows():
-                                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['Gehalt']:,.0f}€ (sehr hoch)")
-                    
-                    # Logik-Prüfung: Eintritt vor Geburt?
-                    if col_geb and col_ein:
-                        logik_fehler = df[df[col_ein] < df[col_geb]]
-                        ausreisser_data.append({
-                            'Kategorie': 'Eintritt vor Geburt (!)',
-                            'Anzahl': len(logik_fehler),
-                            'Status': '🔴' if len(logik_fehler) > 0 else '🟢'
-                        })
-                        if len(logik_fehler) > 0:
-                            for _, row in logik_fehler.head(3).iterrows():
-                                ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Geb. {row[col_geb]}, Eintritt {row[col_ein]} (unmöglich!)")
-                    
-                    # Eintritt mit unter 14?
-                    if 'Alter' in df.columns and 'DJ' in df.columns:
-                        zu_frueh = df[(df['Alter'] - df['DJ']) < 14]
-                        ausreisser_data.append({
-                            'Kategorie': 'Eintritt unter 14 Jahren',
-                            'Anzahl': len(zu_frueh),
-                            'Status': '🔴' if len(zu_frueh) > 0 else '🟢'
-                        })
-                        if len(zu_frueh) > 0:
-                            for _, row in zu_frueh.head(3).iterrows():
-                                eintrittsalter = row['Alter'] - row['DJ']
-                                ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Eintritt mit {eintrittsalter:.0f} Jahren (zu jung)")
-                    
-                    # Visualisierung
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        st.markdown("### 📊 Fehlende Daten pro Spalte")
-                        if fehlend_data:
-                            df_fehlend = pd.DataFrame(fehlend_data)
-                            
-                            # Farben basierend auf Prozent
-                            farben = ['#e74c3c' if p > 20 else '#f39c12' if p > 5 else '#2ecc71' for p in df_fehlend['Prozent']]
-                            
-                            fig = go.Figure()
-                            fig.add_trace(go.Bar(
-                                y=df_fehlend['Spalte'],
-                                x=df_fehlend['Prozent'],
-                                orientation='h',
-                                marker_color=farben,
-                                text=[f"{p}% ({f})" for p, f in zip(df_fehlend['Prozent'], df_fehlend['Fehlend'])],
-                                textposition='outside'
-                            ))
-                            fig.update_layout(
-                                title="Anteil fehlender Werte (%)",
-                                xaxis_title="Fehlend in %",
-                                height=400,
-                                font=dict(size=14),
-                                xaxis=dict(range=[0, max(df_fehlend['Prozent'].max() * 1.3, 10)])
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('00_Datenqualitaet_Fehlend.html', fig.to_html()))
-                            
-                            # Zusammenfassung
-                            kritisch = len([x for x in fehlend_data if '🔴' in x['Status']])
-                            warnung = len([x for x in fehlend_data if '🟡' in x['Status']])
-                            if kritisch > 0:
-                                st.error(f"🔴 {kritisch} Spalte(n) haben mehr als 20% fehlende Daten!")
-                            elif warnung > 0:
-                                st.warning(f"🟡 {warnung} Spalte(n) haben 5-20% fehlende Daten")
-                            else:
-                                st.success("🟢 Alle Spalten haben weniger als 5% fehlende Daten")
-                        else:
-                            st.info("Keine Spalten zum Prüfen gefunden")
-                    
-                    with c2:
-                        st.markdown("### ⚠️ Ausreißer & Fehler")
-                        if ausreisser_data:
-                            df_aus = pd.DataFrame(ausreisser_data)
-                            
-                            # Nur Zeilen mit Problemen anzeigen
-                            df_probleme = df_aus[df_aus['Anzahl'] > 0]
-                            
-                            if len(df_probleme) > 0:
-                                farben = ['#e74c3c' if '🔴' in s else '#f39c12' for s in df_probleme['Status']]
-                                
-                                fig = go.Figure()
-                                fig.add_trace(go.Bar(
-                                    y=df_probleme['Kategorie'],
-                                    x=df_probleme['Anzahl'],
-                                    orientation='h',
-                                    marker_color=farben,
-                                    text=df_probleme['Anzahl'],
-                                    textposition='outside'
-                                ))
-                                fig.update_layout(
-                                    title="Gefundene Probleme",
-                                    xaxis_title="Anzahl Datensätze",
-                                    height=400,
-                                    font=dict(size=14)
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('00_Datenqualitaet_Ausreisser.html', fig.to_html()))
-                            else:
-                                st.success("🟢 Keine offensichtlichen Ausreißer gefunden!")
-                                fig = go.Figure()
-                                fig.add_annotation(
-                                    text="✅ Alles OK!",
-                                    xref="paper", yref="paper",
-                                    x=0.5, y=0.5,
-                                    showarrow=False,
-                                    font=dict(size=40, color='#2ecc71')
-                                )
-                                fig.update_layout(height=400)
-                                st.plotly_chart(fig, use_container_width=True)
-                            
-                            # Kritische Fehler zählen
-                            krit_aus = len([x for x in ausreisser_data if '🔴' in x['Status'] and x['Anzahl'] > 0])
-                            warn_aus = len([x for x in ausreisser_data if '🟡' in x['Status'] and x['Anzahl'] > 0])
-                            
-                            if krit_aus > 0:
-                                st.error(f"🔴 {krit_aus} kritische(r) Fehler gefunden!")
-                            elif warn_aus > 0:
-                                st.warning(f"🟡 {warn_aus} mögliche(r) Ausreißer - bitte prüfen")
-                            else:
-                                st.success("🟢 Keine Ausreißer gefunden")
-                    
-                    # Details zu Ausreißern
-                    if ausreisser_details:
-                        with st.expander("📋 Details zu den gefundenen Problemen (klicken zum Öffnen)"):
-                            st.markdown("**Betroffene Datensätze:**")
-                            for detail in ausreisser_details[:15]:  # Max 15 anzeigen
-                                st.markdown(detail)
-                            if len(ausreisser_details) > 15:
-                                st.markdown(f"*... und {len(ausreisser_details) - 15} weitere*")
-                    
-                    # Gesamtbewertung
-                    st.markdown("### 📊 Gesamtbewertung Datenqualität")
-                    
-                    # Score berechnen
-                    total_fehlend = sum([x['Fehlend'] for x in fehlend_data]) if fehlend_data else 0
-                    max_fehlend = len(df) * len(fehlend_data) if fehlend_data else 1
-                    fehlend_score = 100 - (total_fehlend / max_fehlend * 100) if max_fehlend > 0 else 100
-                    
-                    ausreisser_count = sum([x['Anzahl'] for x in ausreisser_data if '🔴' in x['Status']]) if ausreisser_data else 0
-                    ausreisser_score = max(0, 100 - (ausreisser_count / len(df) * 500)) if len(df) > 0 else 100
-                    
-                    gesamt_score = (fehlend_score * 0.6 + ausreisser_score * 0.4)
-                    
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Vollständigkeit", f"{fehlend_score:.0f}%", 
-                            help="Wie viele Felder sind ausgefüllt?")
-                    with col2:
-                        st.metric("Plausibilität", f"{ausreisser_score:.0f}%",
-                            help="Wie viele Werte sind plausibel?")
-                    with col3:
-                        farbe = "🟢" if gesamt_score >= 80 else ("🟡" if gesamt_score >= 60 else "🔴")
-                        st.metric(f"{farbe} Gesamtscore", f"{gesamt_score:.0f}%")
-                    
-                    if gesamt_score >= 80:
-                        st.success("✅ **Gute Datenqualität!** Sie können die Analyse starten.")
-                    elif gesamt_score >= 60:
-                        st.warning("⚠️ **Mittlere Datenqualität.** Einige Analysen könnten ungenau sein.")
-                    else:
-                        st.error("❌ **Datenqualität verbesserungswürdig.** Bitte prüfen Sie die markierten Probleme.")
+                    st.markdown("---")
+                    namen = [titel for titel, _, _, _ in abschnitte]
+                    tabs = st.tabs(namen, key='abschnitt', on_change='rerun',
+                                   default=ABSCHNITT_START if ABSCHNITT_START in namen else None)
+                    for tab, (_, name, zeigen, args) in zip(tabs, abschnitte):
+                        with tab:
+                            if tab.open:
+                                with messung.abschnitt(name, res.n, phase='darstellung'):
+                                    zeigen(*args)
                     
                     # ============================================
-                    # INTERAKTIVE MISSING VALUES MATRIX
+                    # DOWNLOAD
                     # ============================================
+                    messung.weiter('Download', res.n)
                     st.markdown("---")
-                    st.markdown("## 🗺️ Daten-Matrix: Wo fehlen Daten? Wo sind Ausreißer?")
+                    st.markdown("## 📥 Alle Diagramme speichern")
                     
                     st.markdown("""
-                    <div class="help-text">
-                    <b>💡 So lesen Sie diese Matrix:</b><br><br>
-                    • Jede <b>Zeile</b> = ein Mitarbeiter (oben = erster, unten = letzter)<br>
-                    • Jede <b>Spalte</b> = ein Datenfeld<br>
-                    • <span style="color:#2ecc71"><b>■ Grün</b></span> = Daten vorhanden und OK<br>
-                    • <span style="color:#e74c3c"><b>■ Rot</b></span> = Daten fehlen (leere Zelle)<br>
-                    • <span style="color:#f39c12"><b>■ Orange</b></span> = Ausreißer / ungewöhnlicher Wert<br><br>
-                    <b>Tipp:</b> Fahren Sie mit der Maus über die Matrix um Details zu sehen!
+                    <div class="info-box">
+                    <b>💡 Tipp:</b> Klicken Sie auf den Button unten, um alle Diagramme als ZIP-Datei zu speichern.<br>
+                    Die Diagramme sind HTML-Dateien und können im Browser geöffnet werden.
+                    Alle auf einen Blick: <b>bericht.html</b><br>
+                    Enthalten sind alle Abschnitte, auch die, die Sie nicht geöffnet haben.
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    # Erstelle Matrix-Daten
-                    # Spalten für die Matrix auswählen
-                    matrix_spalten = []
-                    matrix_namen = []
-                    
-                    spalten_mapping = [
-                        (col_geb, 'Geburtsjahr'),
-                        (col_ein, 'Eintrittsjahr'),
-                        (col_ges, 'Geschlecht'),
-                        (col_abt, 'Abteilung'),
-                        (col_lvl, 'Level'),
-                        (col_geh, 'Gehalt'),
-                        (col_az, 'Arbeitszeit'),
-                        (col_ein_pos, 'Einstiegs-Pos'),
-                        (col_akt_pos, 'Aktuelle Pos'),
-                        (col_ort, 'Standort')
-                    ]
-                    
-                    for col, name in spalten_mapping:
-                        if col and col in df.columns:
-                            matrix_spalten.append(col)
-                            matrix_namen.append(name)
-                    
-                    if matrix_spalten:
-                        # Limitiere auf max 200 Zeilen für Performance
-                        max_rows = min(len(df), 200)
-                        df_sample = df.head(max_rows).copy()
-                        
-                        # Matrix erstellen: 0=OK, 1=Fehlend, 2=Ausreißer
-                        matrix_data = []
-                        hover_texts = []
-                        
-                        for idx, row in df_sample.iterrows():
-                            row_data = []
-                            row_hover = []
-                            ma_id = row.get('Mitarbeiter_ID', f'Zeile {idx+1}')
-                            
-                            for col, name in zip(matrix_spalten, matrix_namen):
-                                val = row[col]
-                                
-                                # Prüfe ob fehlend
-                                if pd.isna(val):
-                                    row_data.append(1)  # Rot - fehlend
-                                    row_hover.append(f"{ma_id}<br>{name}: FEHLT")
-                                else:
-                                    # Prüfe auf Ausreißer
-                                    is_ausreisser = False
-                                    ausreisser_grund = ""
-                                    
-                                    # Geburtsjahr-Ausreißer
-                                    if col == col_geb and 'Alter' in df.columns:
-                                        alter = jahr - val
-                                        if alter < 16:
-                                            is_ausreisser = True
-                                            ausreisser_grund = f"Alter {alter} (zu jung!)"
-                                        elif alter > 70:
-                                            is_ausreisser = True
-                                            ausreisser_grund = f"Alter {alter} (sehr alt)"
-                                    
-                                    # Eintrittsjahr-Ausreißer
-                                    if col == col_ein:
-                                        dj_val = jahr - val
-                                        if dj_val < 0:
-                                            is_ausreisser = True
-                                            ausreisser_grund = f"Eintritt {val} (Zukunft!)"
-                                        elif dj_val > 50:
-                                            is_ausreisser = True
-                                            ausreisser_grund = f"{dj_val} Dienstjahre (sehr lang)"
-                                        # Logik-Check
-                                        if col_geb and col_geb in row and not pd.isna(row[col_geb]):
-                                            if val < row[col_geb]:
-                                                is_ausreisser = True
-                                                ausreisser_grund = f"Eintritt {val} vor Geburt {row[col_geb]}!"
-                                            elif (val - row[col_geb]) < 14:
-                                                is_ausreisser = True
-                                                ausreisser_grund = f"Eintritt mit {val - row[col_geb]} Jahren (Kind!)"
-                                    
-                                    # Gehalt-Ausreißer
-                                    if col == col_geh:
-                                        if val < 15000:
-                                            is_ausreisser = True
-                                            ausreisser_grund = f"{val:,.0f}€ (sehr niedrig)"
-                                        elif val > 300000:
-                                            is_ausreisser = True
-                                            ausreisser_grund = f"{val:,.0f}€ (sehr hoch)"
-                                    
-                                    if is_ausreisser:
-                                        row_data.append(2)  # Orange - Ausreißer
-                                        row_hover.append(f"{ma_id}<br>{name}: {ausreisser_grund}")
-                                    else:
-                                        row_data.append(0)  # Grün - OK
-                                        # Wert formatieren für Hover
-                                        if col == col_geh:
-                                            val_str = f"{val:,.0f}€"
-                                        else:
-                                            val_str = str(val)
-                                        row_hover.append(f"{ma_id}<br>{name}: {val_str}")
-                            
-                            matrix_data.append(row_data)
-                            hover_texts.append(row_hover)
-                        
-                        # Plotly Heatmap erstellen
-                        import numpy as np
-                        
-                        # Farbskala: 0=Grün, 1=Rot, 2=Orange
-                        colorscale = [
-                            [0, '#2ecc71'],      # 0 = Grün (OK)
-                            [0.5, '#e74c3c'],    # 1 = Rot (Fehlend)
-                            [1, '#f39c12']       # 2 = Orange (Ausreißer)
-                        ]
-                        
-                        fig_matrix = go.Figure(data=go.Heatmap(
-                            z=matrix_data,
-                            x=matrix_namen,
-                            y=[f"MA {i+1}" for i in range(len(matrix_data))],
-                            hoverongaps=False,
-                            hovertext=hover_texts,
-                            hovertemplate='%{hovertext}<extra></extra>',
-                            colorscale=colorscale,
-                            zmin=0,
-                            zmax=2,
-                            showscale=False
-                        ))
-                        
-                        fig_matrix.update_layout(
-                            title=f"Daten-Matrix ({max_rows} von {len(df)} Mitarbeitern)" + 
-                                  (" ⚠️ Zeigt nur erste 200" if len(df) > 200 else ""),
-                            xaxis_title="Datenfelder",
-                            yaxis_title="Mitarbeiter",
-                            height=max(400, min(800, max_rows * 4)),
-                            font=dict(size=12),
-                            xaxis=dict(side='top', tickangle=-45),
-                            yaxis=dict(autorange='reversed')  # Erste Zeile oben
-                        )
-                        
-                        st.plotly_chart(fig_matrix, use_container_width=True)
-                        charts_html.append(('00_Daten_Matrix.html', fig_matrix.to_html()))
-                        
-                        # Legende
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            ok_count = sum(1 for row in matrix_data for val in row if val == 0)
-                            st.markdown(f"🟢 **OK:** {ok_count} Felder")
-                        with col2:
-                            fehlend_count = sum(1 for row in matrix_data for val in row if val == 1)
-                            st.markdown(f"🔴 **Fehlend:** {fehlend_count} Felder")
-                        with col3:
-                            ausreisser_count_matrix = sum(1 for row in matrix_data for val in row if val == 2)
-                            st.markdown(f"🟡 **Ausreißer:** {ausreisser_count_matrix} Felder")
-                    
-                    # ============================================
-                    # TABELLE MIT PROBLEM-DATENSÄTZEN
-                    # ============================================
-                    st.markdown("### 📋 Datensätze mit Problemen")
-                    
-                    # Sammle alle Problem-Zeilen
-                    problem_rows = []
-                    
-                    for idx, row in df.iterrows():
-                        probleme = []
-                        
-                        # Fehlende Werte
-                        for col, name in spalten_mapping:
-                            if col and col in df.columns and pd.isna(row[col]):
-                                probleme.append(f"❌ {name} fehlt")
-                        
-                        # Ausreißer
-                        if 'Alter' in df.columns and not pd.isna(row.get('Alter')):
-                            if row['Alter'] < 16:
-                                probleme.append(f"⚠️ Alter {row['Alter']:.0f} (zu jung)")
-                            elif row['Alter'] > 70:
-                                probleme.append(f"⚠️ Alter {row['Alter']:.0f} (sehr alt)")
-                        
-                        if 'DJ' in df.columns and not pd.isna(row.get('DJ')):
-                            if row['DJ'] < 0:
-                                probleme.append(f"⚠️ {row['DJ']:.0f} Dienstjahre (negativ!)")
-                            elif row['DJ'] > 50:
-                                probleme.append(f"⚠️ {row['DJ']:.0f} Dienstjahre (sehr lang)")
-                        
-                        if 'Gehalt' in df.columns and not pd.isna(row.get('Gehalt')):
-                            if row['Gehalt'] < 15000:
-                                probleme.append(f"⚠️ Gehalt {row['Gehalt']:,.0f}€ (niedrig)")
-                            elif row['Gehalt'] > 300000:
-                                probleme.append(f"⚠️ Gehalt {row['Gehalt']:,.0f}€ (hoch)")
-                        
-                        # Logik-Fehler
-                        if col_geb and col_ein and col_geb in df.columns and col_ein in df.columns:
-                            if not pd.isna(row[col_geb]) and not pd.isna(row[col_ein]):
-                                if row[col_ein] < row[col_geb]:
-                                    probleme.append(f"🚫 Eintritt vor Geburt!")
-                                elif (row[col_ein] - row[col_geb]) < 14:
-                                    probleme.append(f"🚫 Eintritt mit {row[col_ein] - row[col_geb]} Jahren")
-                        
-                        if probleme:
-                            problem_rows.append({
-                                'ID': row.get('Mitarbeiter_ID', f'Zeile {idx+1}'),
-                                'Geburtsjahr': row.get(col_geb, '-') if col_geb else '-',
-                                'Eintrittsjahr': row.get(col_ein, '-') if col_ein else '-',
-                                'Probleme': ' | '.join(probleme[:3]) + ('...' if len(probleme) > 3 else '')
-                            })
-                    
-                    if problem_rows:
-                        df_probleme = pd.DataFrame(problem_rows[:50])  # Max 50 anzeigen
-                        st.dataframe(df_probleme, use_container_width=True, height=300)
-                        
-                        if len(problem_rows) > 50:
-                            st.info(f"ℹ️ Zeigt 50 von {len(problem_rows)} Datensätzen mit Problemen")
-                        
-                        # Download-Button für Problem-Liste
-                        csv_probleme = pd.DataFrame(problem_rows).to_csv(index=False).encode('utf-8')
-                        st.download_button(
-                            label="📥 Problem-Liste als CSV herunterladen",
-                            data=csv_probleme,
-                            file_name="Problem_Datensaetze.csv",
-                            mime="text/csv"
-                        )
-                    else:
-                        st.success("🎉 **Keine Datensätze mit Problemen gefunden!**")
-                    
-                    # ============================================
-                    # RENTENANALYSE
-                    # ============================================
-                    if 'Alter' in df.columns:
-                        d = df[df['Alter'].notna()].copy()
-                        if len(d) > 0:
-                            d['JbR'] = rentenalter - d['Alter']
-                            d['RJ'] = jahr + d['JbR']
-                            d['Kat'] = pd.cut(d['JbR'], [-100,0,5,10,15,20,100], 
-                                labels=['Bereits Rente','0-5 Jahre','5-10 Jahre','10-15 Jahre','15-20 Jahre','Mehr als 20 Jahre'])
-                            
-                            st.markdown("---")
-                            st.markdown("## 🎯 Wann gehen Ihre Mitarbeiter in Rente?")
-                            
-                            r5 = len(d[d['JbR'] <= 5])
-                            r10 = len(d[(d['JbR'] > 5) & (d['JbR'] <= 10)])
-                            
-                            if r5 > 0:
-                                st.error(f"""
-                                ⚠️ **ACHTUNG:** {r5} Mitarbeiter ({round(r5/len(d)*100,1)}%) 
-                                erreichen in den nächsten **5 Jahren** das Rentenalter!
-                                """)
-                            
-                            if r10 > 0:
-                                st.warning(f"""
-                                ℹ️ Weitere {r10} Mitarbeiter ({round(r10/len(d)*100,1)}%) 
-                                gehen in **5-10 Jahren** in Rente.
-                                """)
-                            
-                            c1, c2 = st.columns(2)
-                            
-                            with c1:
-                                k = d['Kat'].value_counts()
-                                fig = go.Figure(go.Pie(
-                                    labels=[str(x) for x in k.index], 
-                                    values=list(k.values),
-                                    marker_colors=['#c0392b','#e74c3c','#f39c12','#f1c40f','#2ecc71','#27ae60'],
-                                    textinfo='label+percent+value',
-                                    textfont_size=16
-                                ))
-                                fig.update_layout(title="Wie lange noch bis zur Rente?", height=500, font=dict(size=16))
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('01_Rente_Uebersicht.html', fig.to_html()))
-                            
-                            with c2:
-                                rj = d[(d['RJ']>=jahr)&(d['RJ']<=jahr+15)]['RJ'].value_counts().sort_index()
-                                if len(rj) > 0:
-                                    fig = go.Figure(go.Bar(
-                                        x=[int(x) for x in rj.index], 
-                                        y=list(rj.values),
-                                        marker_color=['#e74c3c' if j<=jahr+5 else '#f39c12' if j<=jahr+10 else '#2ecc71' for j in rj.index],
-                                        text=list(rj.values),
-                                        textposition='outside',
-                                        textfont_size=14
-                                    ))
-                                    fig.update_layout(title="Renteneintritte pro Jahr", height=500, font=dict(size=14),
-                                        xaxis_title="Jahr", yaxis_title="Anzahl Mitarbeiter")
-                                    st.plotly_chart(fig, use_container_width=True)
-                                    charts_html.append(('02_Rente_Pro_Jahr.html', fig.to_html()))
-                            
-                            c1, c2 = st.columns(2)
-                            
-                            with c1:
-                                fig = go.Figure(go.Histogram(x=list(d['Alter']), nbinsx=20, marker_color='#3498db'))
-                                fig.update_layout(title="Altersverteilung aller Mitarbeiter", height=450, font=dict(size=14),
-                                    xaxis_title="Alter", yaxis_title="Anzahl")
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('03_Altersverteilung.html', fig.to_html()))
-                            
-                            with c2:
-                                kum = [int(len(d[d['JbR']<=j])) for j in range(1,11)]
-                                fig = go.Figure(go.Bar(
-                                    x=[f"In {j} Jahr(en)" for j in range(1,11)], 
-                                    y=kum,
-                                    marker_color=['#e74c3c']*3+['#f39c12']*3+['#2ecc71']*4,
-                                    text=[f"{k} ({round(k/len(d)*100)}%)" for k in kum],
-                                    textposition='outside'
-                                ))
-                                fig.update_layout(title="Wie viele gehen wann?", height=450, font=dict(size=14),
-                                    yaxis_title="Anzahl Mitarbeiter (kumuliert)")
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('04_Rente_Kumuliert.html', fig.to_html()))
-                            
-                            # Nach Abteilung
-                            if col_abt:
-                                st.markdown("### Nach Abteilung:")
-                                c1, c2 = st.columns(2)
-                                
-                                with c1:
-                                    avg = d.groupby(col_abt)['Alter'].mean().sort_values()
-                                    fig = go.Figure(go.Bar(
-                                        y=list(avg.index), 
-                                        x=[round(float(x),1) for x in avg.values],
-                                        orientation='h',
-                                        marker_color=['#e74c3c' if a>=50 else '#f39c12' if a>=45 else '#2ecc71' for a in avg.values],
-                                        text=[f"{x:.1f} Jahre" for x in avg.values],
-                                        textposition='outside'
-                                    ))
-                                    fig.update_layout(title="Durchschnittsalter pro Abteilung", height=500, font=dict(size=14))
-                                    st.plotly_chart(fig, use_container_width=True)
-                                    charts_html.append(('05_Alter_Abteilung.html', fig.to_html()))
-                                
-                                with c2:
-                                    ab5 = d[d['JbR']<=5].groupby(col_abt).size()
-                                    ges = d.groupby(col_abt).size()
-                                    pct = (ab5/ges*100).fillna(0).sort_values()
-                                    fig = go.Figure(go.Bar(
-                                        y=list(pct.index),
-                                        x=[round(float(x),1) for x in pct.values],
-                                        orientation='h',
-                                        marker_color=['#e74c3c' if p>=30 else '#f39c12' if p>=15 else '#2ecc71' for p in pct.values],
-                                        text=[f"{x:.0f}%" for x in pct.values],
-                                        textposition='outside'
-                                    ))
-                                    fig.update_layout(title="Wer verliert in 5 Jahren wie viel?", height=500, font=dict(size=14))
-                                    st.plotly_chart(fig, use_container_width=True)
-                                    charts_html.append(('06_Abgang_Abteilung.html', fig.to_html()))
-                    
-                    # ============================================
-                    # TREUE / JUBILÄEN
-                    # ============================================
-                    if 'DJ' in df.columns:
-                        d = df[df['DJ'].notna()].copy()
-                        if len(d) > 0:
-                            st.markdown("---")
-                            st.markdown("## 🏆 Wie lange sind Ihre Mitarbeiter dabei?")
-                            
-                            lang = len(d[d['DJ']>=20])
-                            st.info(f"ℹ️ **{lang} Mitarbeiter** sind schon **20 Jahre oder länger** bei Ihnen!")
-                            
-                            c1, c2 = st.columns(2)
-                            
-                            with c1:
-                                fig = go.Figure(go.Histogram(x=list(d['DJ']), nbinsx=20, marker_color='#9b59b6'))
-                                fig.update_layout(title="Betriebszugehörigkeit (Jahre)", height=450, font=dict(size=14),
-                                    xaxis_title="Jahre im Unternehmen", yaxis_title="Anzahl Mitarbeiter")
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('07_Dienstjahre.html', fig.to_html()))
-                            
-                            with c2:
-                                d['Gr'] = pd.cut(d['DJ'],[-1,2,5,10,15,20,100],
-                                    labels=['Neu (0-2 J)','3-5 Jahre','6-10 Jahre','11-15 Jahre','16-20 Jahre','Über 20 Jahre'])
-                                gr = d['Gr'].value_counts()
-                                fig = go.Figure(go.Pie(
-                                    labels=[str(x) for x in gr.index], 
-                                    values=list(gr.values),
-                                    marker_colors=F,
-                                    textinfo='label+percent+value',
-                                    textfont_size=14
-                                ))
-                                fig.update_layout(title="Gruppen nach Betriebszugehörigkeit", height=450, font=dict(size=14))
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('08_Dienstjahre_Gruppen.html', fig.to_html()))
-                            
-                            # Jubiläen
-                            st.markdown("### 🎉 Wer hat bald Jubiläum?")
-                            c1, c2 = st.columns(2)
-                            
-                            with c1:
-                                jubi_data = []
-                                for j in [5,10,15,20,25,30]:
-                                    count = int(len(d[(d['DJ']>=j-0.5)&(d['DJ']<j+0.5)]))
-                                    jubi_data.append({'Jahre': f'{j} Jahre', 'Anzahl': count})
-                                
-                                fig = go.Figure(go.Bar(
-                                    x=[f'{j} Jahre' for j in [5,10,15,20,25,30]], 
-                                    y=[int(len(d[(d['DJ']>=j-0.5)&(d['DJ']<j+0.5)])) for j in [5,10,15,20,25,30]], 
-                                    marker_color=F[:6],
-                                    text=[int(len(d[(d['DJ']>=j-0.5)&(d['DJ']<j+0.5)])) for j in [5,10,15,20,25,30]],
-                                    textposition='outside'
-                                ))
-                                fig.update_layout(title="Mitarbeiter mit rundem Jubiläum", height=400, font=dict(size=14))
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('09_Jubilaeen.html', fig.to_html()))
-                            
-                            with c2:
-                                if col_abt:
-                                    avg = d.groupby(col_abt)['DJ'].mean().sort_values()
-                                    fig = go.Figure(go.Bar(
-                                        y=list(avg.index),
-                                        x=[round(float(x),1) for x in avg.values],
-                                        orientation='h',
-                                        marker_color=['#27ae60' if x>=10 else '#f39c12' if x>=5 else '#e74c3c' for x in avg.values],
-                                        text=[f"{x:.1f} J" for x in avg.values],
-                                        textposition='outside'
-                                    ))
-                                    fig.update_layout(title="Durchschnitt pro Abteilung", height=400, font=dict(size=14))
-                                    st.plotly_chart(fig, use_container_width=True)
-                                    charts_html.append(('10_DJ_Abteilung.html', fig.to_html()))
-                    
-                    # ============================================
-                    # WISSENSVERLUST
-                    # ============================================
-                    if 'Alter' in df.columns and 'DJ' in df.columns:
-                        d = df[(df['Alter'].notna())&(df['DJ'].notna())].copy()
-                        if len(d) > 0:
-                            d['JbR'] = rentenalter - d['Alter']
-                            d['RJ'] = jahr + d['JbR']
-                            d['R'] = d.apply(lambda r:'KRITISCH' if r['DJ']>=15 and r['JbR']<=5 
-                                else ('WARNUNG' if r['DJ']>=10 and r['JbR']<=10 else 'OK'),axis=1)
-                            
-                            st.markdown("---")
-                            st.markdown("## ⚠️ Droht Ihnen Wissensverlust?")
-                            
-                            st.markdown("""
-                            <div class="help-text">
-                            <b>Was bedeutet das?</b><br><br>
-                            🔴 <b>KRITISCH</b> = Mitarbeiter mit 15+ Jahren Erfahrung, die in 5 Jahren gehen<br>
-                            🟡 <b>WARNUNG</b> = Mitarbeiter mit 10+ Jahren Erfahrung, die in 10 Jahren gehen<br>
-                            🟢 <b>OK</b> = Noch genug Zeit für Wissenstransfer
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            krit = len(d[d['R']=='KRITISCH'])
-                            warn = len(d[d['R']=='WARNUNG'])
-                            verl5 = d[d['JbR']<=5]['DJ'].sum()
-                            
-                            m1, m2, m3 = st.columns(3)
-                            with m1:
-                                if krit > 0:
-                                    st.error(f"🔴 **{krit}** KRITISCH")
-                                else:
-                                    st.success(f"🔴 **{krit}** KRITISCH")
-                            with m2:
-                                if warn > 0:
-                                    st.warning(f"🟡 **{warn}** WARNUNG")
-                                else:
-                                    st.success(f"🟡 **{warn}** WARNUNG")
-                            with m3:
-                                st.metric("📉 Erfahrungsjahre die verloren gehen", f"{verl5:.0f} Jahre")
-                            
-                            c1, c2 = st.columns(2)
-                            
-                            with c1:
-                                fig = go.Figure()
-                                cm = {'KRITISCH':'#e74c3c','WARNUNG':'#f39c12','OK':'#2ecc71'}
-                                for r in ['OK','WARNUNG','KRITISCH']:
-                                    x = d[d['R']==r]
-                                    if len(x)>0:
-                                        fig.add_trace(go.Scatter(
-                                            x=list(x['JbR']), y=list(x['DJ']),
-                                            mode='markers', name=r,
-                                            marker=dict(color=cm[r], size=14, opacity=0.7)
-                                        ))
-                                fig.update_layout(
-                                    title="Jeder Punkt = 1 Mitarbeiter",
-                                    xaxis_title="Jahre bis zur Rente →",
-                                    yaxis_title="Jahre Erfahrung ↑",
-                                    height=500, font=dict(size=14),
-                                    legend=dict(font=dict(size=16))
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('11_Wissensverlust.html', fig.to_html()))
-                            
-                            with c2:
-                                verlust = {j: d[d['RJ']==j]['DJ'].sum() for j in range(jahr, jahr+11)}
-                                fig = go.Figure(go.Bar(
-                                    x=list(verlust.keys()),
-                                    y=list(verlust.values()),
-                                    marker_color=['#e74c3c' if v>d['DJ'].sum()*0.1 else '#f39c12' for v in verlust.values()],
-                                    text=[f"{v:.0f}" for v in verlust.values()],
-                                    textposition='outside'
-                                ))
-                                fig.update_layout(title="Wie viel Erfahrung geht wann verloren?", height=500, font=dict(size=14),
-                                    xaxis_title="Jahr", yaxis_title="Verlorene Erfahrungsjahre")
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('12_Verlust_Pro_Jahr.html', fig.to_html()))
+                    # ZIP wird erst beim Klick erzeugt (und dann nur ins Log gemessen);
+                    # Diagramme mit Reglern so, wie sie zuletzt angezeigt wurden
+                    diagramme = st.session_state['diagramme']
+                    def zip_erstellen():
+                        with Messung(kontext=messung.kontext).abschnitt('Download', res.n, phase='export'):
+                            figuren = dict(alle_figuren(res))
+                            figuren.update(diagramme)
+                            return charts_zip(sorted(figuren.items()))
                     
-                    # ============================================
-                    # KARRIEREENTWICKLUNG
-                    # ============================================
-                    if col_ein_pos and col_akt_pos:
-                        st.markdown("---")
-                        st.markdown("## 📈 Wie haben sich Ihre Mitarbeiter entwickelt?")
-                        
-                        # Beispiele zeigen
-                        d = df[(df[col_ein_pos].notna()) & (df[col_akt_pos].notna())].copy()
-                        if 'DJ' in d.columns:
-                            beispiele = d[d['DJ'] >= 5].head(10)
-                            if len(beispiele) > 0:
-                                st.markdown("### Beispiele (mindestens 5 Jahre dabei):")
-                                for _, row in beispiele.iterrows():
-                                    dj = int(row['DJ']) if 'DJ' in row else '?'
-                                    st.markdown(f"- **{row[col_ein_pos]}** → **{row[col_akt_pos]}** *(nach {dj} Jahren)*")
-                        
-                        # Sankey wenn Level vorhanden
-                        if col_lvl and col_abt:
-                            st.markdown("### Karriere-Flow: Von Abteilung zu Level")
-                            flow = df.groupby([col_abt, col_lvl]).size().reset_index(name='count')
-                            flow = flow[flow['count'] > 0]
-                            if len(flow) > 0:
-                                abt_list = list(flow[col_abt].unique())
-                                lvl_list = list(flow[col_lvl].unique())
-                                nodes = abt_list + lvl_list
-                                fig = go.Figure(go.Sankey(
-                                    node=dict(pad=15, thickness=20, label=nodes, 
-                                        color=['#3498db']*len(abt_list)+['#e74c3c']*len(lvl_list)),
-                                    link=dict(
-                                        source=[nodes.index(a) for a in flow[col_abt]],
-                                        target=[nodes.index(l) for l in flow[col_lvl]],
-                                        value=list(flow['count'])
-                                    )
-                                ))
-                                fig.update_layout(title="Wer arbeitet auf welchem Level?", height=600, font=dict(size=14))
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('13_Karriere_Flow.html', fig.to_html()))
+                    st.download_button(
+                        label="📥  ALLE DIAGRAMME HERUNTERLADEN (ZIP)",
+                        data=zip_erstellen,
+                        file_name="HR_Analyse_Ergebnisse.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
                     
-                    # ============================================
-                    # WEITERE ANALYSEN
-                    # ============================================
                     st.markdown("---")
-                    st.markdown("## 📊 Weitere Auswertungen")
-                    
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        if col_ges:
-                            c = df[col_ges].value_counts()
-                            labels = []
-                            for x in c.index:
-                                if str(x).lower() in ['m','männlich','male']:
-                                    labels.append('Männlich')
-                                elif str(x).lower() in ['w','weiblich','female']:
-                                    labels.append('Weiblich')
-                                else:
-                                    labels.append(str(x))
-                            fig = go.Figure(go.Pie(
-                                labels=labels, 
-                                values=list(c.values), 
-                                marker_colors=['#3498db','#e74c3c','#2ecc71'],
-                                textinfo='label+percent+value',
-                                textfont_size=16
-                            ))
-                            fig.update_layout(title="Geschlechterverteilung", height=450, font=dict(size=16))
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('14_Geschlecht.html', fig.to_html()))
-                    
-                    with c2:
-                        if col_abt:
-                            c = df[col_abt].value_counts()
-                            fig = go.Figure(go.Bar(
-                                y=list(c.index), 
-                                x=list(c.values), 
-                                orientation='h', 
-                                marker_color=F[:len(c)],
-                                text=list(c.values),
-                                textposition='outside'
-                            ))
-                            fig.update_layout(title="Mitarbeiter pro Abteilung", height=450, font=dict(size=14))
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('15_Abteilungen.html', fig.to_html()))
-                    
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        if col_lvl:
-                            c = df[col_lvl].value_counts()
-                            fig = go.Figure(go.Bar(
-                                x=list(c.index), 
-                                y=list(c.values), 
-                                marker_color=F[:len(c)],
-                                text=list(c.values),
-                                textposition='outside'
-                            ))
-                            fig.update_layout(title="Karrierelevel", height=400, font=dict(size=14))
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('16_Level.html', fig.to_html()))
-                    
-                    with c2:
-                        if col_az:
-                            c = df[col_az].value_counts()
-                            fig = go.Figure(go.Pie(
-                                labels=list(c.index), 
-                                values=list(c.values), 
-                                marker_colors=['#3498db','#f39c12'],
-                                textinfo='label+percent+value',
-                                textfont_size=16
-                            ))
-                            fig.update_layout(title="Vollzeit / Teilzeit", height=400, font=dict(size=16))
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('17_Arbeitszeit.html', fig.to_html()))
-                    
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        if 'Gehalt' in df.columns:
-                            g = df['Gehalt'].dropna()
-                            if len(g)>0:
-                                fig = go.Figure(go.Histogram(x=list(g), nbinsx=20, marker_color='#2ecc71'))
-                                fig.update_layout(title="Gehaltsverteilung", height=400, font=dict(size=14),
-                                    xaxis_title="Jahresgehalt in €", yaxis_title="Anzahl")
-                                st.plotly_chart(fig, use_container_width=True)
-                                charts_html.append(('18_Gehalt.html', fig.to_html()))
-                    
-                    with c2:
-                        if col_ort:
-                            c = df[col_ort].value_counts()
-                            fig = go.Figure(go.Pie(
-                                labels=list(c.index), 
-                                values=list(c.values), 
-                                marker_colors=F,
-                                textinfo='label+percent+value',
-                                textfont_size=14
-                            ))
-                            fig.update_layout(title="Standorte", height=400, font=dict(size=14))
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('19_Standorte.html', fig.to_html()))
-                    
-                    # ============================================
-                    # BENCHMARK
-                    # ============================================
-                    if region in BENCHMARK:
-                        st.markdown("---")
-                        st.markdown(f"## 📊 Vergleich: Sie vs. {region}")
-                        
-                        b = BENCHMARK[region]
-                        kat, u, bm = [], [], []
-                        
-                        if 'Alter' in df.columns:
-                            a = df['Alter'].mean()
-                            if not pd.isna(a): 
-                                kat.append('Durchschnittsalter')
-                                u.append(round(float(a),1))
-                                bm.append(b['alter'])
-                        
-                        if col_ges:
-                            g = df[col_ges].value_counts(normalize=True)*100
-                            f = sum(float(v) for k,v in g.items() if str(k).lower() in ['w','weiblich'])
-                            kat.append('Frauenanteil %')
-                            u.append(round(f,1))
-                            bm.append(b['frauen'])
-                        
-                        if col_az:
-                            a = df[col_az].value_counts(normalize=True)*100
-                            t = sum(float(v) for k,v in a.items() if 'teil' in str(k).lower())
-                            kat.append('Teilzeitquote %')
-                            u.append(round(t,1))
-                            bm.append(b['teilzeit'])
-                        
-                        if 'Gehalt' in df.columns:
-                            a = df['Gehalt'].mean()
-                            if not pd.isna(a): 
-                                kat.append('Monatsgehalt €')
-                                u.append(round(float(a)/12,0))
-                                bm.append(b['gehalt'])
-                        
-                        if kat:
-                            fig = go.Figure([
-                                go.Bar(name='Ihr Unternehmen', x=kat, y=u, marker_color='#3498db', 
-                                    text=u, textposition='outside'),
-                                go.Bar(name=region, x=kat, y=bm, marker_color='#95a5a6',
-                                    text=bm, textposition='outside')
-                            ])
-                            fig.update_layout(title=f"Ihre Zahlen im Vergleich zu {region}", 
-                                barmode='group', height=500, font=dict(size=16),
-                                legend=dict(font=dict(size=18)))
-                            st.plotly_chart(fig, use_container_width=True)
-                            charts_html.append(('20_Benchmark.html', fig.to_html()))
+                    if analyse_button:
+                        st.balloons()
+                    st.success("🎉 **Fertig!** Ihre Analyse ist abgeschlossen.")
                     
                     # ============================================
-                    # DOWNLOAD
+                    # PERFORMANCE
                     # ============================================
-                    if charts_html:
-                        st.markdown("---")
-                        st.markdown("## 📥 Alle Diagramme speichern")
-                        
-                        st.success(f"✅ **{len(charts_html)} Diagramme** wurden erstellt!")
-                        
-                        st.markdown("""
-                        <div class="info-box">
-                        <b>💡 Tipp:</b> Klicken Sie auf den Button unten, um alle Diagramme als ZIP-Datei zu speichern.<br>
-                        Die Diagramme sind HTML-Dateien und können im Browser geöffnet werden.
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        zip_buffer = io.BytesIO()
-                        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-                            for name, html in charts_html:
-                                zf.writestr(name, html)
-                        
-                        st.download_button(
-                            label="📥  ALLE DIAGRAMME HERUNTERLADEN (ZIP)",
-                            data=zip_buffer.getvalue(),
-                            file_name="HR_Analyse_Ergebnisse.zip",
-                            mime="application/zip",
-                            use_container_width=True
+                    messung.ende()
+                    with st.expander("⏱ Performance"):
+                        st.toggle("Speicherbedarf messen (Analyse wird deutlich langsamer)", key='perf_speicher')
+                        zeiten = messung.frame()
+                        st.dataframe(
+                            zeiten.rename(columns={'abschnitt': 'Abschnitt', 'phase': 'Phase', 'sekunden': 'Sekunden',
+                                                   'speicher_mb': 'Speicher (MB)', 'zeilen': 'Zeilen'}),
+                            hide_index=True, use_container_width=True
                         )
-                        
-                        st.markdown("---")
-                        st.balloons()
-                        st.success("🎉 **Fertig!** Ihre Analyse ist abgeschlossen.")
+                        st.caption(f"Gesamt: {messung.gesamt:.2f} s. Abschnitte aus dem Zwischenspeicher werden nicht neu berechnet "
+                                   "und fehlen daher unter 'berechnung'. Der ZIP-Download wird beim Klick gemessen und ins Log geschrieben.")
                     
             except Exception as e:
                 st.error(f"❌ Es ist ein Fehler aufgetreten: {e}")
@@ -1374,6 +1296,8 @@ with tab2:
                 • Versuchen Sie es mit der Vorlage aus Schritt 1
                 </div>
                 """, unsafe_allow_html=True)
+            finally:
+                messung.ende()
 
 # ============================================
 # FOOTER
@@ -0,0 +1,168 @@
+"""Benchmark der Analyse-Pipeline mit synthetischen Daten.
+
+Misst jede Stufe einzeln (Einlesen, Spaltenerkennung, Zahlen, Aggregat-Würfel, Gruppen-Ausreißer,
+Duplikate, Qualitätscheck, Daten-Matrix, Problemzeilen, Rente, Betriebszugehörigkeit, Ereignis-Index,
+Wissensverlust, Karriere-Sankey, Benchmark, Filter-Index, Filter, ZIP-Export, optional
+Personalprognose) und schreibt die Zeiten als JSON.
+
+    python -m benchmarks.run --groessen 1000 10000 100000 --format xlsx --ausgabe bench.json
+    python -m benchmarks.run --groessen 1000000 --format parquet
+    python -m benchmarks.run --groessen 50000 --prognose 5000 --ohne-export
+
+Die Testdateien werden im Cache-Ordner abgelegt und bei weiteren Läufen
+wiederverwendet.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import hr_engine as eng
+from hr_events import EventIndex
+from hr_filter import build_group_index
+from hr_ingest import HAS_CALAMINE, HAS_PYARROW
+from hr_projection import ProjectionScenario, project
+from benchmarks.synth_data import generate, write
+
+GROESSEN = [1000, 10000, 100000]
+JAHR = 2025
+RENTENALTER = 67
+REGION = 'Deutschland'
+
+
+def testdatei(n, fmt, seed, ordner):
+    pfad = Path(ordner) / f"hr_{n}_{seed}.{fmt}"
+    if not pfad.exists():
+        write(generate(n, seed=seed, jahr=JAHR), pfad)
+    return pfad
+
+
+def _zip_export(res):
+    """Alle Diagramme wie beim ZIP-Download der App bauen und packen."""
+    from hr_charts import alle_figuren
+    from hr_export import charts_zip
+    return len(charts_zip(alle_figuren(res)))
+
+
+def lauf(pfad, export=True, prognose=0):
+    """Ein Durchlauf über alle Stufen; liefert {Stufe: Sekunden} und die Zeilenzahl."""
+    zeiten = {}
+
+    def stufe(name, fn, *args):
+        t0 = time.perf_counter()
+        wert = fn(*args)
+        zeiten[name] = time.perf_counter() - t0
+        return wert
+
+    df = stufe('einlesen', eng.read_upload, pfad)
+    cols = stufe('spaltenerkennung', eng.find_columns, df.columns)
+    df, unlesbar = stufe('zahlen', eng.normalize_numbers, df.dropna(how='all'), cols)
+    df = stufe('ableitung', lambda d: eng.compact_dtypes(eng.derive_columns(d, cols, JAHR), cols), df)
+    cube = stufe('wuerfel', eng.build_cube, df, cols)
+
+    res = eng.AnalysisResult(jahr=JAHR, rentenalter=RENTENALTER, region=REGION, cols=cols, n=len(df))
+    gruppen = stufe('gruppen_ausreisser', eng.outlier_groups, df, cols)
+    res.duplikate = stufe('duplikate', eng.duplicate_check, df, cols)
+    res.qualitaet = stufe('qualitaet', eng.quality_check, df, cols, unlesbar, gruppen, res.duplikate)
+    res.matrix = stufe('daten_matrix', eng.data_matrix, df, cols, JAHR, 'block', unlesbar, gruppen)
+    res.probleme = stufe('problemzeilen', eng.problem_rows, df, cols, unlesbar, gruppen, res.duplikate)
+    stufe('problemzeilen_csv', res.probleme.csv)
+    res.rente_vergleich = stufe('rentenalter_vergleich', eng.retirement_sweep, df, cols, JAHR,
+                                eng.RENTENALTER_SPANNE, cube)
+    res.rente = stufe('rente', res.rente_vergleich.ergebnis, RENTENALTER)
+    res.treue = stufe('treue', eng.tenure, df, cols, cube)
+    ereignisse = stufe('ereignis_index', EventIndex, df, cols, JAHR)
+    stufe('ereignis_abfrage', ereignisse.anzahl, JAHR + 1, JAHR + 4, RENTENALTER)
+    res.wissen = stufe('wissensverlust', eng.knowledge_loss, df, RENTENALTER, JAHR, cols)
+    res.karriere = stufe('karriere_sankey', eng.career, df, cols)
+    res.verteilung = stufe('verteilungen', eng.distributions, df, cols, cube)
+    res.benchmark = stufe('benchmark', eng.benchmark, df, cols, REGION, cube)
+    prep = eng.PreparedData(df, cols, JAHR, cube)
+    index = stufe('filter_index', build_group_index, df, cols)
+    if 'abt' in index.werte:
+        # größte Abteilung: teuerster Einzelfilter
+        abt = index.werte['abt'][int(np.argmax([len(p) for p in index.positionen['abt']]))]
+        stufe('filter', lambda: eng.subset_prep(prep, index.maske({'abt': [abt]})))
+    if prognose:
+        stufe('prognose', project, prep, RENTENALTER, ProjectionScenario(laeufe=prognose))
+    if export:
+        stufe('zip_export', _zip_export, res)
+    return zeiten, len(df)
+
+
+def _git_stand():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def umgebung():
+    return {
+        'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+        'git': _git_stand(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'calamine': HAS_CALAMINE,
+        'pyarrow': HAS_PYARROW,
+        'plattform': platform.platform(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark der HR-Analyse mit synthetischen Daten")
+    parser.add_argument('--groessen', type=int, nargs='+', default=GROESSEN,
+                        help="Anzahl Mitarbeiter je Testdatei (z. B. 1000 10000 100000 1000000)")
+    parser.add_argument('--format', default='xlsx', choices=['xlsx', 'csv', 'parquet'])
+    parser.add_argument('--wiederholungen', type=int, default=3,
+                        help="Durchläufe je Größe; gemeldet wird der Median je Stufe")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ohne-export', action='store_true', help="ZIP-Export nicht messen")
+    parser.add_argument('--prognose', type=int, default=0, metavar='LAEUFE',
+                        help="Personalprognose mit so vielen Simulationen messen (Standard: aus)")
+    parser.add_argument('--cache', default=str(Path(tempfile.gettempdir()) / 'hr_benchmark'),
+                        help="Ordner für die erzeugten Testdateien")
+    parser.add_argument('--ausgabe', help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args(argv)
+
+    ergebnisse = []
+    for n in args.groessen:
+        pfad = testdatei(n, args.format, args.seed, args.cache)
+        laeufe = []
+        for _ in range(args.wiederholungen):
+            zeiten, zeilen = lauf(pfad, export=not args.ohne_export, prognose=args.prognose)
+            laeufe.append(zeiten)
+        stufen = {k: float(np.median([z[k] for z in laeufe])) for k in laeufe[0]}
+        ergebnisse.append({
+            'mitarbeiter': n,
+            'zeilen': zeilen,
+            'format': args.format,
+            'datei_bytes': pfad.stat().st_size,
+            'wiederholungen': args.wiederholungen,
+            'stufen_s': stufen,
+            'gesamt_s': sum(stufen.values()),
+        })
+        langsamste = max(stufen, key=stufen.get)
+        print(f"{n:>9} Mitarbeiter: {sum(stufen.values()):8.2f} s (langsamste Stufe: {langsamste} "
+              f"{stufen[langsamste]:.2f} s)", file=sys.stderr)
+
+    bericht = json.dumps({'umgebung': umgebung(), 'ergebnisse': ergebnisse}, ensure_ascii=False, indent=1)
+    if args.ausgabe:
+        Path(args.ausgabe).write_text(bericht, encoding='utf-8')
+    else:
+        print(bericht)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Synthetische Mitarbeiterdaten im Format der HR_Vorlage.xlsx.
+
+Erzeugt die 14 Vorlagen-Spalten mit realistischen Verteilungen, fehlenden
+Werten und Ausreißern (zu jung/alt, Eintritt in der Zukunft oder vor der
+Geburt, extreme Gehälter).
+
+    python -m benchmarks.synth_data 10000 daten/10k.xlsx
+"""
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from hr_engine import SPALTEN
+
+ABTEILUNGEN = ['Produktion', 'Vertrieb', 'IT', 'Finanzen', 'Personal', 'Einkauf', 'Logistik',
+               'Marketing', 'Forschung', 'Qualität', 'Kundenservice', 'Recht']
+ABT_GEWICHTE = [22, 14, 10, 6, 4, 5, 12, 4, 8, 5, 9, 1]
+LEVEL = ['Junior', 'Professional', 'Senior', 'Lead', 'Head', 'Executive']
+LEVEL_GEWICHTE = [25, 35, 22, 10, 6, 2]
+LEVEL_GEHALT = [38000, 50000, 64000, 80000, 105000, 160000]
+POSITIONEN = ['Sachbearbeiter', 'Fachkraft', 'Techniker', 'Ingenieur', 'Entwickler', 'Berater',
+              'Analyst', 'Teamleiter', 'Projektleiter', 'Abteilungsleiter', 'Bereichsleiter',
+              'Assistenz', 'Referent', 'Spezialist', 'Koordinator', 'Meister']
+EINSTIEG = ['Auszubildender', 'Trainee', 'Praktikant', 'Werkstudent', 'Sachbearbeiter',
+            'Fachkraft', 'Junior Entwickler', 'Assistenz']
+STANDORTE = ['Hannover', 'Berlin', 'München', 'Hamburg', 'Köln', 'Stuttgart', 'Leipzig', 'Frankfurt']
+ABSCHLUESSE = ['Ausbildung', 'Bachelor', 'Master', 'Meister', 'Promotion', 'ohne']
+VERTRAGSARTEN = ['unbefristet', 'befristet', 'Werkstudent', 'Ausbildung']
+
+FEHLQUOTE = 0.04          # Anteil leerer Zellen je Spalte
+AUSREISSERQUOTE = 0.005   # Anteil Ausreißer je Regel
+
+
+def _wahl(rng, werte, gewichte, n):
+    p = np.asarray(gewichte, dtype=float)
+    return np.asarray(werte, dtype=object)[rng.choice(len(werte), n, p=p / p.sum())]
+
+
+def generate(n, seed=0, fehlquote=FEHLQUOTE, ausreisserquote=AUSREISSERQUOTE, jahr=None):
+    """DataFrame mit n Mitarbeitern und den Spalten der Vorlage."""
+    rng = np.random.default_rng(seed)
+    jahr = jahr or datetime.now().year
+
+    alter = np.clip(rng.normal(44, 11, n), 17, 66).round()
+    eintrittsalter = np.clip(rng.normal(27, 7, n), 16, alter)
+    dienstjahre = np.floor(rng.uniform(0, 1, n) ** 1.6 * (alter - eintrittsalter + 1))
+    geb = jahr - alter
+    ein = jahr - dienstjahre
+
+    level_idx = rng.choice(len(LEVEL), n, p=np.array(LEVEL_GEWICHTE) / sum(LEVEL_GEWICHTE))
+    gehalt = np.round(np.array(LEVEL_GEHALT)[level_idx] * rng.lognormal(0, 0.18, n), -2)
+    teilzeit = rng.random(n) < 0.28
+    stunden = np.where(teilzeit, rng.choice([20, 25, 30, 32], n), 40)
+    gehalt = np.where(teilzeit, np.round(gehalt * stunden / 40, -2), gehalt)
+
+    # Lange Liste seltener Positionsbezeichnungen wie in echten Exporten
+    seltene = np.array([f"{p} {i}" for i in range(max(1, n // 200)) for p in POSITIONEN[:3]], dtype=object)
+    akt_pos = _wahl(rng, POSITIONEN, [1] * len(POSITIONEN), n)
+    selten_maske = rng.random(n) < 0.05
+    akt_pos[selten_maske] = rng.choice(seltene, selten_maske.sum())
+
+    df = pd.DataFrame({
+        'Mitarbeiter_ID': [f"MA{i:07d}" for i in range(1, n + 1)],
+        'Geburtsjahr': geb,
+        'Eintrittsjahr': ein,
+        'Geschlecht': _wahl(rng, ['m', 'w', 'd'], [49, 50, 1], n),
+        'Abteilung': _wahl(rng, ABTEILUNGEN, ABT_GEWICHTE, n),
+        'Einstiegsposition': _wahl(rng, EINSTIEG, [1] * len(EINSTIEG), n),
+        'Aktuelle_Position': akt_pos,
+        'Karrierelevel': np.asarray(LEVEL, dtype=object)[level_idx],
+        'Gehalt_Brutto_Jahr': gehalt,
+        'Arbeitszeit': np.where(teilzeit, 'Teilzeit', 'Vollzeit').astype(object),
+        'Wochenstunden': stunden.astype(float),
+        'Standort': _wahl(rng, STANDORTE, [20, 18, 16, 14, 10, 10, 6, 6], n),
+        'Bildungsabschluss': _wahl(rng, ABSCHLUESSE, [40, 25, 18, 8, 2, 7], n),
+        'Vertragsart': _wahl(rng, VERTRAGSARTEN, [80, 12, 4, 4], n),
+    }, columns=SPALTEN)
+
+    # Ausreißer
+    def zeilen():
+        return rng.random(n) < ausreisserquote
+    df.loc[zeilen(), 'Geburtsjahr'] = jahr - rng.integers(8, 15)           # zu jung
+    df.loc[zeilen(), 'Geburtsjahr'] = jahr - rng.integers(72, 90)          # zu alt
+    df.loc[zeilen(), 'Eintrittsjahr'] = jahr + rng.integers(1, 5)          # Zukunft
+    m = zeilen()
+    df.loc[m, 'Eintrittsjahr'] = df.loc[m, 'Geburtsjahr'] - 1              # vor Geburt
+    df.loc[zeilen(), 'Gehalt_Brutto_Jahr'] = rng.integers(1000, 14000)     # sehr niedrig
+    df.loc[zeilen(), 'Gehalt_Brutto_Jahr'] = rng.integers(310000, 900000)  # sehr hoch
+
+    # Fehlende Werte (Mitarbeiter_ID immer gefüllt)
+    for col in SPALTEN[1:]:
+        df.loc[rng.random(n) < fehlquote, col] = np.nan
+    return df
+
+
+def write(df, pfad):
+    """Schreibt nach Endung als .xlsx (Blatt 'Mitarbeiter'), .csv oder .parquet."""
+    pfad = Path(pfad)
+    pfad.parent.mkdir(parents=True, exist_ok=True)
+    endung = pfad.suffix.lower()
+    if endung == '.xlsx':
+        # Kein constant_memory: pandas schreibt spaltenweise, der Modus verlangt zeilenweise
+        with pd.ExcelWriter(pfad, engine='xlsxwriter') as writer:
+            df.to_excel(writer, index=False, sheet_name='Mitarbeiter')
+    elif endung == '.csv':
+        df.to_csv(pfad, index=False)
+    elif endung == '.parquet':
+        df.to_parquet(pfad, index=False)
+    else:
+        raise ValueError(f"Unbekanntes Format: {endung}")
+    return pfad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetische HR-Daten erzeugen")
+    parser.add_argument('anzahl', type=int, help="Anzahl Mitarbeiter")
+    parser.add_argument('ziel', help="Ausgabedatei (.xlsx, .csv oder .parquet)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fehlquote', type=float, default=FEHLQUOTE)
+    parser.add_argument('--ausreisserquote', type=float, default=AUSREISSERQUOTE)
+    args = parser.parse_args(argv)
+    df = generate(args.anzahl, args.seed, args.fehlquote, args.ausreisserquote)
+    print(write(df, args.ziel))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Nächtliche Batch-Analyse: alle Arbeitsmappen (auch CSV/Parquet) eines Ordners ohne Streamlit.
+
+Beispiel:
+    python hr_batch.py eingang/ ergebnisse/ --rentenalter 67 --region Bayern --jobs 8
+
+Je Datei entsteht <name>.json mit dem vollständigen Analyse-Ergebnis, dazu eine
+zusammenfassung.csv mit einer Zeile pro Datei. Die Laufzeit je Abschnitt
+wird als JSON-Zeile auf stderr protokolliert (siehe hr_perf.py).
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from hr_engine import BENCHMARK, analyze, read_upload
+from hr_ingest import ENDUNGEN
+from hr_perf import Messung, log_einrichten
+
+MUSTER = tuple(f'*{e}' for e in ENDUNGEN)
+
+
+def analyse_datei(pfad, ausgabe, rentenalter, region):
+    """Analysiert eine Datei und schreibt das JSON-Ergebnis (läuft im Worker)."""
+    pfad = Path(pfad)
+    zeile = {'Datei': pfad.name, 'Status': 'OK', 'Fehler': ''}
+    log_einrichten()
+    messung = Messung(kontext={'datei': pfad.name})
+    try:
+        with messung.abschnitt('Einlesen'):
+            df = read_upload(pfad)
+        res = analyze(df, rentenalter, region, messung=messung)
+        ziel = Path(ausgabe) / f"{pfad.stem}.json"
+        ziel.write_text(json.dumps(res.to_dict(), ensure_ascii=False, indent=1), encoding='utf-8')
+        zeile.update({
+            'Mitarbeiter': res.n,
+            'Gesamtscore': round(res.qualitaet.gesamt_score, 1),
+            'Rente_5_Jahre': res.rente.r5 if res.rente else None,
+            'Kritisch': res.wissen.krit if res.wissen else None,
+            'Sekunden': round(messung.gesamt, 2),
+        })
+    except Exception as e:
+        zeile.update({'Status': 'FEHLER', 'Fehler': str(e)})
+    return zeile
+
+
+def dateien_finden(eingang):
+    eingang = Path(eingang)
+    gefunden = set()
+    for muster in MUSTER:
+        gefunden.update(p for p in eingang.glob(muster) if not p.name.startswith('~$'))
+    return sorted(gefunden)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HR-Analyse für alle Excel-/CSV-/Parquet-Dateien eines Ordners")
+    parser.add_argument('eingang', help="Ordner mit den Arbeitsmappen")
+    parser.add_argument('ausgabe', help="Ordner für die Ergebnisse")
+    parser.add_argument('--rentenalter', type=int, default=67)
+    parser.add_argument('--region', default='Deutschland', choices=list(BENCHMARK.keys()))
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="Anzahl paralleler Prozesse (Standard: alle Kerne)")
+    args = parser.parse_args(argv)
+
+    dateien = dateien_finden(args.eingang)
+    if not dateien:
+        print(f"Keine Dateien ({', '.join(MUSTER)}) in {args.eingang} gefunden.", file=sys.stderr)
+        return 1
+    Path(args.ausgabe).mkdir(parents=True, exist_ok=True)
+
+    zeilen = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(analyse_datei, p, args.ausgabe, args.rentenalter, args.region)
+                   for p in dateien]
+        for i, fut in enumerate(as_completed(futures), 1):
+            zeile = fut.result()
+            zeilen.append(zeile)
+            print(f"[{i}/{len(dateien)}] {zeile['Datei']}: {zeile['Status']} {zeile['Fehler']}".rstrip())
+
+    zusammenfassung = pd.DataFrame(zeilen).sort_values('Datei')
+    zusammenfassung.to_csv(Path(args.ausgabe) / 'zusammenfassung.csv', index=False)
+
+    fehler = int((zusammenfassung['Status'] != 'OK').sum())
+    print(f"Fertig: {len(zeilen) - fehler} OK, {fehler} Fehler")
+    return 1 if fehler else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
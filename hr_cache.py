@@ -0,0 +1,88 @@
+"""Speicherbegrenzter LRU-Cache für eingelesene und abgeleitete Daten.
+
+Schlüssel sind Inhalts-Hashes der Uploads (plus Einstellungen), damit ein
+erneuter Klick oder ein geänderter Regler nichts neu einliest. Einträge werden
+verdrängt, sobald ihre geschätzte Größe das Budget übersteigt.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def estimate_size(obj, ohne=()):
+    """Grobe Größe in Bytes; gemeinsam genutzte Objekte zählen nur einmal.
+
+    ohne: Objekte, die bereits in einem anderen Eintrag gezählt sind.
+    """
+    return _groesse(obj, {id(o) for o in ohne})
+
+
+def _groesse(obj, gesehen):
+    if id(obj) in gesehen:
+        return 0
+    gesehen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True, index=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return sum(_groesse(getattr(obj, f.name), gesehen) for f in fields(obj))
+    if isinstance(obj, dict):
+        return sum(_groesse(v, gesehen) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_groesse(v, gesehen) for v in obj)
+    if hasattr(obj, '__dict__'):
+        return sum(_groesse(v, gesehen) for v in vars(obj).values())
+    return sys.getsizeof(obj)
+
+
+class FrameCache:
+    """Threadsicherer LRU-Cache mit Budget in Bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._eintraege = OrderedDict()   # Schlüssel -> (Wert, Größe)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._eintraege)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def get(self, key, compute, size=estimate_size):
+        """Liefert den Wert zu key; berechnet und speichert ihn bei Bedarf."""
+        with self._lock:
+            if key in self._eintraege:
+                self._eintraege.move_to_end(key)
+                return self._eintraege[key][0]
+
+        wert = compute()
+        groesse = size(wert)
+
+        with self._lock:
+            if key not in self._eintraege and groesse <= self.max_bytes:
+                self._eintraege[key] = (wert, groesse)
+                self._bytes += groesse
+                while self._bytes > self.max_bytes:
+                    _, (_, g) = self._eintraege.popitem(last=False)
+                    self._bytes -= g
+        return wert
+
+    def clear(self):
+        with self._lock:
+            self._eintraege.clear()
+            self._bytes = 0
@@ -0,0 +1,568 @@
+"""Diagramme der Ergebnisseite als plotly-Figuren, ohne Streamlit.
+
+Die App baut eine Figur erst, wenn ihr Abschnitt geöffnet wird; der
+ZIP-Download und die Benchmarks bauen mit alle_figuren() alle Diagramme,
+die sich allein aus einem AnalysisResult ergeben. Jede Funktion liefert
+None, wenn die Daten für ihr Diagramm fehlen.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from hr_engine import STREU_MAX_PUNKTE
+
+F = ['#3498db','#e74c3c','#2ecc71','#9b59b6','#f39c12','#1abc9c','#e67e22','#34495e']
+KLASSEN_FARBEN = {'KRITISCH':'#e74c3c','WARNUNG':'#f39c12','OK':'#2ecc71'}
+
+
+def histogramm_balken(h, farbe, muster='{:g}'):
+    """Fertig gezähltes Histogram als Balken (nur die Balken gehen an den Browser)."""
+    return go.Bar(x=h.mitten, y=h.anzahl, width=h.breite, marker_color=farbe,
+                  customdata=h.bereiche(muster), hovertemplate='%{customdata}: %{y}<extra></extra>')
+
+
+# ============================================
+# DATENQUALITÄT
+# ============================================
+def fehlend_figur(q):
+    if not q.fehlend:
+        return None
+    df_fehlend = pd.DataFrame(q.fehlend)
+    # Farben basierend auf Prozent
+    farben = ['#e74c3c' if p > 20 else '#f39c12' if p > 5 else '#2ecc71' for p in df_fehlend['Prozent']]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=df_fehlend['Spalte'],
+        x=df_fehlend['Prozent'],
+        orientation='h',
+        marker_color=farben,
+        text=[f"{p}% ({f})" for p, f in zip(df_fehlend['Prozent'], df_fehlend['Fehlend'])],
+        textposition='outside'
+    ))
+    fig.update_layout(
+        title="Anteil fehlender Werte (%)",
+        xaxis_title="Fehlend in %",
+        height=400,
+        font=dict(size=14),
+        xaxis=dict(range=[0, max(df_fehlend['Prozent'].max() * 1.3, 10)])
+    )
+    return fig
+
+
+def ausreisser_figur(q):
+    """Kategorien mit mindestens einem Treffer; None, wenn es keine gibt."""
+    if not q.ausreisser:
+        return None
+    df_aus = pd.DataFrame(q.ausreisser)
+    df_probleme = df_aus[df_aus['Anzahl'] > 0]
+    if len(df_probleme) == 0:
+        return None
+    farben = ['#e74c3c' if '🔴' in s else '#f39c12' for s in df_probleme['Status']]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=df_probleme['Kategorie'],
+        x=df_probleme['Anzahl'],
+        orientation='h',
+        marker_color=farben,
+        text=df_probleme['Anzahl'],
+        textposition='outside'
+    ))
+    fig.update_layout(
+        title="Gefundene Probleme",
+        xaxis_title="Anzahl Datensätze",
+        height=400,
+        font=dict(size=14)
+    )
+    return fig
+
+
+def matrix_figur(mx):
+    if mx is None:
+        return None
+    if mx.modus == 'zeilen':
+        # Farbskala: 0=Grün, 1=Rot, 2=Orange
+        colorscale = [
+            [0, '#2ecc71'],      # 0 = Grün (OK)
+            [0.5, '#e74c3c'],    # 1 = Rot (Fehlend)
+            [1, '#f39c12']       # 2 = Orange (Ausreißer)
+        ]
+        zmax, showscale = 2, False
+        titel = f"Daten-Matrix ({mx.n_gesamt} von {mx.n_gesamt} Mitarbeitern)"
+    else:
+        # Zusammengefasste Zeilen: Anteil fehlender/auffälliger Werte
+        colorscale = [[0, '#2ecc71'], [0.2, '#f39c12'], [1, '#e74c3c']]
+        zmax, showscale = 1, True
+        je = "Abteilung" if mx.modus == 'abteilung' else f"{int(mx.groesse.max())} Mitarbeiter"
+        titel = f"Daten-Matrix (alle {mx.n_gesamt} Mitarbeiter, 1 Zeile = {je})"
+
+    fig = go.Figure(data=go.Heatmap(
+        z=mx.z,
+        x=mx.namen,
+        y=mx.labels,
+        hoverongaps=False,
+        hovertext=mx.hover(),
+        hovertemplate='%{hovertext}<extra></extra>',
+        colorscale=colorscale,
+        zmin=0,
+        zmax=zmax,
+        showscale=showscale,
+        colorbar=dict(title="Anteil Probleme", tickformat='.0%') if showscale else None
+    ))
+    fig.update_layout(
+        title=titel,
+        xaxis_title="Datenfelder",
+        yaxis_title="Mitarbeiter",
+        height=max(400, min(800, len(mx.labels) * 4)),
+        font=dict(size=12),
+        xaxis=dict(side='top', tickangle=-45),
+        yaxis=dict(autorange='reversed')  # Erste Zeile oben
+    )
+    return fig
+
+
+# ============================================
+# RENTE
+# ============================================
+def rente_kategorien_figur(rente):
+    k = rente.kategorien
+    fig = go.Figure(go.Pie(
+        labels=[str(x) for x in k.index],
+        values=list(k.values),
+        marker_colors=['#c0392b','#e74c3c','#f39c12','#f1c40f','#2ecc71','#27ae60'],
+        textinfo='label+percent+value',
+        textfont_size=16
+    ))
+    fig.update_layout(title="Wie lange noch bis zur Rente?", height=500, font=dict(size=16))
+    return fig
+
+
+def rente_pro_jahr_figur(rente, jahr):
+    rj = rente.pro_jahr
+    if len(rj) == 0:
+        return None
+    fig = go.Figure(go.Bar(
+        x=[int(x) for x in rj.index],
+        y=list(rj.values),
+        marker_color=['#e74c3c' if j<=jahr+5 else '#f39c12' if j<=jahr+10 else '#2ecc71' for j in rj.index],
+        text=list(rj.values),
+        textposition='outside',
+        textfont_size=14
+    ))
+    fig.update_layout(title="Renteneintritte pro Jahr", height=500, font=dict(size=14),
+        xaxis_title="Jahr", yaxis_title="Anzahl Mitarbeiter")
+    return fig
+
+
+def altersverteilung_figur(rente):
+    fig = go.Figure(histogramm_balken(rente.alter, '#3498db'))
+    fig.update_layout(title="Altersverteilung aller Mitarbeiter", height=450, font=dict(size=14), bargap=0.05,
+        xaxis_title="Alter", yaxis_title="Anzahl")
+    return fig
+
+
+def rente_kumuliert_figur(rente):
+    kum = rente.kumuliert
+    fig = go.Figure(go.Bar(
+        x=[f"In {j} Jahr(en)" for j in range(1,11)],
+        y=kum,
+        marker_color=['#e74c3c']*3+['#f39c12']*3+['#2ecc71']*4,
+        text=[f"{k} ({round(k/rente.anzahl*100)}%)" for k in kum],
+        textposition='outside'
+    ))
+    fig.update_layout(title="Wie viele gehen wann?", height=450, font=dict(size=14),
+        yaxis_title="Anzahl Mitarbeiter (kumuliert)")
+    return fig
+
+
+def alter_abteilung_figur(rente):
+    avg = rente.alter_abteilung
+    if avg is None:
+        return None
+    fig = go.Figure(go.Bar(
+        y=list(avg.index),
+        x=[round(float(x),1) for x in avg.values],
+        orientation='h',
+        marker_color=['#e74c3c' if a>=50 else '#f39c12' if a>=45 else '#2ecc71' for a in avg.values],
+        text=[f"{x:.1f} Jahre" for x in avg.values],
+        textposition='outside'
+    ))
+    fig.update_layout(title="Durchschnittsalter pro Abteilung", height=500, font=dict(size=14))
+    return fig
+
+
+def abgang_abteilung_figur(rente):
+    pct = rente.abgang_abteilung
+    if pct is None:
+        return None
+    fig = go.Figure(go.Bar(
+        y=list(pct.index),
+        x=[round(float(x),1) for x in pct.values],
+        orientation='h',
+        marker_color=['#e74c3c' if p>=30 else '#f39c12' if p>=15 else '#2ecc71' for p in pct.values],
+        text=[f"{x:.0f}%" for x in pct.values],
+        textposition='outside'
+    ))
+    fig.update_layout(title="Wer verliert in 5 Jahren wie viel?", height=500, font=dict(size=14))
+    return fig
+
+
+def rentenalter_welle_figur(sweep):
+    w = sweep.welle
+    fig = go.Figure(go.Heatmap(
+        z=w.to_numpy(),
+        x=w.columns.tolist(),
+        y=[f"{a} Jahre" for a in w.index],
+        colorscale='Reds',
+        hovertemplate='Rentenalter %{y}<br>Jahr %{x}: %{z} Mitarbeiter<extra></extra>'
+    ))
+    fig.update_layout(title="Renteneintritte pro Jahr je Rentenalter", height=500,
+        font=dict(size=14), xaxis_title="Jahr", yaxis_title="Rentenalter")
+    return fig
+
+
+def rentenalter_kumuliert_figur(sweep, rentenalter):
+    kum = sweep.kumuliert
+    alter_achse = [f"{a} Jahre" for a in kum.index]
+    fig = go.Figure([
+        go.Bar(x=alter_achse, y=list(kum[5]), name="In 5 Jahren",
+               marker_color=['#c0392b' if a == rentenalter else '#e74c3c' for a in kum.index]),
+        go.Bar(x=alter_achse, y=list(kum[10] - kum[5]), name="In 5-10 Jahren",
+               marker_color=['#d35400' if a == rentenalter else '#f39c12' for a in kum.index]),
+    ])
+    fig.update_layout(title="Rentenwelle je Rentenalter", barmode='stack', height=500,
+        font=dict(size=14), yaxis_title="Anzahl Mitarbeiter")
+    return fig
+
+
+# ============================================
+# DIENSTJAHRE & KALENDER
+# ============================================
+def dienstjahre_figur(treue):
+    fig = go.Figure(histogramm_balken(treue.dj, '#9b59b6'))
+    fig.update_layout(title="Betriebszugehörigkeit (Jahre)", height=450, font=dict(size=14), bargap=0.05,
+        xaxis_title="Jahre im Unternehmen", yaxis_title="Anzahl Mitarbeiter")
+    return fig
+
+
+def dj_gruppen_figur(treue):
+    gr = treue.gruppen
+    fig = go.Figure(go.Pie(
+        labels=[str(x) for x in gr.index],
+        values=list(gr.values),
+        marker_colors=F,
+        textinfo='label+percent+value',
+        textfont_size=14
+    ))
+    fig.update_layout(title="Gruppen nach Betriebszugehörigkeit", height=450, font=dict(size=14))
+    return fig
+
+
+def jubilaeen_figur(treue):
+    jubi = treue.jubilaeen
+    fig = go.Figure(go.Bar(
+        x=list(jubi.index),
+        y=list(jubi.values),
+        marker_color=F[:6],
+        text=list(jubi.values),
+        textposition='outside'
+    ))
+    fig.update_layout(title="Mitarbeiter mit rundem Jubiläum", height=400, font=dict(size=14))
+    return fig
+
+
+def dj_abteilung_figur(treue):
+    avg = treue.dj_abteilung
+    if avg is None:
+        return None
+    fig = go.Figure(go.Bar(
+        y=list(avg.index),
+        x=[round(float(x),1) for x in avg.values],
+        orientation='h',
+        marker_color=['#27ae60' if x>=10 else '#f39c12' if x>=5 else '#e74c3c' for x in avg.values],
+        text=[f"{x:.1f} J" for x in avg.values],
+        textposition='outside'
+    ))
+    fig.update_layout(title="Durchschnitt pro Abteilung", height=400, font=dict(size=14))
+    return fig
+
+
+def kalender_figur(pj):
+    """pj: EventIndex.pro_jahr(...) mit Spalten 'Jubiläum' und 'Rente'."""
+    fig = go.Figure([
+        go.Bar(x=list(pj.index), y=list(pj['Jubiläum']), name="Jubiläen", marker_color='#9b59b6'),
+        go.Bar(x=list(pj.index), y=list(pj['Rente']), name="Renteneintritte", marker_color='#e74c3c'),
+    ])
+    fig.update_layout(title="Ereignisse pro Jahr", barmode='group', height=400,
+        font=dict(size=14), xaxis_title="Jahr", yaxis_title="Anzahl Mitarbeiter")
+    return fig
+
+
+# ============================================
+# WISSENSVERLUST
+# ============================================
+def wissensverlust_figur(wissen):
+    fig = go.Figure()
+    # ab STREU_MAX_PUNKTE Mitarbeitern zeigt die Punktgröße, wie viele auf einer Stelle liegen
+    dicht = wissen.anzahl > STREU_MAX_PUNKTE
+    am_meisten = max(int(anz.max()) for _, _, anz in wissen.punkte.values())
+    for r, (jbr, dj, anz) in wissen.punkte.items():
+        fig.add_trace(go.Scatter(
+            x=jbr, y=dj, customdata=anz,
+            mode='markers', name=r,
+            marker=dict(color=KLASSEN_FARBEN[r], opacity=0.7,
+                        size=8 + 32 * np.sqrt(anz / am_meisten) if dicht else 14),
+            hovertemplate='%{x:g} Jahre bis Rente, %{y:g} Jahre Erfahrung: '
+                          '%{customdata} Mitarbeiter<extra></extra>'
+        ))
+    fig.update_layout(
+        title="Punktgröße = Anzahl Mitarbeiter" if dicht else "Jeder Punkt = 1 Mitarbeiter",
+        xaxis_title="Jahre bis zur Rente →",
+        yaxis_title="Jahre Erfahrung ↑",
+        height=500, font=dict(size=14),
+        legend=dict(font=dict(size=16))
+    )
+    return fig
+
+
+def verlust_figur(wissen):
+    verlust = wissen.verlust
+    fig = go.Figure(go.Bar(
+        x=list(verlust.keys()),
+        y=list(verlust.values()),
+        marker_color=['#e74c3c' if v>wissen.dj_summe*0.1 else '#f39c12' for v in verlust.values()],
+        text=[f"{v:.0f}" for v in verlust.values()],
+        textposition='outside'
+    ))
+    fig.update_layout(title="Wie viel Erfahrung geht wann verloren?", height=500, font=dict(size=14),
+        xaxis_title="Jahr", yaxis_title="Verlorene Erfahrungsjahre")
+    return fig
+
+
+# ============================================
+# PERSONALPROGNOSE
+# ============================================
+def prognose_figur(prog, band, titel):
+    """band: eine Zeile von prog.baender() (Spalten P5, P50, P95) je Jahr."""
+    fig = go.Figure([
+        go.Scatter(x=prog.jahre, y=list(band['P95']), mode='lines', line=dict(width=0),
+                   name="95%", showlegend=False),
+        go.Scatter(x=prog.jahre, y=list(band['P5']), mode='lines', line=dict(width=0),
+                   fill='tonexty', fillcolor='rgba(52,152,219,0.25)', name="Bereich (90%)"),
+        go.Scatter(x=prog.jahre, y=list(band['P50']), mode='lines+markers',
+                   line=dict(color='#2980b9', width=3), name="Wahrscheinlich"),
+    ])
+    fig.update_layout(title=f"Personalbestand: {titel}", height=500, font=dict(size=14),
+        xaxis_title="Jahr", yaxis_title="Mitarbeiter")
+    return fig
+
+
+def bewegungen_figur(bew):
+    fig = go.Figure([
+        go.Bar(x=list(bew.index), y=list(-bew['Rente']), name="Rente", marker_color='#e74c3c'),
+        go.Bar(x=list(bew.index), y=list(-bew['Kündigung']), name="Kündigung", marker_color='#f39c12'),
+        go.Bar(x=list(bew.index), y=list(bew['Einstellung']), name="Einstellung", marker_color='#2ecc71'),
+    ])
+    fig.update_layout(title="Abgänge und Einstellungen pro Jahr (Durchschnitt)", barmode='relative',
+        height=500, font=dict(size=14), xaxis_title="Jahr", yaxis_title="Mitarbeiter")
+    return fig
+
+
+# ============================================
+# KARRIERE
+# ============================================
+def karriere_figur(sk):
+    """sk: Sankey-Dict aus career_flow()."""
+    if sk is None:
+        return None
+    fig = go.Figure(go.Sankey(
+        node=dict(pad=15, thickness=20, label=sk['nodes'], color=sk['farben']),
+        link=dict(source=sk['source'], target=sk['target'], value=sk['value'])
+    ))
+    fig.update_layout(title="Wie verlaufen die Karrieren?", height=700, font=dict(size=14))
+    return fig
+
+
+# ============================================
+# WEITERE AUSWERTUNGEN
+# ============================================
+def _geschlecht_label(x):
+    if str(x).lower() in ['m','männlich','male']:
+        return 'Männlich'
+    if str(x).lower() in ['w','weiblich','female']:
+        return 'Weiblich'
+    return str(x)
+
+
+def geschlecht_figur(vt):
+    c = vt.geschlecht
+    if c is None:
+        return None
+    fig = go.Figure(go.Pie(
+        labels=[_geschlecht_label(x) for x in c.index],
+        values=list(c.values),
+        marker_colors=['#3498db','#e74c3c','#2ecc71'],
+        textinfo='label+percent+value',
+        textfont_size=16
+    ))
+    fig.update_layout(title="Geschlechterverteilung", height=450, font=dict(size=16))
+    return fig
+
+
+def abteilungen_figur(vt):
+    c = vt.abteilungen
+    if c is None:
+        return None
+    fig = go.Figure(go.Bar(
+        y=list(c.index),
+        x=list(c.values),
+        orientation='h',
+        marker_color=F[:len(c)],
+        text=list(c.values),
+        textposition='outside'
+    ))
+    fig.update_layout(title="Mitarbeiter pro Abteilung", height=450, font=dict(size=14))
+    return fig
+
+
+def level_figur(vt):
+    c = vt.level
+    if c is None:
+        return None
+    fig = go.Figure(go.Bar(
+        x=list(c.index),
+        y=list(c.values),
+        marker_color=F[:len(c)],
+        text=list(c.values),
+        textposition='outside'
+    ))
+    fig.update_layout(title="Karrierelevel", height=400, font=dict(size=14))
+    return fig
+
+
+def arbeitszeit_figur(vt):
+    c = vt.arbeitszeit
+    if c is None:
+        return None
+    fig = go.Figure(go.Pie(
+        labels=list(c.index),
+        values=list(c.values),
+        marker_colors=['#3498db','#f39c12'],
+        textinfo='label+percent+value',
+        textfont_size=16
+    ))
+    fig.update_layout(title="Vollzeit / Teilzeit", height=400, font=dict(size=16))
+    return fig
+
+
+def gehalt_figur(vt):
+    if vt.gehalt is None:
+        return None
+    fig = go.Figure(histogramm_balken(vt.gehalt, '#2ecc71', '{:.0f} €'))
+    fig.update_layout(title="Gehaltsverteilung", height=400, font=dict(size=14), bargap=0.05,
+        xaxis_title="Jahresgehalt in €", yaxis_title="Anzahl")
+    return fig
+
+
+def standorte_figur(vt):
+    c = vt.standorte
+    if c is None:
+        return None
+    fig = go.Figure(go.Pie(
+        labels=list(c.index),
+        values=list(c.values),
+        marker_colors=F,
+        textinfo='label+percent+value',
+        textfont_size=14
+    ))
+    fig.update_layout(title="Standorte", height=400, font=dict(size=14))
+    return fig
+
+
+# ============================================
+# BENCHMARK & MONATSVERGLEICH
+# ============================================
+def benchmark_figur(bmk, region):
+    if bmk is None or not bmk.kat:
+        return None
+    fig = go.Figure([
+        go.Bar(name='Ihr Unternehmen', x=bmk.kat, y=bmk.u, marker_color='#3498db',
+            text=bmk.u, textposition='outside'),
+        go.Bar(name=region, x=bmk.kat, y=bmk.bm, marker_color='#95a5a6',
+            text=bmk.bm, textposition='outside')
+    ])
+    fig.update_layout(title=f"Ihre Zahlen im Vergleich zu {region}",
+        barmode='group', height=500, font=dict(size=16),
+        legend=dict(font=dict(size=18)))
+    return fig
+
+
+def monatsvergleich_figur(stichtag, alt_kz, kz, jahr):
+    jahre = list(range(jahr, jahr + 16))
+    fig = go.Figure([
+        go.Bar(name=f"Stand {stichtag}", x=jahre,
+               y=alt_kz.welle.reindex(jahre, fill_value=0).tolist(), marker_color='#95a5a6'),
+        go.Bar(name="Aktueller Upload", x=jahre,
+               y=kz.welle.reindex(jahre, fill_value=0).tolist(), marker_color='#3498db'),
+    ])
+    fig.update_layout(title="Rentenwelle: Renteneintritte pro Jahr im Vergleich",
+        barmode='group', height=450, font=dict(size=14),
+        xaxis_title="Jahr", yaxis_title="Mitarbeiter")
+    return fig
+
+
+# ============================================
+# ALLE DIAGRAMME (ZIP-Export)
+# ============================================
+def alle_figuren(res):
+    """[(Dateiname, Figur)] aller Diagramme, die allein aus dem Ergebnis entstehen.
+
+    Diagramme, die von Reglern der Seite abhängen (Kalender, Prognose,
+    Monatsvergleich), fügt die App hinzu, sobald sie angezeigt wurden.
+    """
+    plan = [
+        ('00_Datenqualitaet_Fehlend.html', fehlend_figur, res.qualitaet),
+        ('00_Datenqualitaet_Ausreisser.html', ausreisser_figur, res.qualitaet),
+        ('00_Daten_Matrix.html', matrix_figur, res.matrix),
+    ]
+    if res.rente is not None:
+        plan += [
+            ('01_Rente_Uebersicht.html', rente_kategorien_figur, res.rente),
+            ('02_Rente_Pro_Jahr.html', lambda r: rente_pro_jahr_figur(r, res.jahr), res.rente),
+            ('03_Altersverteilung.html', altersverteilung_figur, res.rente),
+            ('04_Rente_Kumuliert.html', rente_kumuliert_figur, res.rente),
+            ('05_Alter_Abteilung.html', alter_abteilung_figur, res.rente),
+            ('06_Abgang_Abteilung.html', abgang_abteilung_figur, res.rente),
+        ]
+    if res.treue is not None:
+        plan += [
+            ('07_Dienstjahre.html', dienstjahre_figur, res.treue),
+            ('08_Dienstjahre_Gruppen.html', dj_gruppen_figur, res.treue),
+            ('09_Jubilaeen.html', jubilaeen_figur, res.treue),
+            ('10_DJ_Abteilung.html', dj_abteilung_figur, res.treue),
+        ]
+    if res.wissen is not None:
+        plan += [
+            ('11_Wissensverlust.html', wissensverlust_figur, res.wissen),
+            ('12_Verlust_Pro_Jahr.html', verlust_figur, res.wissen),
+        ]
+    if res.karriere is not None:
+        plan.append(('13_Karriere_Flow.html', karriere_figur, res.karriere.sankey))
+    if res.verteilung is not None:
+        plan += [
+            ('14_Geschlecht.html', geschlecht_figur, res.verteilung),
+            ('15_Abteilungen.html', abteilungen_figur, res.verteilung),
+            ('16_Level.html', level_figur, res.verteilung),
+            ('17_Arbeitszeit.html', arbeitszeit_figur, res.verteilung),
+            ('18_Gehalt.html', gehalt_figur, res.verteilung),
+            ('19_Standorte.html', standorte_figur, res.verteilung),
+        ]
+    plan.append(('20_Benchmark.html', lambda b: benchmark_figur(b, res.region), res.benchmark))
+    if res.rente_vergleich is not None:
+        plan.append(('22_Rentenalter_Vergleich.html', rentenalter_welle_figur, res.rente_vergleich))
+
+    figuren = []
+    for name, bauen, daten in plan:
+        fig = bauen(daten) if daten is not None else None
+        if fig is not None:
+            figuren.append((name, fig))
+    return figuren
@@ -0,0 +1,139 @@
+"""Aggregat-Würfel: ein Durchlauf über die Mitarbeiter, alle Gruppierungen daraus.
+
+Dimensionen sind Abteilung × Standort × Level × Geschlecht × Alter. Das Alter
+statt des Rentenjahres hält den Würfel unabhängig vom Rentenalter:
+Rentenjahr = Jahr + Rentenalter - Alter. Je Zelle werden Anzahl, Summen und
+Anzahlen von Alter und Dienstjahren sowie die erste Zeilenposition (für eine
+stabile Reihenfolge bei Gleichstand) gespeichert. Abteilungs-, Standort- und
+Rentenjahr-Auswertungen werden aus den Zellen summiert, statt die Mitarbeiter
+erneut zu durchlaufen.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONEN = ('abt', 'ort', 'lvl', 'ges', 'alter')
+MASSE = ('anzahl', 'n_alter', 'summe_alter', 'n_dj', 'summe_dj')
+
+
+@dataclass
+class AggregateCube:
+    werte: dict              # Dimension -> Index der Ausprägungen (sortiert)
+    codes: np.ndarray        # (Zellen, Dimensionen) int64, -1 = fehlend
+    anzahl: np.ndarray       # Mitarbeiter je Zelle
+    n_alter: np.ndarray      # davon mit Alter
+    summe_alter: np.ndarray
+    n_dj: np.ndarray         # davon mit Dienstjahren
+    summe_dj: np.ndarray
+    erstes: np.ndarray       # erste Zeilenposition je Zelle (aufsteigend sortiert)
+    _schnitte: dict = field(default_factory=dict, repr=False)  # ungefilterte gruppiert()-Ergebnisse
+
+    def __len__(self):
+        return len(self.anzahl)
+
+    def zellwert(self, dim):
+        """Ausprägung der Dimension je Zelle (NaN, wenn fehlend)."""
+        c = self.codes[:, DIMENSIONEN.index(dim)]
+        werte = self.werte[dim]
+        if dim == 'alter':
+            return np.where(c >= 0, werte.to_numpy(dtype='float64')[np.maximum(c, 0)], np.nan)
+        out = np.full(len(c), np.nan, dtype=object)
+        out[c >= 0] = werte.to_numpy(dtype=object)[c[c >= 0]]
+        return out
+
+    def gruppiert(self, nach, wo=None):
+        """Summen je Ausprägung von nach (Dimension oder Liste), ohne fehlende.
+
+        wo: optionale Maske über die Zellen. Liefert einen DataFrame mit den
+        Spalten von MASSE plus 'erstes', sortiert nach den Ausprägungen.
+        """
+        dims = [nach] if isinstance(nach, str) else list(nach)
+        if wo is None and tuple(dims) in self._schnitte:
+            return self._schnitte[tuple(dims)]
+        spalten = [DIMENSIONEN.index(d) for d in dims]
+        sel = (self.codes[:, spalten] >= 0).all(axis=1)
+        if wo is not None:
+            sel &= wo
+        codes = self.codes[sel][:, spalten]
+        schluessel = np.zeros(len(codes), dtype=np.int64)
+        for i, d in enumerate(dims):
+            schluessel = schluessel * len(self.werte[d]) + codes[:, i]
+        # Zellen liegen nach erstem Auftreten sortiert: der erste Treffer ist das Minimum
+        _, erste_zelle, inverse = np.unique(schluessel, return_index=True, return_inverse=True)
+        m = len(erste_zelle)
+        daten = {mass: np.bincount(inverse, weights=getattr(self, mass)[sel], minlength=m)
+                 for mass in MASSE}
+        for mass in ('anzahl', 'n_alter', 'n_dj'):
+            daten[mass] = daten[mass].astype(np.int64)
+        daten['erstes'] = self.erstes[sel][erste_zelle]
+
+        ebenen = [self.werte[d].take(codes[erste_zelle, i]) for i, d in enumerate(dims)]
+        index = ebenen[0] if len(dims) == 1 else pd.MultiIndex.from_arrays(ebenen, names=dims)
+        ergebnis = pd.DataFrame(daten, index=index)
+        if wo is None:
+            self._schnitte[tuple(dims)] = ergebnis
+        return ergebnis
+
+    def haeufigkeiten(self, dim, name=None):
+        """Wie value_counts(): absteigend, Gleichstand nach erstem Auftreten."""
+        g = self.gruppiert(dim)
+        g = g.iloc[np.lexsort((g['erstes'].to_numpy(), -g['anzahl'].to_numpy()))]
+        return pd.Series(g['anzahl'].to_numpy(), index=g.index.rename(name), name='count')
+
+
+def _faktoren(s):
+    codes, werte = pd.factorize(s, sort=True)
+    if isinstance(werte, pd.Categorical):
+        werte = np.asarray(werte)
+    return codes.astype(np.int64), pd.Index(werte)
+
+
+def build_cube(df, cols):
+    """Baut den Würfel in einem Durchlauf über df (mit Alter/DJ aus derive_columns)."""
+    n = len(df)
+    codes, werte = [], {}
+    for dim in DIMENSIONEN:
+        spalte = 'Alter' if dim == 'alter' else cols[dim]
+        if spalte and spalte in df.columns:
+            c, w = _faktoren(df[spalte])
+        else:
+            c, w = np.full(n, -1, dtype=np.int64), pd.Index([])
+        codes.append(c)
+        werte[dim] = w
+
+    # Gemischte Basis: ein int64-Schlüssel je Zeile, solange er nicht überläuft
+    groessen = [len(werte[d]) + 1 for d in DIMENSIONEN]
+    if np.prod([float(g) for g in groessen]) < 2**62:
+        schluessel = np.zeros(n, dtype=np.int64)
+        for c, g in zip(codes, groessen):
+            schluessel = schluessel * g + (c + 1)
+        _, erstes, inverse = np.unique(schluessel, return_index=True, return_inverse=True)
+    else:
+        _, erstes, inverse = np.unique(np.stack(codes, axis=1), axis=0,
+                                       return_index=True, return_inverse=True)
+    # Zellen nach erstem Auftreten ordnen
+    reihenfolge = np.argsort(erstes, kind='stable')
+    rang = np.empty_like(reihenfolge)
+    rang[reihenfolge] = np.arange(len(reihenfolge))
+    erstes, inverse = erstes[reihenfolge], rang[inverse.ravel()]
+    m = len(erstes)
+
+    def summen(spalte):
+        if spalte not in df.columns:
+            return np.zeros(m, dtype=np.int64), np.zeros(m)
+        x = df[spalte].to_numpy(dtype='float64', na_value=np.nan)
+        hat = ~np.isnan(x)
+        return (np.bincount(inverse[hat], minlength=m),
+                np.bincount(inverse[hat], weights=x[hat], minlength=m))
+
+    n_alter, summe_alter = summen('Alter')
+    n_dj, summe_dj = summen('DJ')
+    return AggregateCube(
+        werte=werte,
+        codes=np.stack([c[erstes] for c in codes], axis=1),
+        anzahl=np.bincount(inverse, minlength=m),
+        n_alter=n_alter, summe_alter=summe_alter,
+        n_dj=n_dj, summe_dj=summe_dj,
+        erstes=erstes.astype(np.int64),
+    )
@@ -0,0 +1,1141 @@
+"""HR-Analyse ohne Oberfläche.
+
+Alle Berechnungen der App (Spaltenerkennung, abgeleitete Spalten, Qualitäts-
+check, Rente, Dienstjahre, Wissensverlust, Karriere, Benchmark) liegen hier
+als reine Funktionen. Das Modul importiert weder Streamlit noch Plotly, damit
+es in Batch-Prozessen (siehe hr_batch.py) schnell startet.
+"""
+from dataclasses import dataclass, field, fields, is_dataclass, replace
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from hr_cube import AggregateCube, build_cube
+from hr_ingest import read_table
+from hr_numbers import compact_years, parse_numbers, year_display
+from hr_perf import abschnitt
+from hr_risk import KLASSEN, KRITISCH, WARNUNG, RiskModel
+from hr_quality import (DataMatrix, DuplicateReport, ProblemIndex, build_matrix, build_rules, find_duplicates,
+                        group_outliers)
+
+# ============================================
+# STAMMDATEN
+# ============================================
+BENCHMARK = {
+    "Niedersachsen": {"alter": 44.6, "frauen": 50.3, "teilzeit": 28.4, "gehalt": 3650},
+    "NRW": {"alter": 44.2, "frauen": 50.8, "teilzeit": 27.8, "gehalt": 3850},
+    "Bayern": {"alter": 43.8, "frauen": 50.1, "teilzeit": 26.5, "gehalt": 4200},
+    "Baden-Wuerttemberg": {"alter": 43.5, "frauen": 49.8, "teilzeit": 27.2, "gehalt": 4350},
+    "Hessen": {"alter": 43.9, "frauen": 50.5, "teilzeit": 26.8, "gehalt": 4150},
+    "Berlin": {"alter": 42.8, "frauen": 51.2, "teilzeit": 29.5, "gehalt": 3750},
+    "Hamburg": {"alter": 42.5, "frauen": 51.0, "teilzeit": 28.2, "gehalt": 4450},
+    "Sachsen": {"alter": 46.2, "frauen": 50.6, "teilzeit": 25.8, "gehalt": 3150},
+    "Deutschland": {"alter": 44.3, "frauen": 50.5, "teilzeit": 27.5, "gehalt": 3950}
+}
+
+# Spalten der Excel-Vorlage
+SPALTEN = ['Mitarbeiter_ID','Geburtsjahr','Eintrittsjahr','Geschlecht','Abteilung',
+           'Einstiegsposition','Aktuelle_Position','Karrierelevel','Gehalt_Brutto_Jahr',
+           'Arbeitszeit','Wochenstunden','Standort','Bildungsabschluss','Vertragsart']
+
+# Suchbegriffe je Rolle (Reihenfolge = Priorität wie im alten find())
+SUCHBEGRIFFE = {
+    'geb': ['geburtsjahr','jahrgang'],
+    'ein': ['eintrittsjahr','eintritt'],
+    'ges': ['geschlecht'],
+    'abt': ['abteilung'],
+    'lvl': ['karrierelevel','level'],
+    'geh': ['gehalt','brutto'],
+    'az': ['arbeitszeit'],
+    'ein_pos': ['einstiegsposition','einstieg'],
+    'akt_pos': ['aktuelleposition','aktuelle','position'],
+    'ort': ['standort'],
+}
+
+ZAHL_ROLLEN = ('geb', 'ein', 'geh')
+TEXT_ROLLEN = ('ges', 'abt', 'lvl', 'az', 'ein_pos', 'akt_pos', 'ort')
+
+# Rollen im Qualitätscheck (Anzeigename)
+QUAL_SPALTEN = [
+    ('geb', 'Geburtsjahr'),
+    ('ein', 'Eintrittsjahr'),
+    ('ges', 'Geschlecht'),
+    ('abt', 'Abteilung'),
+    ('lvl', 'Karrierelevel'),
+    ('geh', 'Gehalt'),
+    ('az', 'Arbeitszeit'),
+    ('ein_pos', 'Einstiegsposition'),
+    ('akt_pos', 'Aktuelle Position'),
+    ('ort', 'Standort'),
+]
+
+# Rollen in Daten-Matrix und Problem-Liste (Kurzname)
+MATRIX_SPALTEN = [
+    ('geb', 'Geburtsjahr'),
+    ('ein', 'Eintrittsjahr'),
+    ('ges', 'Geschlecht'),
+    ('abt', 'Abteilung'),
+    ('lvl', 'Level'),
+    ('geh', 'Gehalt'),
+    ('az', 'Arbeitszeit'),
+    ('ein_pos', 'Einstiegs-Pos'),
+    ('akt_pos', 'Aktuelle Pos'),
+    ('ort', 'Standort'),
+]
+
+MATRIX_MAX_ROWS = 200
+# Gruppen-Ausreißer: Werte, die für ihre Abteilung, ihr Level oder ihren Standort untypisch sind.
+# Dienstjahre sind stark rechtsschief (viele Neue, wenige sehr Treue) und werden daher nicht geprüft.
+AUSREISSER_GRUPPEN = [('abt', 'Abteilung'), ('lvl', 'Level'), ('ort', 'Standort')]
+AUSREISSER_WERTE = [('Gehalt', 'Gehalt'), ('Alter', 'Alter')]
+DUPLIKAT_MERKMALE = ['geb', 'ein', 'abt', 'akt_pos']   # ohne ID: gleiche Werte = vermutlich dieselbe Person
+KATEGORIE_ANTEIL = 0.5    # Text-Rollen mit höchstens so vielen verschiedenen Werten je Zeile -> category
+JUBILAEEN = [5,10,15,20,25,30]
+DJ_GRUPPEN = [-1,2,5,10,15,20,100]   # Grenzen der Dienstjahr-Gruppen (rechts inklusive)
+OHNE_ABTEILUNG = '(ohne Abteilung)'
+DJ_GRUPPEN_NAMEN = ['Neu (0-2 J)','3-5 Jahre','6-10 Jahre','11-15 Jahre','16-20 Jahre','Über 20 Jahre']
+RENTENALTER_SPANNE = range(60, 71)   # Rentenalter-Vergleich (wie der Regler der App)
+RENTE_KATEGORIEN = [-100,0,5,10,15,20,100]   # Grenzen der Jahre bis Rente (rechts inklusive)
+RENTE_KAT_NAMEN = ['Bereits Rente','0-5 Jahre','5-10 Jahre','10-15 Jahre','15-20 Jahre','Mehr als 20 Jahre']
+# Stufen des Karriere-Flows (Reihenfolge = Sankey von links nach rechts) und ihre Farben
+KARRIERE_STUFEN = [
+    ('ein_pos', 'Einstiegsposition'),
+    ('abt', 'Abteilung'),
+    ('lvl', 'Karrierelevel'),
+    ('akt_pos', 'Aktuelle Position'),
+]
+KARRIERE_FARBEN = {'ein_pos': '#2ecc71', 'abt': '#3498db', 'lvl': '#e74c3c', 'akt_pos': '#9b59b6'}
+KARRIERE_MINDESTANTEIL = 0.01   # seltenere Ausprägungen je Stufe -> SONSTIGE
+SONSTIGE = 'Sonstige'
+SONSTIGE_FARBE = '#95a5a6'
+HISTOGRAMM_BALKEN = 20     # ungefähre Balkenzahl der Verteilungsdiagramme
+STREU_MAX_PUNKTE = 2000    # mehr Mitarbeiter -> Wissensverlust-Streudiagramm als Dichte (Punktgröße)
+# Messabschnitte einer vollständigen Analyse in ihrer Reihenfolge (Fortschrittsanzeige)
+ANALYSE_STUFEN = ['Einlesen', 'Vorbereitung', 'Rentenalter-Vergleich', 'Datenqualität', 'Daten-Matrix',
+                  'Dienstjahre', 'Karriere', 'Weitere Auswertungen', 'Rente', 'Wissensverlust']
+
+
+# ============================================
+# ERGEBNIS-STRUKTUREN
+# ============================================
+@dataclass
+class PreparedData:
+    df: pd.DataFrame         # Rohdaten + Alter/DJ/Gehalt
+    cols: dict               # Rolle -> Spaltenname (oder None)
+    jahr: int
+    cube: Optional[AggregateCube] = None  # Abteilung × Standort × Level × Geschlecht × Alter
+    unlesbar: dict = field(default_factory=dict)  # Rolle -> UnparsedCells (Text statt Zahl)
+
+
+@dataclass
+class Histogram:
+    """Fertig gezählte Verteilung: Kanten auf Vielfachen der Breite.
+
+    Weil die Kanten auf einem festen Raster liegen, lassen sich Zählungen mit
+    gleicher Breite (z. B. je Gesellschaft) einfach addieren.
+    """
+    kanten: np.ndarray       # Balkengrenzen, eine mehr als Balken
+    anzahl: np.ndarray       # Werte je Balken [links, rechts)
+
+    def __len__(self):
+        return len(self.anzahl)
+
+    @property
+    def mitten(self):
+        return (self.kanten[:-1] + self.kanten[1:]) / 2
+
+    @property
+    def breite(self):
+        return float(self.kanten[1] - self.kanten[0]) if len(self.kanten) > 1 else 1.0
+
+    def bereiche(self, muster='{:g}'):
+        """Beschriftung je Balken, z. B. '30–35'."""
+        return [f"{muster.format(a)}–{muster.format(b)}" for a, b in zip(self.kanten[:-1], self.kanten[1:])]
+
+
+@dataclass
+class QualityResult:
+    fehlend: list            # [{'Spalte','Fehlend','Prozent','Status'}]
+    ausreisser: list         # [{'Kategorie','Anzahl','Status'}]
+    details: list            # Textzeilen zu betroffenen Datensätzen
+    fehlend_score: float
+    ausreisser_score: float
+    gesamt_score: float
+
+
+@dataclass
+class RetirementResult:
+    anzahl: int
+    r5: int
+    r10: int
+    kategorien: pd.Series    # Kat -> Anzahl
+    pro_jahr: pd.Series      # Rentenjahr -> Anzahl (nächste 15 Jahre)
+    alter: Histogram         # Altersverteilung
+    kumuliert: list          # Anzahl mit JbR <= 1..10
+    alter_abteilung: Optional[pd.Series] = None
+    abgang_abteilung: Optional[pd.Series] = None
+
+
+@dataclass
+class RetirementSweep:
+    """Rentenwelle für mehrere Rentenalter; Zeilen = Rentenalter."""
+    jahr: int
+    rentenalter: list        # Zeilen aller Matrizen
+    anzahl: int
+    welle: pd.DataFrame      # Rentenalter × exaktes Rentenjahr (jahr..jahr+15) -> Renteneintritte
+    kumuliert: pd.DataFrame  # Rentenalter × 1..10 -> Anzahl mit JbR <= j
+    kategorien: pd.DataFrame # Rentenalter × Kat -> Anzahl
+    alter: Histogram         # Altersverteilung
+    alter_abteilung: Optional[pd.Series] = None
+    abgang_abteilung: Optional[pd.DataFrame] = None  # Rentenalter × Abteilung -> % in 5 Jahren
+
+    def __contains__(self, rentenalter):
+        return rentenalter in self.welle.index
+
+    def ergebnis(self, rentenalter):
+        """RetirementResult für ein Rentenalter der Spanne (nur Nachschlagen)."""
+        kum = self.kumuliert.loc[rentenalter].to_numpy()
+        welle = self.welle.loc[rentenalter]
+        welle = welle[welle > 0]
+        res = RetirementResult(
+            anzahl=self.anzahl,
+            r5=int(kum[4]),
+            r10=int(kum[9] - kum[4]),
+            kategorien=(self.kategorien.loc[rentenalter].rename('count')
+                        .sort_values(ascending=False, kind='stable')),
+            pro_jahr=pd.Series(welle.to_numpy(), index=pd.Index(welle.index.to_numpy(dtype='float64'), name='RJ'),
+                               name='count'),
+            alter=self.alter,
+            kumuliert=[int(k) for k in kum],
+            alter_abteilung=self.alter_abteilung,
+        )
+        if self.abgang_abteilung is not None:
+            res.abgang_abteilung = self.abgang_abteilung.loc[rentenalter].rename(None).sort_values()
+        return res
+
+
+@dataclass
+class TenureResult:
+    anzahl: int
+    lang: int                # >= 20 Dienstjahre
+    dj: Histogram            # Verteilung der Dienstjahre
+    gruppen: pd.Series       # Gr -> Anzahl
+    jubilaeen: pd.Series     # '5 Jahre' -> Anzahl
+    dj_abteilung: Optional[pd.Series] = None
+
+
+@dataclass
+class KnowledgeLossResult:
+    anzahl: int
+    krit: int
+    warn: int
+    verl5: float
+    punkte: dict             # Klasse -> (JbR, DJ, Anzahl) je belegter Zelle
+    verlust: dict            # Jahr -> verlorene Erfahrungsjahre
+    dj_summe: float
+
+
+@dataclass
+class CareerResult:
+    beispiele: list          # [(Einstiegsposition, Aktuelle Position, DJ)]
+    sankey: Optional[dict] = None  # {'stufen','nodes','farben','source','target','value'}
+
+
+@dataclass
+class DistributionResult:
+    geschlecht: Optional[pd.Series] = None
+    abteilungen: Optional[pd.Series] = None
+    level: Optional[pd.Series] = None
+    arbeitszeit: Optional[pd.Series] = None
+    gehalt: Optional[Histogram] = None
+    standorte: Optional[pd.Series] = None
+
+
+@dataclass
+class BenchmarkResult:
+    region: str
+    kat: list
+    u: list
+    bm: list
+
+
+@dataclass
+class AnalysisResult:
+    jahr: int
+    rentenalter: Optional[int]
+    region: Optional[str]
+    cols: dict               # Rolle -> Spaltenname (oder None)
+    n: int
+    alter_mean: Optional[float] = None
+    dj_mean: Optional[float] = None
+    gehalt_mean: Optional[float] = None
+    qualitaet: Optional[QualityResult] = None
+    matrix: Optional[DataMatrix] = None
+    probleme: Optional[ProblemIndex] = None
+    duplikate: Optional[DuplicateReport] = None
+    rente: Optional[RetirementResult] = None
+    rente_vergleich: Optional[RetirementSweep] = None
+    treue: Optional[TenureResult] = None
+    wissen: Optional[KnowledgeLossResult] = None
+    karriere: Optional[CareerResult] = None
+    verteilung: Optional[DistributionResult] = None
+    benchmark: Optional[BenchmarkResult] = None
+
+    def to_dict(self):
+        """JSON-taugliche Darstellung (für Batch-Export)."""
+        return _jsonable(self)
+
+
+def _jsonable(obj):
+    if is_dataclass(obj):
+        return {f.name: _jsonable(getattr(obj, f.name)) for f in fields(obj) if not f.name.startswith('_')}
+    if isinstance(obj, (ProblemIndex, DuplicateReport)):
+        return _jsonable(obj.frame())
+    if isinstance(obj, pd.DataFrame):
+        return [_jsonable(r) for r in obj.to_dict(orient='records')]
+    if isinstance(obj, pd.Series):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, np.ndarray):
+        return [_jsonable(v) for v in obj.tolist()]
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and np.isnan(obj):
+        return None
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    return obj
+
+
+# ============================================
+# EINLESEN & SPALTEN
+# ============================================
+def read_upload(source, name=None, cols=None, header=None):
+    """Liest Excel, CSV oder Parquet (Pfad oder Datei-Objekt), leere Zeilen entfernt.
+
+    Es werden nur die Spalten geladen, die die Analyse braucht. cols: feste
+    Zuordnung Rolle -> Spalte (z. B. vom Benutzer bestätigt), sonst wird sie
+    aus der Kopfzeile erkannt; header: bereits gelesene Kopfzeile.
+    """
+    if cols is None:
+        return read_table(source, name, select=needed_columns, dtypes=column_dtypes, header=header)
+    return read_table(source, name, select=lambda h: needed_columns(h, cols),
+                      dtypes=lambda auswahl: column_dtypes(auswahl, cols), header=header)
+
+
+def needed_columns(header, cols=None):
+    """Spalten, die die Analyse nutzt: erkannte Rollen plus Mitarbeiter_ID."""
+    benoetigt = [c for c in (cols or find_columns(header)).values() if c]
+    if 'Mitarbeiter_ID' in header:
+        benoetigt.append('Mitarbeiter_ID')
+    return benoetigt
+
+
+def column_dtypes(columns, cols=None):
+    """Text-Rollen werden direkt als Text gelesen; Zahlen erkennt der Reader."""
+    cols = cols or find_columns(columns)
+    return {cols[r]: str for r in TEXT_ROLLEN if cols.get(r) in columns}
+
+
+def _normiert(spalte):
+    return str(spalte).lower().replace('_', '').replace(' ', '').replace('-', '')
+
+
+def column_score(spalte, begriffe):
+    """Wie gut passt ein Spaltenkopf zu den Suchbegriffen einer Rolle? 0 = gar nicht.
+
+    Gleichheit schlägt Präfix, Präfix schlägt Teilstring; danach zählt der
+    längere (spezifischere) Begriff, dann der früher genannte.
+    """
+    name = _normiert(spalte)
+    beste = 0
+    for rang, begriff in enumerate(begriffe):
+        if begriff not in name:
+            continue
+        art = 3 if name == begriff else 2 if name.startswith(begriff) else 1
+        beste = max(beste, art * 10_000 + len(begriff) * 100 - rang)
+    return beste
+
+
+@lru_cache(maxsize=256)
+def _zuordnung(header):
+    kandidaten = [(-column_score(spalte, begriffe), r, c, rolle, spalte)
+                  for r, (rolle, begriffe) in enumerate(SUCHBEGRIFFE.items())
+                  for c, spalte in enumerate(header)]
+    cols, belegt = dict.fromkeys(SUCHBEGRIFFE), set()
+    for score, _, _, rolle, spalte in sorted(kandidaten, key=lambda k: k[:3]):
+        if score < 0 and cols[rolle] is None and spalte not in belegt:
+            cols[rolle] = spalte
+            belegt.add(spalte)
+    return tuple(cols.items())
+
+
+def find_columns(columns):
+    """Ordnet jeder Rolle (geb, ein, ...) höchstens eine Spalte zu und jeder
+    Spalte höchstens eine Rolle.
+
+    Alle Paare aus Spalte und Rolle werden bewertet (column_score) und global
+    vergeben: bestes Paar zuerst, bei Gleichstand Rollen- und Spaltenreihenfolge.
+    Das Ergebnis wird je Kopfzeile zwischengespeichert.
+    """
+    return dict(_zuordnung(tuple(columns)))
+
+
+def normalize_numbers(df, cols):
+    """Zahlen-Rollen (Jahre, Gehalt) als float64, Text wie "45.000,50 €" gelesen.
+
+    Liefert das neue df und {Rolle: UnparsedCells} für Zellen, die keine Zahl
+    sind; sie werden NaN, aber nicht als fehlend gezählt.
+    """
+    neu, unlesbar = {}, {}
+    for rolle in ZAHL_ROLLEN:
+        col = cols[rolle]
+        if not col or col not in df.columns or df[col].dtype == 'float64':
+            continue
+        neu[col], fehler = parse_numbers(df[col])
+        if len(fehler):
+            unlesbar[rolle] = fehler
+    return (df.assign(**neu) if neu else df), unlesbar
+
+
+def derive_columns(df, cols, jahr):
+    """Ergänzt Alter, DJ (Dienstjahre) und Gehalt als numerische Spalten (float32)."""
+    def zahlen(rolle):
+        return parse_numbers(df[cols[rolle]])[0]
+
+    neu = {}
+    if cols['geb']:
+        neu['Alter'] = (jahr - zahlen('geb')).astype('float32')
+    if cols['ein']:
+        neu['DJ'] = (jahr - zahlen('ein')).astype('float32')
+    if cols['geh']:
+        neu['Gehalt'] = zahlen('geh').astype('float32')
+    return df.assign(**neu) if neu else df
+
+
+def compact_dtypes(df, cols):
+    """Schlankes Speicherformat: Kategorien für Text-Rollen mit wenigen
+    Ausprägungen, int16 für vollständige Jahresspalten, float32 für Gehalt.
+
+    Jahresspalten mit Lücken bleiben Gleitkommazahlen (float32), weil
+    fehlende Werte als NaN durch alle numpy-Berechnungen laufen; für die
+    Anzeige formatiert year_display() sie wieder als ganze Jahre.
+    """
+    neu = {}
+    n = max(len(df), 1)
+    for rolle in TEXT_ROLLEN:
+        col = cols[rolle]
+        if col and col not in neu and df[col].dtype != 'category' and df[col].nunique() <= KATEGORIE_ANTEIL * n:
+            neu[col] = df[col].astype('category')
+    for rolle in ZAHL_ROLLEN:
+        col = cols[rolle]
+        if not col or col in neu:
+            continue
+        werte = df[col]
+        if not (werte.dtype == 'float64' or pd.api.types.is_integer_dtype(werte)):
+            continue
+        if rolle in ('geb', 'ein'):
+            neu[col] = compact_years(werte)
+        # Ganzzahlen nur, solange float32 sie exakt darstellt
+        elif werte.dtype == 'float64' or werte.abs().max() < 2**24:
+            neu[col] = werte.astype('float32')
+    return df.assign(**neu) if neu else df
+
+
+def department_codes(df, cols):
+    """Abteilung je Zeile als Code 0..D-1 plus Namen (alphabetisch).
+
+    Zeilen ohne Abteilung bekommen einen eigenen Code OHNE_ABTEILUNG; ohne
+    Abteilungsspalte gibt es eine einzige Gruppe 'Alle'.
+    """
+    if not cols['abt']:
+        return np.zeros(len(df), dtype=np.int64), ['Alle']
+    codes, namen = pd.factorize(df[cols['abt']], sort=True)
+    namen = [str(a) for a in namen]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(namen), codes)
+        namen.append(OHNE_ABTEILUNG)
+    return codes.astype(np.int64), namen
+
+
+def histogram_width(spanne, balken=HISTOGRAMM_BALKEN):
+    """Runde Balkenbreite (1, 2, 5 × 10^k) für etwa so viele Balken."""
+    roh = spanne / balken if spanne > 0 else 1.0
+    stelle = 10.0 ** np.floor(np.log10(roh))
+    return float(next(f * stelle for f in (1, 2, 5, 10) if f * stelle >= roh))
+
+
+def histogram(werte, balken=HISTOGRAMM_BALKEN, breite=None):
+    """Histogram der endlichen Werte mit runder Breite (Standard: aus der Spanne).
+
+    Die Kanten liegen auf Vielfachen der Breite, gezählt wird mit einem
+    bincount. Ans Diagramm gehen so nur die Balken, nicht die Rohwerte.
+    """
+    werte = np.asarray(werte, dtype='float64')
+    werte = werte[np.isfinite(werte)]
+    if len(werte) == 0:
+        return Histogram(np.zeros(1), np.zeros(0, dtype=np.int64))
+    lo, hi = werte.min(), werte.max()
+    breite = breite or histogram_width(hi - lo, balken)
+    start = np.floor(lo / breite)
+    fach = (np.floor(werte / breite) - start).astype(np.int64)
+    anzahl = np.bincount(fach)
+    return Histogram((start + np.arange(len(anzahl) + 1)) * breite, anzahl)
+
+
+# ============================================
+# DATENQUALITÄT
+# ============================================
+def outlier_groups(df, cols):
+    """Gruppen-Ausreißer (Median/MAD je Abteilung, Level, Standort) für Gehalt und Alter."""
+    return group_outliers(df, cols, AUSREISSER_GRUPPEN, [w for w, _ in AUSREISSER_WERTE])
+
+
+def duplicate_check(df, cols):
+    """Mehrfache IDs, widersprüchliche Jahre je ID und vermutliche Duplikate ohne ID."""
+    return find_duplicates(df, cols, DUPLIKAT_MERKMALE)
+
+
+def drop_duplicates(prep, duplikate=None):
+    """PreparedData ohne spätere Vorkommen doppelter Datensätze (das erste bleibt)."""
+    duplikate = duplikate if duplikate is not None else duplicate_check(prep.df, prep.cols)
+    return subset_prep(prep, ~duplikate.wiederholung)
+
+
+def quality_check(df, cols, unlesbar=None, gruppen=None, duplikate=None):
+    """unlesbar: {Rolle: UnparsedCells} aus normalize_numbers; solche Zellen
+    zählen nicht als fehlend, sondern als Fehler.
+    gruppen: GroupOutliers aus outlier_groups (Standard: hier berechnet).
+    duplikate: DuplicateReport aus duplicate_check (Standard: hier berechnet)."""
+    unlesbar = unlesbar or {}
+    gruppen = gruppen if gruppen is not None else outlier_groups(df, cols)
+    duplikate = duplikate if duplikate is not None else duplicate_check(df, cols)
+    fehlend_data = []
+    for rolle, name in QUAL_SPALTEN:
+        col = cols[rolle]
+        if col and col in df.columns:
+            fehlend = df[col].isna().sum() - len(unlesbar.get(rolle, ()))
+            pct = round(fehlend / len(df) * 100, 1)
+            fehlend_data.append({
+                'Spalte': name,
+                'Fehlend': fehlend,
+                'Prozent': pct,
+                'Status': '🔴 Kritisch' if pct > 20 else ('🟡 Prüfen' if pct > 5 else '🟢 OK')
+            })
+
+    ausreisser_data = []
+    ausreisser_details = []
+    col_geb, col_ein = cols['geb'], cols['ein']
+
+    # Text statt Zahl (z. B. "ca. 45.000" oder "k.A.")
+    namen = dict(QUAL_SPALTEN)
+    for rolle, zellen in unlesbar.items():
+        ausreisser_data.append({
+            'Kategorie': f'{namen[rolle]}: keine Zahl',
+            'Anzahl': len(zellen),
+            'Status': '🔴'
+        })
+        ids = (df['Mitarbeiter_ID'].to_numpy()[zellen.pos[:3]] if 'Mitarbeiter_ID' in df.columns
+               else ['?'] * min(len(zellen), 3))
+        for mid, roh in zip(ids, zellen.roh[:3]):
+            ausreisser_details.append(f"• {mid}: {namen[rolle]} „{roh}“ ist keine Zahl")
+
+    # Alter prüfen
+    if 'Alter' in df.columns:
+        alter = df['Alter'].dropna()
+        if len(alter) > 0:
+            zu_jung = df[df['Alter'] < 16]
+            zu_alt = df[df['Alter'] > 70]
+            ausreisser_data.append({
+                'Kategorie': 'Alter < 16 Jahre',
+                'Anzahl': len(zu_jung),
+                'Status': '🔴' if len(zu_jung) > 0 else '🟢'
+            })
+            ausreisser_data.append({
+                'Kategorie': 'Alter > 70 Jahre',
+                'Anzahl': len(zu_alt),
+                'Status': '🔴' if len(zu_alt) > 0 else '🟢'
+            })
+            if len(zu_jung) > 0:
+                for _, row in zu_jung.head(5).iterrows():
+                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Alter {row['Alter']:.0f} (zu jung?)")
+            if len(zu_alt) > 0:
+                for _, row in zu_alt.head(5).iterrows():
+                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Alter {row['Alter']:.0f} (zu alt?)")
+
+    # Dienstjahre prüfen
+    if 'DJ' in df.columns:
+        dj = df['DJ'].dropna()
+        if len(dj) > 0:
+            negativ_dj = df[df['DJ'] < 0]
+            sehr_lang = df[df['DJ'] > 50]
+            ausreisser_data.append({
+                'Kategorie': 'Negative Dienstjahre',
+                'Anzahl': len(negativ_dj),
+                'Status': '🔴' if len(negativ_dj) > 0 else '🟢'
+            })
+            ausreisser_data.append({
+                'Kategorie': 'Dienstjahre > 50',
+                'Anzahl': len(sehr_lang),
+                'Status': '🟡' if len(sehr_lang) > 0 else '🟢'
+            })
+            if len(negativ_dj) > 0:
+                for _, row in negativ_dj.head(5).iterrows():
+                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['DJ']:.0f} Dienstjahre (negativ!)")
+            if len(sehr_lang) > 0:
+                for _, row in sehr_lang.head(5).iterrows():
+                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['DJ']:.0f} Dienstjahre (sehr lang)")
+
+    # Gehalt prüfen
+    if 'Gehalt' in df.columns:
+        gehalt = df['Gehalt'].dropna()
+        if len(gehalt) > 0:
+            mean_g = gehalt.mean()
+            std_g = gehalt.std()
+            sehr_niedrig = df[(df['Gehalt'] < 15000) & (df['Gehalt'].notna())]
+            sehr_hoch = df[(df['Gehalt'] > 300000) & (df['Gehalt'].notna())]
+            # Statistische Ausreißer (mehr als 3 Standardabweichungen)
+            stat_ausreisser = df[(df['Gehalt'].notna()) & ((df['Gehalt'] < mean_g - 3*std_g) | (df['Gehalt'] > mean_g + 3*std_g))]
+
+            ausreisser_data.append({
+                'Kategorie': 'Gehalt < 15.000€',
+                'Anzahl': len(sehr_niedrig),
+                'Status': '🟡' if len(sehr_niedrig) > 0 else '🟢'
+            })
+            ausreisser_data.append({
+                'Kategorie': 'Gehalt > 300.000€',
+                'Anzahl': len(sehr_hoch),
+                'Status': '🔴' if len(sehr_hoch) > 0 else '🟢'
+            })
+            ausreisser_data.append({
+                'Kategorie': 'Statistische Ausreißer (±3σ)',
+                'Anzahl': len(stat_ausreisser),
+                'Status': '🟡' if len(stat_ausreisser) > 0 else '🟢'
+            })
+            if len(sehr_niedrig) > 0:
+                for _, row in sehr_niedrig.head(3).iterrows():
+                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['Gehalt']:,.0f}€ (sehr niedrig)")
+            if len(sehr_hoch) > 0:
+                for _, row in sehr_hoch.head(3).iterrows():
+                    ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: {row['Gehalt']:,.0f}€ (sehr hoch)")
+
+    # Untypisch für die eigene Abteilung / das Level / den Standort
+    for wert, name in AUSREISSER_WERTE:
+        if wert not in gruppen.maske:
+            continue
+        anzahl = gruppen.anzahl(wert)
+        ausreisser_data.append({
+            'Kategorie': f'{name} untypisch für Gruppe',
+            'Anzahl': anzahl,
+            'Status': '🟡' if anzahl > 0 else '🟢'
+        })
+        if anzahl > 0:
+            pos = np.flatnonzero(gruppen.maske[wert])[:3]
+            ids = (df['Mitarbeiter_ID'].to_numpy()[pos] if 'Mitarbeiter_ID' in df.columns
+                   else [f'Zeile {i+1}' for i in pos])
+            for mid, text in zip(ids, gruppen.texte(wert, pos)):
+                ausreisser_details.append(f"• {mid}: {text}")
+
+    # Logik-Prüfung: Eintritt vor Geburt?
+    if col_geb and col_ein:
+        logik_fehler = df[df[col_ein] < df[col_geb]]
+        ausreisser_data.append({
+            'Kategorie': 'Eintritt vor Geburt (!)',
+            'Anzahl': len(logik_fehler),
+            'Status': '🔴' if len(logik_fehler) > 0 else '🟢'
+        })
+        if len(logik_fehler) > 0:
+            erste = logik_fehler.head(3)
+            ids = erste['Mitarbeiter_ID'] if 'Mitarbeiter_ID' in erste.columns else ['?'] * len(erste)
+            for mid, geb, ein in zip(ids, year_display(erste[col_geb]), year_display(erste[col_ein])):
+                ausreisser_details.append(f"• {mid}: Geb. {geb}, Eintritt {ein} (unmöglich!)")
+
+    # Eintritt mit unter 14?
+    if 'Alter' in df.columns and 'DJ' in df.columns:
+        zu_frueh = df[(df['Alter'] - df['DJ']) < 14]
+        ausreisser_data.append({
+            'Kategorie': 'Eintritt unter 14 Jahren',
+            'Anzahl': len(zu_frueh),
+            'Status': '🔴' if len(zu_frueh) > 0 else '🟢'
+        })
+        if len(zu_frueh) > 0:
+            for _, row in zu_frueh.head(3).iterrows():
+                eintrittsalter = row['Alter'] - row['DJ']
+                ausreisser_details.append(f"• {row.get('Mitarbeiter_ID', '?')}: Eintritt mit {eintrittsalter:.0f} Jahren (zu jung)")
+
+    # Doppelte Datensätze (zählen Köpfe, Renten und Verluste doppelt); jede Zeile in
+    # höchstens einer Kategorie, Vorrang wie DuplicateReport.texte
+    konflikt, exakt = duplikate.konflikt, duplikate.exakt & ~duplikate.konflikt
+    doppelt = [
+        ('ID mit abweichendem Geburts-/Eintrittsjahr', konflikt, '🔴'),
+        ('Exakt doppelte Zeilen', exakt, '🔴'),
+        ('Doppelte Mitarbeiter-ID', duplikate.id_mehrfach & duplikate.wiederholung & ~konflikt & ~exakt, '🔴'),
+        ('Vermutlich doppelt (ohne ID)', duplikate.ohne_id & duplikate.wiederholung & ~exakt, '🟡'),
+    ]
+    for kategorie, maske, status in doppelt:
+        anzahl = int(maske.sum())
+        ausreisser_data.append({
+            'Kategorie': kategorie,
+            'Anzahl': anzahl,
+            'Status': status if anzahl > 0 else '🟢'
+        })
+    if duplikate:
+        pos = duplikate.zeilen[:3]
+        ids = (df['Mitarbeiter_ID'].to_numpy()[pos] if 'Mitarbeiter_ID' in df.columns
+               else [f'Zeile {i+1}' for i in pos])
+        for mid, text in zip(ids, duplikate.texte(pos)):
+            ausreisser_details.append(f"• {mid}: {text}")
+
+    # Score berechnen
+    total_fehlend = sum([x['Fehlend'] for x in fehlend_data]) if fehlend_data else 0
+    max_fehlend = len(df) * len(fehlend_data) if fehlend_data else 1
+    fehlend_score = 100 - (total_fehlend / max_fehlend * 100) if max_fehlend > 0 else 100
+
+    ausreisser_count = sum([x['Anzahl'] for x in ausreisser_data if '🔴' in x['Status']]) if ausreisser_data else 0
+    ausreisser_score = max(0, 100 - (ausreisser_count / len(df) * 500)) if len(df) > 0 else 100
+
+    gesamt_score = (fehlend_score * 0.6 + ausreisser_score * 0.4)
+
+    return QualityResult(fehlend_data, ausreisser_data, ausreisser_details,
+                         fehlend_score, ausreisser_score, gesamt_score)
+
+
+def data_matrix(df, cols, jahr, nach='block', unlesbar=None, gruppen=None):
+    """Status-Matrix je Mitarbeiter und Datenfeld: 0=OK, 1=Fehlend, 2=Ausreißer.
+
+    Große Belegschaften werden zu höchstens MATRIX_MAX_ROWS Zeilen zusammengefasst.
+    Zellen mit Text statt Zahl (unlesbar) und Gruppen-Ausreißer gelten als Ausreißer.
+    """
+    gruppen = gruppen if gruppen is not None else outlier_groups(df, cols)
+    return build_matrix(df, cols, MATRIX_SPALTEN, jahr, max_zeilen=MATRIX_MAX_ROWS, nach=nach,
+                        unlesbar=unlesbar, gruppen=gruppen)
+
+
+def problem_rows(df, cols, unlesbar=None, gruppen=None, duplikate=None):
+    """Alle Datensätze mit fehlenden Feldern, Ausreißern, Logik-Fehlern, Text statt Zahl oder Duplikaten."""
+    gruppen = gruppen if gruppen is not None else outlier_groups(df, cols)
+    duplikate = duplikate if duplikate is not None else duplicate_check(df, cols)
+    return ProblemIndex(df, cols, build_rules(df, cols, MATRIX_SPALTEN, unlesbar, gruppen, duplikate))
+
+
+# ============================================
+# RENTE, TREUE, WISSENSVERLUST
+# ============================================
+def _auswahl(df, maske, *spalten):
+    """Nur die benötigten Spalten der gefilterten Zeilen (statt df[maske].copy()).
+
+    Ohne Lücken wird gar nicht gefiltert; neue Spalten legt Copy-on-Write
+    nur im Ergebnis an.
+    """
+    spalten = [c for c in spalten if c]
+    return df[spalten] if maske.all() else df.loc[maske, spalten]
+
+
+def retirement_sweep(df, cols, jahr, rentenalter=RENTENALTER_SPANNE, cube=None):
+    """Rentenwelle für alle Rentenalter auf einmal.
+
+    Die Rentenalter werden gegen die Altersstufen des Würfels gebroadcastet
+    (Matrix Rentenalter × Alter mit JbR = Rentenalter - Alter); jede Kennzahl
+    ist danach eine gewichtete Summe über die Altersachse.
+    """
+    if 'Alter' not in df.columns:
+        return None
+    cube = cube if cube is not None else build_cube(df, cols)
+    g = cube.gruppiert('alter')
+    if len(g) == 0:
+        return None
+    ra = np.asarray(rentenalter, dtype='float64')
+    stufen = g.index.to_numpy(dtype='float64')
+    anz = g['anzahl'].to_numpy()
+    jbr = ra[:, None] - stufen[None, :]                    # Rentenalter × Alter
+    zeilen = pd.Index(np.asarray(rentenalter), name='Rentenalter')
+
+    # Anzahl mit JbR <= Schwelle, für alle Schwellen in einem Schritt
+    schwellen = np.union1d(np.arange(1, 11), RENTE_KATEGORIEN)
+    bis = (jbr[:, :, None] <= schwellen).astype(np.int64).transpose(0, 2, 1) @ anz
+    bis = pd.DataFrame(bis, index=zeilen, columns=schwellen)
+    kat = bis[RENTE_KATEGORIEN[1:]].to_numpy() - bis[RENTE_KATEGORIEN[:-1]].to_numpy()
+
+    # Renteneintritte je Rentenjahr (RJ = Jahr + JbR, exakt wie in retirement()) der
+    # nächsten 15 Jahre; bei ganzen Jahren sind die Spalten genau jahr..jahr+15
+    im_fenster = (jbr >= 0) & (jbr <= 15)
+    zeile, spalte = np.nonzero(im_fenster)
+    rj = jahr + jbr[zeile, spalte]
+    jahre = np.union1d(np.arange(jahr, jahr + 16, dtype='float64'), rj)
+    welle = np.zeros((len(ra), len(jahre)), dtype=np.int64)
+    np.add.at(welle, (zeile, np.searchsorted(jahre, rj)), anz[spalte])
+
+    res = RetirementSweep(
+        jahr=jahr,
+        rentenalter=list(zeilen),
+        anzahl=int(anz.sum()),
+        welle=pd.DataFrame(welle, index=zeilen,
+                           columns=pd.Index(jahre.astype(np.int64) if (jahre == np.floor(jahre)).all() else jahre,
+                                            name='RJ')),
+        kumuliert=bis[list(range(1, 11))].set_axis(range(1, 11), axis=1),
+        kategorien=pd.DataFrame(kat, index=zeilen,
+                                columns=pd.CategoricalIndex(RENTE_KAT_NAMEN, categories=RENTE_KAT_NAMEN,
+                                                            ordered=True, name='Kat')),
+        alter=histogram(df['Alter'].to_numpy(dtype='float64', na_value=np.nan)),
+    )
+
+    col_abt = cols['abt']
+    if col_abt:
+        ga = cube.gruppiert('abt')
+        ga = ga[ga['n_alter'] > 0].rename_axis(col_abt)
+        res.alter_abteilung = (ga['summe_alter'] / ga['n_alter']).rename('Alter').sort_values()
+        # Abgänge in 5 Jahren: Rentenalter × (Abteilung, Alter) -> je Abteilung summiert
+        gz = cube.gruppiert(['abt', 'alter'])
+        abt = ga.index.get_indexer(gz.index.get_level_values('abt'))
+        alter = gz.index.get_level_values('alter').to_numpy(dtype='float64')
+        geht = (alter[None, :] >= ra[:, None] - 5) * gz['anzahl'].to_numpy()
+        ok = abt >= 0
+        ab5 = np.zeros((len(ra), len(ga)), dtype=np.int64)
+        np.add.at(ab5, (slice(None), abt[ok]), geht[:, ok])
+        res.abgang_abteilung = pd.DataFrame(ab5 / ga['n_alter'].to_numpy() * 100, index=zeilen,
+                                            columns=ga.index)
+    return res
+
+
+def retirement(df, cols, rentenalter, jahr, cube=None):
+    """Rentenwelle für ein Rentenalter (Spanne mit nur diesem Wert)."""
+    sweep = retirement_sweep(df, cols, jahr, [rentenalter], cube)
+    return sweep.ergebnis(rentenalter) if sweep is not None else None
+
+
+def tenure(df, cols, cube=None):
+    if 'DJ' not in df.columns:
+        return None
+    d = _auswahl(df, df['DJ'].notna(), 'DJ', cols['abt'])
+    if len(d) == 0:
+        return None
+    d['Gr'] = pd.cut(d['DJ'], DJ_GRUPPEN, labels=DJ_GRUPPEN_NAMEN)
+
+    # Jubiläum = DJ in [j-0.5, j+0.5): ein searchsorted über alle Grenzen,
+    # die Fenster liegen in den ungeraden Fächern
+    grenzen = np.ravel([[j - 0.5, j + 0.5] for j in JUBILAEEN])
+    fach = np.searchsorted(grenzen, d['DJ'].to_numpy(), side='right')
+    jubi = pd.Series(np.bincount(fach, minlength=len(grenzen) + 1)[1::2],
+                     index=[f'{j} Jahre' for j in JUBILAEEN])
+
+    res = TenureResult(
+        anzahl=len(d),
+        lang=len(d[d['DJ']>=20]),
+        dj=histogram(d['DJ'].to_numpy(dtype='float64')),
+        gruppen=d['Gr'].value_counts(),
+        jubilaeen=jubi,
+    )
+
+    col_abt = cols['abt']
+    if col_abt:
+        cube = cube if cube is not None else build_cube(df, cols)
+        g = cube.gruppiert('abt')
+        g = g[g['n_dj'] > 0].rename_axis(col_abt)
+        res.dj_abteilung = (g['summe_dj'] / g['n_dj']).rename('DJ').sort_values()
+    return res
+
+
+def knowledge_loss(df, rentenalter, jahr, cols=None, modell=None):
+    """Risikoklasse je Mitarbeiter nach hr_risk.RiskModel, komplett auf Arrays.
+
+    cols wird nur für Level-Gewichte und knappe Positionen gebraucht.
+    """
+    if 'Alter' not in df.columns or 'DJ' not in df.columns:
+        return None
+    modell = modell or RiskModel()
+    alter = df['Alter'].to_numpy(dtype='float64', na_value=np.nan)
+    dj = df['DJ'].to_numpy(dtype='float64', na_value=np.nan)
+    hat = ~np.isnan(alter) & ~np.isnan(dj)
+    if not hat.any():
+        return None
+    gewicht = modell.gewichte(df, cols) if cols else None
+    jbr, dj = rentenalter - alter[hat], dj[hat]
+    klasse = modell.klassen(dj, jbr, None if gewicht is None else gewicht[hat])
+
+    punkte = {}
+    for code, name in enumerate(KLASSEN):
+        m = klasse == code
+        if m.any():
+            # gleiche (JbR, DJ) zu einer Zelle mit Anzahl zusammenfassen
+            zellen, anzahl = np.unique(np.column_stack([jbr[m], dj[m]]), axis=0, return_counts=True)
+            punkte[name] = (zellen[:, 0], zellen[:, 1], anzahl)
+
+    # Verlust je Rentenjahr (RJ = Jahr + JbR) als eine gruppierte Summe
+    fenster = (jbr >= 0) & (jbr <= 10) & (jbr == np.floor(jbr))
+    verlust = np.bincount(jbr[fenster].astype(np.int64), weights=dj[fenster], minlength=11)
+
+    return KnowledgeLossResult(
+        anzahl=int(hat.sum()),
+        krit=int((klasse == KRITISCH).sum()),
+        warn=int((klasse == WARNUNG).sum()),
+        verl5=float(dj[jbr <= 5].sum()),
+        punkte=punkte,
+        verlust={jahr + i: float(v) for i, v in enumerate(verlust)},
+        dj_summe=float(dj.sum()),
+    )
+
+
+# ============================================
+# KARRIERE & VERTEILUNGEN
+# ============================================
+def career(df, cols, mindestanteil=KARRIERE_MINDESTANTEIL):
+    col_ein_pos, col_akt_pos = cols['ein_pos'], cols['akt_pos']
+    res = CareerResult(beispiele=[], sankey=career_flow(df, cols, mindestanteil))
+
+    # Beispiele (mindestens 5 Jahre dabei): nur die ersten 10 Treffer holen
+    if col_ein_pos and col_akt_pos and 'DJ' in df.columns:
+        maske = df[col_ein_pos].notna() & df[col_akt_pos].notna() & (df['DJ'] >= 5)
+        d = df.iloc[np.flatnonzero(maske.to_numpy())[:10]]
+        for von, nach, dj in zip(d[col_ein_pos], d[col_akt_pos], d['DJ']):
+            res.beispiele.append((von, nach, int(dj)))
+
+    if not res.beispiele and res.sankey is None:
+        return None
+    return res
+
+
+def _stufe_codes(s, mindestanteil):
+    """Knoten einer Sankey-Stufe: Code je Zeile (-1 = fehlt), Namen und ob
+    der letzte Knoten SONSTIGE ist.
+
+    Knoten sind nach Häufigkeit sortiert; Ausprägungen unter mindestanteil
+    (Anteil an den Zeilen mit Wert) werden zu SONSTIGE zusammengefasst,
+    sobald es mindestens zwei davon gibt.
+    """
+    codes, werte = pd.factorize(s, sort=True)
+    anzahl = np.bincount(codes[codes >= 0], minlength=len(werte))
+    selten = (anzahl > 0) & (anzahl < mindestanteil * anzahl.sum())
+    if selten.sum() < 2:
+        selten[:] = False
+    haeufig = np.flatnonzero((anzahl > 0) & ~selten)
+    haeufig = haeufig[np.argsort(-anzahl[haeufig], kind='stable')]
+
+    neu = np.full(len(werte) + 1, -1, dtype=np.int64)   # letzter Eintrag fängt Code -1 ab
+    neu[haeufig] = np.arange(len(haeufig))
+    namen = [str(werte[i]) for i in haeufig]
+    if selten.any():
+        neu[np.flatnonzero(selten)] = len(namen)
+        namen.append(SONSTIGE)
+    return neu[codes], namen, bool(selten.any())
+
+
+def career_flow(df, cols, mindestanteil=KARRIERE_MINDESTANTEIL):
+    """Sankey über alle vorhandenen KARRIERE_STUFEN (mindestens zwei; eine
+    Spalte, die schon eine frühere Stufe bildet, wird übersprungen).
+
+    Jede Stufe bekommt einen Block fortlaufender Knotennummern; alle
+    Übergänge benachbarter Stufen werden als ein Schlüssel Quelle*K+Ziel
+    gemeinsam gezählt. Zeilen ohne Wert an einem Ende fehlen nur in diesem
+    Übergang.
+    """
+    stufen, belegt = [], set()
+    for rolle, titel in KARRIERE_STUFEN:
+        if cols[rolle] and cols[rolle] not in belegt:
+            stufen.append((rolle, titel))
+            belegt.add(cols[rolle])
+    if len(stufen) < 2:
+        return None
+
+    knoten, nodes, farben = [], [], []
+    for rolle, _ in stufen:
+        codes, namen, sonstige = _stufe_codes(df[cols[rolle]], mindestanteil)
+        knoten.append(np.where(codes >= 0, codes + len(nodes), -1))
+        farben += [KARRIERE_FARBEN[rolle]] * (len(namen) - sonstige) + [SONSTIGE_FARBE] * sonstige
+        nodes += namen
+
+    k = len(nodes)
+    schluessel = np.concatenate([(von * k + nach)[(von >= 0) & (nach >= 0)]
+                                 for von, nach in zip(knoten, knoten[1:])])
+    paare, anzahl = np.unique(schluessel, return_counts=True)
+    if len(paare) == 0:
+        return None
+    return {
+        'stufen': [titel for _, titel in stufen],
+        'nodes': nodes,
+        'farben': farben,
+        'source': (paare // k).tolist(),
+        'target': (paare % k).tolist(),
+        'value': anzahl.tolist(),
+    }
+
+
+def _haeufigkeiten(s):
+    """value_counts(); bei Kategorien mit Gleichständen in der Reihenfolge
+    des ersten Auftretens (wie bei Text-Spalten) statt der Kategorie-Reihenfolge."""
+    if s.dtype != 'category':
+        return s.value_counts()
+    codes = s.cat.codes.to_numpy()
+    vorhanden, erstes, anzahl = np.unique(codes[codes >= 0], return_index=True, return_counts=True)
+    reihenfolge = np.lexsort((erstes, -anzahl))
+    index = pd.Index(s.cat.categories[vorhanden[reihenfolge]], name=s.name)
+    return pd.Series(anzahl[reihenfolge], index=index, name='count')
+
+
+def distributions(df, cols, cube=None):
+    res = DistributionResult()
+    cube = cube if cube is not None else build_cube(df, cols)
+    if cols['ges']:
+        res.geschlecht = cube.haeufigkeiten('ges', cols['ges'])
+    if cols['abt']:
+        res.abteilungen = cube.haeufigkeiten('abt', cols['abt'])
+    if cols['lvl']:
+        res.level = cube.haeufigkeiten('lvl', cols['lvl'])
+    if cols['az']:
+        res.arbeitszeit = _haeufigkeiten(df[cols['az']])
+    if 'Gehalt' in df.columns:
+        g = df['Gehalt'].to_numpy(dtype='float64', na_value=np.nan)
+        if np.isfinite(g).any():
+            res.gehalt = histogram(g)
+    if cols['ort']:
+        res.standorte = cube.haeufigkeiten('ort', cols['ort'])
+    return res
+
+
+def benchmark(df, cols, region, cube=None):
+    if region not in BENCHMARK:
+        return None
+
+    b = BENCHMARK[region]
+    kat, u, bm = [], [], []
+
+    if 'Alter' in df.columns:
+        a = df['Alter'].mean()
+        if not pd.isna(a):
+            kat.append('Durchschnittsalter')
+            u.append(round(float(a),1))
+            bm.append(b['alter'])
+
+    if cols['ges']:
+        cube = cube if cube is not None else build_cube(df, cols)
+        g = cube.haeufigkeiten('ges')
+        g = g / g.sum() * 100
+        f = sum(float(v) for k,v in g.items() if str(k).lower() in ['w','weiblich'])
+        kat.append('Frauenanteil %')
+        u.append(round(f,1))
+        bm.append(b['frauen'])
+
+    if cols['az']:
+        a = df[cols['az']].value_counts(normalize=True)*100
+        t = sum(float(v) for k,v in a.items() if 'teil' in str(k).lower())
+        kat.append('Teilzeitquote %')
+        u.append(round(t,1))
+        bm.append(b['teilzeit'])
+
+    if 'Gehalt' in df.columns:
+        a = df['Gehalt'].mean()
+        if not pd.isna(a):
+            kat.append('Monatsgehalt €')
+            u.append(round(float(a)/12,0))
+            bm.append(b['gehalt'])
+
+    return BenchmarkResult(region, kat, u, bm)
+
+
+# ============================================
+# GESAMTANALYSE
+# ============================================
+def prepare(df, jahr=None, cols=None):
+    """Einmalige Vorbereitung: leere Zeilen, Spaltenerkennung, Zahlen, Alter/DJ/Gehalt.
+
+    Unabhängig von Rentenalter und Region, daher gut zwischenzuspeichern.
+    cols: feste Zuordnung Rolle -> Spalte statt der Erkennung.
+    """
+    df = df.dropna(how='all')
+    jahr = jahr or datetime.now().year
+    if cols is None:
+        cols = find_columns(df.columns)
+    else:
+        cols = {rolle: cols.get(rolle) if cols.get(rolle) in df.columns else None for rolle in SUCHBEGRIFFE}
+    df, unlesbar = normalize_numbers(df, cols)
+    df = compact_dtypes(derive_columns(df, cols, jahr), cols)
+    return PreparedData(df, cols, jahr, build_cube(df, cols), unlesbar)
+
+
+def subset_prep(prep, maske):
+    """PreparedData nur für df[maske] (bool-Array): Würfel neu, unlesbare Zellen umgezählt.
+
+    Spaltenerkennung und Ableitungen bleiben; Kategorien ohne Zeile fallen weg.
+    """
+    df = prep.df[maske]
+    df = df.assign(**{c: df[c].cat.remove_unused_categories()
+                      for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    unlesbar = {r: z.auswahl(maske) for r, z in prep.unlesbar.items()}
+    return PreparedData(df, prep.cols, prep.jahr, build_cube(df, prep.cols),
+                        {r: z for r, z in unlesbar.items() if len(z)})
+
+
+def analyze_base(prep, messung=None):
+    """Alle Abschnitte, die weder vom Rentenalter noch von der Region abhängen.
+
+    messung: optionale hr_perf.Messung, erfasst die Zeit je Abschnitt.
+    """
+    df, cols, jahr = prep.df, prep.cols, prep.jahr
+    if len(df) == 0:
+        raise ValueError("Die Datei enthält keine Mitarbeiterdaten.")
+    n = len(df)
+
+    res = AnalysisResult(jahr=jahr, rentenalter=None, region=None, cols=cols, n=n)
+    if 'Alter' in df.columns:
+        res.alter_mean = df['Alter'].mean()
+    if 'DJ' in df.columns:
+        res.dj_mean = df['DJ'].mean()
+    if 'Gehalt' in df.columns:
+        res.gehalt_mean = df['Gehalt'].mean()
+
+    with abschnitt(messung, 'Rentenalter-Vergleich', n):
+        res.rente_vergleich = retirement_sweep(df, cols, jahr, cube=prep.cube)
+    with abschnitt(messung, 'Datenqualität', n):
+        gruppen = outlier_groups(df, cols)
+        res.duplikate = duplicate_check(df, cols)
+        res.qualitaet = quality_check(df, cols, prep.unlesbar, gruppen, res.duplikate)
+    with abschnitt(messung, 'Daten-Matrix', n):
+        res.matrix = data_matrix(df, cols, jahr, unlesbar=prep.unlesbar, gruppen=gruppen)
+        res.probleme = problem_rows(df, cols, prep.unlesbar, gruppen, res.duplikate)
+    with abschnitt(messung, 'Dienstjahre', n):
+        res.treue = tenure(df, cols, prep.cube)
+    with abschnitt(messung, 'Karriere', n):
+        res.karriere = career(df, cols)
+    with abschnitt(messung, 'Weitere Auswertungen', n):
+        res.verteilung = distributions(df, cols, prep.cube)
+    return res
+
+
+def analyze_retirement(prep, rentenalter, messung=None, modell=None, sweep=None):
+    """Rentenabhängige Abschnitte (JbR, RJ, Kat, Risikoklasse R).
+
+    modell: hr_risk.RiskModel für den Wissensverlust (Standard: feste Schwellen).
+    sweep: RetirementSweep aus analyze_base; liegt das Rentenalter in seiner
+    Spanne, wird die Rentenwelle nur nachgeschlagen.
+    """
+    n = len(prep.df)
+    with abschnitt(messung, 'Rente', n):
+        if sweep is not None and rentenalter in sweep:
+            rente = sweep.ergebnis(rentenalter)
+        else:
+            rente = retirement(prep.df, prep.cols, rentenalter, prep.jahr, prep.cube)
+    with abschnitt(messung, 'Wissensverlust', n):
+        wissen = knowledge_loss(prep.df, rentenalter, prep.jahr, prep.cols, modell)
+    return rente, wissen
+
+
+def combine(basis, prep, rentenalter, region, rente_wissen=None, messung=None, modell=None):
+    """Setzt Basis-Ergebnis, Rentenabschnitte und Benchmark zusammen."""
+    rente, wissen = rente_wissen or analyze_retirement(prep, rentenalter, messung, modell,
+                                                       basis.rente_vergleich)
+    with abschnitt(messung, 'Benchmark', len(prep.df)):
+        bmk = benchmark(prep.df, prep.cols, region, prep.cube)
+    return replace(basis, rentenalter=rentenalter, region=region, rente=rente, wissen=wissen,
+                   benchmark=bmk)
+
+
+def analyze(df, rentenalter=67, region='Deutschland', jahr=None, messung=None, modell=None):
+    """Führt die komplette Analyse aus und liefert ein AnalysisResult."""
+    with abschnitt(messung, 'Vorbereitung', len(df)):
+        prep = prepare(df, jahr)
+    return combine(analyze_base(prep, messung), prep, rentenalter, region, messung=messung, modell=modell)
@@ -0,0 +1,144 @@
+"""Ereignis-Index für Jubiläen und Renteneintritte mit Bereichsabfragen.
+
+Jubiläums- und Rentenjahre sind feste Versätze von Eintritts- bzw.
+Geburtsjahr:
+
+    Jubiläum s  = Eintrittsjahr + s     (s = 5, 10, ..., 40)
+    Renteneintritt = Geburtsjahr + Rentenalter
+
+Der Index speichert daher jeden Mitarbeiter einmal je Art, sortiert nach
+(Abteilung, Basisjahr) als int64-Schlüssel. "Wer hat zwischen 2027 und 2030
+ein Ereignis, je Abteilung?" sind zwei np.searchsorted-Aufrufe über alle
+Abteilungen und Versätze zugleich, unabhängig vom Rentenalter. Gezählt werden
+nur kommende Ereignisse (ab dem Stichjahr).
+"""
+import numpy as np
+import pandas as pd
+
+from hr_engine import department_codes
+from hr_numbers import year_display
+
+JUBILAEUMS_STUFEN = (5, 10, 15, 20, 25, 30, 35, 40)
+RENTE = 'Rente'
+_VERSATZ = 2**31               # Basisjahr als nicht-negativer 32-Bit-Teil des Schlüssels
+
+
+class _Sortiert:
+    """Zeilenpositionen sortiert nach (Abteilung, Basisjahr)."""
+
+    def __init__(self, abt, jahre):
+        gueltig = ~np.isnan(jahre) & (np.abs(jahre) < 2**30)
+        zeilen = np.flatnonzero(gueltig)
+        basis = np.floor(jahre[gueltig]).astype(np.int64)
+        schluessel = (abt[gueltig] << 32) | (basis + _VERSATZ)
+        reihenfolge = np.argsort(schluessel, kind='stable')   # gleicher Schlüssel: Dateireihenfolge
+        self.schluessel = schluessel[reihenfolge]
+        self.zeilen = zeilen[reihenfolge]
+        self.basis = basis[reihenfolge]
+
+    def grenzen(self, abt, von, bis):
+        """Positionen [lo, hi) je Abteilung (Array) für Basisjahre in [von, bis]."""
+        lo = np.searchsorted(self.schluessel, (abt << 32) + (von + _VERSATZ), side='left')
+        hi = np.searchsorted(self.schluessel, (abt << 32) + (bis + _VERSATZ), side='right')
+        return lo, np.maximum(hi, lo)
+
+
+def _positionen(lo, hi):
+    """Alle Positionen der Bereiche [lo, hi) hintereinander."""
+    laengen = hi - lo
+    return np.repeat(lo - np.cumsum(laengen) + laengen, laengen) + np.arange(laengen.sum())
+
+
+class EventIndex:
+    """Kommende Jubiläen und Renteneintritte je Abteilung (siehe Moduldoku)."""
+
+    def __init__(self, df, cols, jahr):
+        self.df = df
+        self.cols = cols
+        self.jahr = jahr
+        abt, self.abteilungen = department_codes(df, cols)
+
+        def jahre(rolle):
+            col = cols[rolle]
+            if not col:
+                return np.full(len(df), np.nan)
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+        self._eintritt = _Sortiert(abt, jahre('ein'))
+        self._geburt = _Sortiert(abt, jahre('geb'))
+
+    def _arten(self, rentenalter, arten=None):
+        """(Name, sortierter Index, Versatz) je Ereignisart."""
+        alle = [(f'{s} Jahre', self._eintritt, s) for s in JUBILAEUMS_STUFEN]
+        alle.append((RENTE, self._geburt, rentenalter))
+        return [a for a in alle if arten is None or a[0] in arten]
+
+    def _abfrage(self, von, bis, rentenalter, arten=None, abteilungen=None):
+        """Je Art: Name, Index, Versatz und Grenzen [lo, hi) je ausgewählter Abteilung."""
+        von = max(von, self.jahr)
+        abt = np.arange(len(self.abteilungen), dtype=np.int64)
+        if abteilungen is not None:
+            abt = abt[np.isin(self.abteilungen, list(abteilungen))]
+        for name, index, versatz in self._arten(rentenalter, arten):
+            lo, hi = index.grenzen(abt, von - versatz, bis - versatz)
+            yield name, index, versatz, abt, lo, hi
+
+    def anzahl(self, von, bis, rentenalter, arten=None):
+        """Anzahl Ereignisse mit Jahr in [von, bis] je Abteilung (Zeilen) und Art (Spalten)."""
+        spalten = {name: hi - lo for name, _, _, _, lo, hi in self._abfrage(von, bis, rentenalter, arten)}
+        return pd.DataFrame(spalten, index=pd.Index(self.abteilungen, name='Abteilung'))
+
+    def pro_jahr(self, von, bis, rentenalter, arten=None, abteilungen=None):
+        """Jubiläen und Renteneintritte je Jahr in [von, bis]."""
+        start = max(von, self.jahr)
+        jahre = np.arange(start, bis + 1)
+        jubi, rente = np.zeros(len(jahre), dtype=np.int64), np.zeros(len(jahre), dtype=np.int64)
+        for name, index, versatz, _, lo, hi in self._abfrage(von, bis, rentenalter, arten, abteilungen):
+            pos = _positionen(lo, hi)
+            anz = np.bincount(index.basis[pos] + versatz - start, minlength=len(jahre))[:len(jahre)]
+            if name == RENTE:
+                rente += anz
+            else:
+                jubi += anz
+        return pd.DataFrame({'Jubiläum': jubi, 'Rente': rente}, index=pd.Index(jahre, name='Jahr'))
+
+    def kalender(self, von, bis, rentenalter, arten=None, abteilungen=None, limit=None):
+        """Liste der betroffenen Mitarbeiter, sortiert nach Jahr, Ereignis und Abteilung.
+
+        limit: nur die ersten Einträge. Jeder Abschnitt (Art, Abteilung) ist
+        schon nach Jahr sortiert, es genügen also seine ersten limit Einträge.
+        """
+        teile = []
+        for name, index, versatz, abt, lo, hi in self._abfrage(von, bis, rentenalter, arten, abteilungen):
+            if limit is not None:
+                hi = np.minimum(hi, lo + limit)
+            laengen = hi - lo
+            if laengen.sum() == 0:
+                continue
+            pos = _positionen(lo, hi)
+            teile.append(pd.DataFrame({
+                'Jahr': index.basis[pos] + versatz,
+                'Ereignis': 'Renteneintritt' if name == RENTE else f'{name} im Unternehmen',
+                '_rang': len(JUBILAEUMS_STUFEN) if name == RENTE else JUBILAEUMS_STUFEN.index(versatz),
+                'Abteilung': np.repeat(np.asarray(self.abteilungen, dtype=object)[abt], laengen),
+                '_zeile': index.zeilen[pos],
+            }))
+        if not teile:
+            return pd.DataFrame(columns=['Jahr', 'Ereignis', 'ID', 'Abteilung', 'Geburtsjahr', 'Eintrittsjahr'])
+        k = pd.concat(teile, ignore_index=True).sort_values(['Jahr', '_rang', 'Abteilung', '_zeile'],
+                                                            kind='stable', ignore_index=True)
+        if limit is not None:
+            k = k.iloc[:limit]
+        zeilen = k['_zeile'].to_numpy()
+        df = self.df
+        if 'Mitarbeiter_ID' in df.columns:
+            k.insert(2, 'ID', df['Mitarbeiter_ID'].iloc[zeilen].to_numpy())
+        else:
+            k.insert(2, 'ID', [f'Zeile {i+1}' for i in df.index[zeilen]])
+        for rolle, titel in (('geb', 'Geburtsjahr'), ('ein', 'Eintrittsjahr')):
+            col = self.cols[rolle]
+            k[titel] = year_display(df[col].iloc[zeilen]) if col else '-'
+        return k.drop(columns=['_rang', '_zeile'])
+
+    def csv(self, von, bis, rentenalter, arten=None, abteilungen=None):
+        return self.kalender(von, bis, rentenalter, arten, abteilungen).to_csv(index=False).encode('utf-8')
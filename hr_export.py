@@ -0,0 +1,36 @@
+"""Export aller Diagramme als ZIP.
+
+plotly.js liegt genau einmal im ZIP (plotly.min.js); jede Diagramm-Datei und
+der Gesamtbericht bericht.html binden es per <script src> ein. Das HTML wird
+erst erzeugt, wenn der Download angefordert wird.
+"""
+import html
+import io
+import zipfile
+
+from plotly.offline import get_plotlyjs
+
+PLOTLY_JS = 'plotly.min.js'
+BERICHT = 'bericht.html'
+
+
+def report_html(charts, titel="HR Analyse", include_plotlyjs=PLOTLY_JS):
+    """Alle Diagramme untereinander in einer HTML-Seite."""
+    teile = []
+    for i, (name, fig) in enumerate(charts):
+        teile.append(f"<h2>{html.escape(name.rsplit('.', 1)[0].replace('_', ' '))}</h2>")
+        teile.append(fig.to_html(full_html=False, include_plotlyjs=include_plotlyjs if i == 0 else False))
+    return (f"<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>{html.escape(titel)}</title></head>\n"
+            f"<body style=\"font-family: sans-serif\">\n<h1>{html.escape(titel)}</h1>\n"
+            + "\n".join(teile) + "\n</body>\n</html>\n")
+
+
+def charts_zip(charts, titel="HR Analyse"):
+    """ZIP mit plotly.min.js, einer HTML-Datei je Diagramm und bericht.html."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(PLOTLY_JS, get_plotlyjs())
+        for name, fig in charts:
+            zf.writestr(name, fig.to_html(include_plotlyjs=PLOTLY_JS))
+        zf.writestr(BERICHT, report_html(charts, titel))
+    return buffer.getvalue()
@@ -0,0 +1,92 @@
+"""Globale Filter nach Abteilung, Standort, Level und Geschlecht.
+
+Je Datei wird einmal ein Gruppen-Index gebaut: für jede Filter-Rolle die
+Zeilenpositionen je Ausprägung als sortiertes Array (ein stabiles argsort
+über die Codes, dann an den Gruppengrenzen geteilt). Ein Filter vereinigt
+je Rolle die Arrays der gewählten Ausprägungen und schneidet sie über die
+Rollen; nur für diese Zeilen wird eine PreparedData gebaut (mit eigenem
+Würfel), alle Abschnitte rechnen danach über die Teilmenge.
+
+    index = build_group_index(prep.df, prep.cols)
+    auswahl = filter_key({'abt': ['Vertrieb'], 'ort': ['Hamburg', 'Berlin']})
+    teil = subset_prep(prep, index.maske(auswahl))
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Rolle -> Beschriftung, in der Reihenfolge der Filterleiste
+FILTER_ROLLEN = {'abt': 'Abteilung', 'ort': 'Standort', 'lvl': 'Karrierelevel', 'ges': 'Geschlecht'}
+
+
+@dataclass
+class GroupIndex:
+    n: int                   # Zeilen insgesamt
+    werte: dict              # Rolle -> Ausprägungen (sortiert, ohne fehlende)
+    positionen: dict         # Rolle -> [aufsteigende Zeilenpositionen je Ausprägung]
+
+    def zeilen(self, auswahl):
+        """Aufsteigende Zeilenpositionen, die in jeder gewählten Rolle passen; None = kein Filter.
+
+        auswahl: Rolle -> Ausprägungen (oder filter_key()); Rollen ohne
+        Auswahl filtern nicht. Eine Auswahl ohne bekannte Ausprägung (oder
+        für eine Rolle ohne Index) passt auf keine Zeile.
+        """
+        mengen = []
+        for rolle, gewaehlt in dict(auswahl).items():
+            if not len(gewaehlt):
+                continue
+            if rolle not in self.werte:
+                return np.zeros(0, dtype=np.int64)
+            pos = self.werte[rolle].get_indexer(list(gewaehlt))
+            teile = [self.positionen[rolle][i] for i in pos[pos >= 0]]
+            if not teile:
+                return np.zeros(0, dtype=np.int64)
+            # Ausprägungen einer Rolle sind disjunkt: Vereinigung = sortierte Verkettung
+            mengen.append(teile[0] if len(teile) == 1 else np.sort(np.concatenate(teile)))
+        if not mengen:
+            return None
+        mengen.sort(key=len)
+        zeilen = mengen[0]
+        for m in mengen[1:]:
+            zeilen = np.intersect1d(zeilen, m, assume_unique=True)
+        return zeilen
+
+    def maske(self, auswahl):
+        """Wie zeilen(), aber als bool-Array über alle Zeilen (None = kein Filter)."""
+        zeilen = self.zeilen(auswahl)
+        if zeilen is None:
+            return None
+        maske = np.zeros(self.n, dtype=bool)
+        maske[zeilen] = True
+        return maske
+
+
+def build_group_index(df, cols):
+    """Zeilenpositionen je Ausprägung für alle zugeordneten FILTER_ROLLEN."""
+    werte, positionen = {}, {}
+    for rolle in FILTER_ROLLEN:
+        spalte = cols.get(rolle)
+        if not spalte or spalte not in df.columns:
+            continue
+        codes, namen = pd.factorize(df[spalte], sort=True)
+        if isinstance(namen, pd.Categorical):
+            namen = np.asarray(namen)
+        reihenfolge = np.argsort(codes, kind='stable')
+        reihenfolge = reihenfolge[codes[reihenfolge] >= 0]
+        grenzen = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(namen)))[:-1]
+        werte[rolle] = pd.Index(namen)
+        positionen[rolle] = np.split(reihenfolge.astype(np.int64), grenzen)
+    return GroupIndex(len(df), werte, positionen)
+
+
+def filter_key(auswahl):
+    """Hashbare, geordnete Form einer Auswahl (leere Rollen fallen weg), z. B. als Cache-Schlüssel."""
+    return tuple((rolle, tuple(sorted(auswahl[rolle], key=str)))
+                 for rolle in FILTER_ROLLEN if auswahl.get(rolle))
+
+
+def filter_text(auswahl):
+    """'Abteilung: IT, Vertrieb · Standort: Hamburg'"""
+    return " · ".join(f"{FILTER_ROLLEN[rolle]}: {', '.join(map(str, werte))}" for rolle, werte in dict(auswahl).items())
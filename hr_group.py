@@ -0,0 +1,168 @@
+"""Konzern-Konsolidierung: mehrere Arbeitsmappen (oder ein ZIP davon) als ein Bestand.
+
+Jede Gesellschaft schickt ihre eigene Kopie der Vorlage, die Spaltenköpfe
+weichen dabei leicht ab. Jede Datei wird daher einzeln zugeordnet (erkannt
+oder wie für ihren Aufbau gespeichert, siehe hr_mapping) und auf die
+Spaltennamen der Vorlage umbenannt; die Spalte GESELLSCHAFT hält
+fest, woher eine Zeile stammt. Eingelesen wird parallel in einem
+Thread-Pool (Excel-/Parquet-Leser geben das GIL frei, und ein Fork aus dem
+Server mit seinen Threads entfällt), analysiert wird danach einmal über
+alle Zeilen.
+
+    dateien = upload_members('konzern.zip', inhalt)
+    df = read_group(dateien)
+    prep = prepare(df, jahr)
+    teil = entity_prep(prep, 'Werk Nord')
+"""
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+
+import numpy as np
+import pandas as pd
+
+from hr_cache import content_hash
+from hr_engine import ZAHL_ROLLEN, find_columns, read_upload, subset_prep
+from hr_ingest import ENDUNGEN
+from hr_numbers import parse_numbers
+
+GESELLSCHAFT = 'Gesellschaft'
+ID_SPALTE = 'Mitarbeiter_ID'
+LESE_THREADS = 4   # Dateien, die gleichzeitig eingelesen werden
+
+# Rolle -> Spaltenname der Vorlage (Reihenfolge wie in der Vorlage)
+VORLAGE = {
+    'geb': 'Geburtsjahr',
+    'ein': 'Eintrittsjahr',
+    'ges': 'Geschlecht',
+    'abt': 'Abteilung',
+    'ein_pos': 'Einstiegsposition',
+    'akt_pos': 'Aktuelle_Position',
+    'lvl': 'Karrierelevel',
+    'geh': 'Gehalt_Brutto_Jahr',
+    'az': 'Arbeitszeit',
+    'ort': 'Standort',
+}
+
+
+def upload_members(name, inhalt):
+    """[(Dateiname, Bytes)] eines Uploads; ein ZIP liefert alle unterstützten Dateien darin."""
+    if Path(name).suffix.lower() != '.zip':
+        return [(name, inhalt)]
+    dateien = []
+    with zipfile.ZipFile(io.BytesIO(inhalt)) as z:
+        for info in z.infolist():
+            pfad = PurePosixPath(info.filename)
+            if (info.is_dir() or pfad.suffix.lower() not in ENDUNGEN
+                    or pfad.name.startswith(('~$', '.')) or '__MACOSX' in pfad.parts):
+                continue
+            dateien.append((info.filename, z.read(info)))
+    if not dateien:
+        raise ValueError(f"{name} enthält keine Excel-, CSV- oder Parquet-Dateien")
+    return dateien
+
+
+def group_hash(dateien):
+    """Inhalts-Hash über alle Dateien samt Namen (die Namen werden zu Gesellschaften)."""
+    return content_hash(b''.join(f"{name}\0{content_hash(inhalt)}\0".encode() for name, inhalt in dateien))
+
+
+def entity_names(namen):
+    """Gesellschaft je Datei: Dateiname ohne Endung, bei Gleichstand mit Zähler."""
+    vergeben, ergebnis = {}, []
+    for name in namen:
+        basis = PurePosixPath(str(name).replace('\\', '/')).stem
+        vergeben[basis] = vergeben.get(basis, 0) + 1
+        ergebnis.append(basis if vergeben[basis] == 1 else f"{basis} ({vergeben[basis]})")
+    return ergebnis
+
+
+def to_template(df, cols=None):
+    """Zugeordnete Spalten unter den Namen der Vorlage (plus Mitarbeiter_ID).
+
+    cols: Zuordnung Rolle -> Spalte, Standard ist die Erkennung.
+    """
+    cols = cols or find_columns(df.columns)
+    neu = {ID_SPALTE: df[ID_SPALTE]} if ID_SPALTE in df.columns else {}
+    for rolle, ziel in VORLAGE.items():
+        if cols.get(rolle) in df.columns:
+            neu[ziel] = df[cols[rolle]]
+    return pd.DataFrame(neu, index=df.index)
+
+
+def numbers_per_file(df):
+    """Zahlenspalten der Vorlage mit dem Zahlenformat dieser Datei lesen.
+
+    Text, der keine Zahl ist, bleibt stehen; prepare() meldet ihn später für
+    den ganzen Bestand.
+    """
+    neu = {}
+    for col in (VORLAGE[r] for r in ZAHL_ROLLEN):
+        if col in df.columns:
+            werte, fehler = parse_numbers(df[col])
+            if len(fehler):
+                werte = werte.astype(object)
+                werte[fehler.pos] = fehler.roh
+            neu[col] = werte
+    return df.assign(**neu) if neu else df
+
+
+def _lesen(name, inhalt, cols=None, header=None):
+    """Eine Datei einlesen und auf die Vorlage abbilden (läuft im Lese-Thread)."""
+    try:
+        df = read_upload(io.BytesIO(inhalt), PurePosixPath(name).name, cols, header)
+        return numbers_per_file(to_template(df, cols))
+    except Exception as e:
+        raise ValueError(f"{name}: {e}") from e
+
+
+def read_group(dateien, jobs=None, spalten=None, kopfzeilen=None):
+    """Alle Dateien einlesen und untereinander hängen, mit Spalte GESELLSCHAFT.
+
+    dateien: [(Dateiname, Bytes)]. jobs: Anzahl Threads (Standard:
+    LESE_THREADS, 1 = ohne Pool). spalten / kopfzeilen: je Datei eine feste
+    Zuordnung bzw. die schon gelesene Kopfzeile (None = erkennen/lesen).
+    """
+    if not dateien:
+        raise ValueError("Keine Dateien hochgeladen.")
+    namen, inhalte = zip(*dateien)
+    spalten = spalten or [None] * len(dateien)
+    kopfzeilen = kopfzeilen or [None] * len(dateien)
+    jobs = min(jobs or LESE_THREADS, len(dateien))
+    if jobs == 1:
+        teile = list(map(_lesen, namen, inhalte, spalten, kopfzeilen))
+    else:
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='hr_lesen') as pool:
+            teile = list(pool.map(_lesen, namen, inhalte, spalten, kopfzeilen))
+
+    gesellschaften = entity_names(namen)
+    df = pd.concat(teile, ignore_index=True)
+    df[GESELLSCHAFT] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(teile)), [len(t) for t in teile]), categories=gesellschaften)
+    return df
+
+
+def entities(prep):
+    """Gesellschaften mit Mitarbeitern in Upload-Reihenfolge; leer ohne Spalte GESELLSCHAFT."""
+    if GESELLSCHAFT not in prep.df.columns:
+        return []
+    spalte = prep.df[GESELLSCHAFT]
+    codes = np.unique(spalte.cat.codes)
+    return list(spalte.cat.categories[codes[codes >= 0]])
+
+
+def entity_prep(prep, gesellschaft):
+    """PreparedData nur für eine Gesellschaft (Spaltenerkennung und Ableitungen bleiben)."""
+    return subset_prep(prep, (prep.df[GESELLSCHAFT] == gesellschaft).to_numpy())
+
+
+def entity_overview(prep):
+    """Mitarbeiter, Ø Alter und Ø Dienstjahre je Gesellschaft."""
+    df = prep.df
+    g = df.groupby(GESELLSCHAFT, observed=True, sort=False)
+    uebersicht = pd.DataFrame({'Mitarbeiter': g.size()})
+    for spalte, titel in (('Alter', 'Ø Alter'), ('DJ', 'Ø Dienstjahre')):
+        if spalte in df.columns:
+            uebersicht[titel] = g[spalte].mean().astype('float64').round(1)
+    return uebersicht
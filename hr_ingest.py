@@ -0,0 +1,125 @@
+"""Schnelles Einlesen von Mitarbeiterdaten (Excel, CSV, Parquet).
+
+Zuerst wird nur die Kopfzeile gelesen. Ein Auswahl-Callback bestimmt daraus
+die benötigten Spalten; nur diese werden anschließend geladen. Für Excel wird
+calamine genutzt, falls installiert (pip install python-calamine), sonst
+openpyxl. Schlägt der schnelle Weg fehl, wird wie früher alles mit openpyxl
+gelesen.
+"""
+import importlib.util
+import io
+from pathlib import Path
+
+import pandas as pd
+
+HAS_CALAMINE = importlib.util.find_spec('python_calamine') is not None
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+EXCEL_ENDUNGEN = ('.xlsx', '.xlsm', '.xls')
+ENDUNGEN = EXCEL_ENDUNGEN + ('.csv', '.parquet')
+
+
+def file_kind(name):
+    endung = Path(str(name)).suffix.lower()
+    if endung in EXCEL_ENDUNGEN:
+        return 'excel'
+    if endung == '.csv':
+        return 'csv'
+    if endung == '.parquet':
+        return 'parquet'
+    raise ValueError(f"Dateityp {endung or '(ohne Endung)'} wird nicht unterstützt")
+
+
+def excel_engine(name):
+    if HAS_CALAMINE:
+        return 'calamine'
+    # .xls kann openpyxl nicht lesen -> pandas wählt xlrd
+    return None if str(name).lower().endswith('.xls') else 'openpyxl'
+
+
+def _zurueck(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def _csv_format(source):
+    """Trennzeichen und Kodierung anhand der Kopfzeile erkennen."""
+    if hasattr(source, 'read'):
+        kopf = _zurueck(source).read(64 * 1024)
+        _zurueck(source)
+    else:
+        with open(source, 'rb') as f:
+            kopf = f.read(64 * 1024)
+    try:
+        text = kopf.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        text = kopf.decode('cp1252')
+        encoding = 'cp1252'
+    erste = text.splitlines()[0] if text else ''
+    sep = max([';', ',', '\t', '|'], key=erste.count)
+    return sep, encoding
+
+
+def read_header(source, name):
+    """Spaltennamen so, wie pandas sie beim vollständigen Lesen vergibt."""
+    art = file_kind(name)
+    if art == 'excel':
+        kopf = pd.read_excel(_zurueck(source), nrows=0, engine=excel_engine(name))
+    elif art == 'csv':
+        sep, encoding = _csv_format(source)
+        kopf = pd.read_csv(_zurueck(source), nrows=0, sep=sep, encoding=encoding)
+    else:
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(_zurueck(source)).names)
+    return list(kopf.columns)
+
+
+def read_columns(source, name, header, positionen, dtype=None):
+    """Liest nur die Spalten an den angegebenen Positionen des Headers."""
+    art = file_kind(name)
+    if art == 'excel':
+        return pd.read_excel(_zurueck(source), usecols=positionen, dtype=dtype,
+                             engine=excel_engine(name))
+    auswahl = [header[i] for i in positionen]
+    if art == 'csv':
+        sep, encoding = _csv_format(source)
+        # pyarrow kann nur über eindeutige Namen projizieren
+        if HAS_PYARROW and len(sep) == 1 and len(set(header)) == len(header):
+            return pd.read_csv(_zurueck(source), usecols=auswahl, dtype=dtype, sep=sep,
+                               encoding=encoding, engine='pyarrow')
+        return pd.read_csv(_zurueck(source), usecols=positionen, dtype=dtype, sep=sep,
+                           encoding=encoding)
+    df = pd.read_parquet(_zurueck(source), columns=auswahl)
+    return df.astype(dtype) if dtype else df
+
+
+def read_table(source, name=None, select=None, dtypes=None, header=None):
+    """Liest eine Datei mit Spaltenprojektion.
+
+    source: Pfad oder Datei-Objekt; name: Dateiname (für den Typ), Standard
+    ist der Pfad. select(header) liefert die benötigten Spaltennamen,
+    dtypes(auswahl) ein dtype-Dict dafür. Ohne select werden alle Spalten
+    gelesen. header: schon bekannte Kopfzeile (aus read_header), spart das
+    erneute Lesen.
+    """
+    name = name or getattr(source, 'name', None) or str(source)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    try:
+        header = list(header) if header is not None else read_header(source, name)
+        benoetigt = set(select(header)) if select else set()
+        positionen = [i for i, c in enumerate(header) if c in benoetigt]
+        if not positionen:
+            # Nichts erkannt: alle Spalten lesen, damit die Zeilen gezählt werden
+            positionen = list(range(len(header)))
+        auswahl = [header[i] for i in positionen]
+        df = read_columns(source, name, header, positionen, dtypes(auswahl) if dtypes else None)
+    except Exception:
+        if file_kind(name) != 'excel':
+            raise
+        # Alter Weg: alles mit openpyxl lesen
+        df = pd.read_excel(_zurueck(source), engine='openpyxl')
+    return df.dropna(how='all')
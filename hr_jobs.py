@@ -0,0 +1,151 @@
+"""Analysen als Hintergrund-Aufträge in einem begrenzten Thread-Pool.
+
+Die App startet eine Analyse als Job und rendert sofort weiter; ein Fragment
+fragt den Fortschritt ab, bis der Job fertig ist. Die Stufen meldet die
+Zeitmessung: JobMessung ist eine hr_perf.Messung, die bei jedem neuen
+Abschnitt die aktuelle Stufe setzt und prüft, ob abgebrochen wurde.
+Abgebrochen wird daher zwischen zwei Stufen, nicht mitten in einer.
+
+    pool = JobPool(2)
+    job = pool.starten(schluessel, lambda messung: analyze_base(prep, messung), ANALYSE_STUFEN)
+    job.warten(0.5)
+    job.fortschritt, job.stufe, job.status
+
+Gleicher Schlüssel = gleicher Job: ein zweiter Klick (oder eine zweite
+Sitzung mit derselben Datei) hängt sich an den laufenden Job an, statt
+neu zu rechnen.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from hr_perf import Messung
+
+JOB_WORKER = int(os.environ.get('HR_JOB_WORKER', 2))   # gleichzeitig laufende Analysen (alle Sitzungen)
+
+WARTET = 'wartet'
+LAEUFT = 'läuft'
+FERTIG = 'fertig'
+FEHLER = 'fehler'
+ABGEBROCHEN = 'abgebrochen'
+
+
+class Abgebrochen(Exception):
+    """Der Job wurde zwischen zwei Stufen abgebrochen."""
+
+
+class JobMessung(Messung):
+    """Messung, die jeden Abschnitt als Stufe des Jobs meldet."""
+
+    def __init__(self, job, speicher=False, kontext=None):
+        super().__init__(speicher, kontext)
+        self.job = job
+
+    @contextmanager
+    def abschnitt(self, name, zeilen=None, phase='berechnung'):
+        self.job._stufe_beginnen(name)
+        with super().abschnitt(name, zeilen, phase):
+            yield
+
+
+class Job:
+    """Ein Analyse-Auftrag: Status, aktuelle Stufe, Ergebnis oder Fehler."""
+
+    def __init__(self, schluessel, stufen, speicher=False, kontext=None):
+        self.schluessel = schluessel
+        self.stufen = list(stufen)
+        self.status = WARTET
+        self.stufe = None
+        self.ergebnis = None
+        self.fehler = None
+        self.messung = JobMessung(self, speicher, kontext)
+        self.nutzer = 1
+        self.abgeholt = False    # Ergebnis schon einmal angezeigt (Zeiten nur einmal übernehmen)
+        self._abbruch = threading.Event()
+        self._fertig = threading.Event()
+
+    @property
+    def fertig(self):
+        return self._fertig.is_set()
+
+    @property
+    def abgebrochen(self):
+        return self.status == ABGEBROCHEN
+
+    @property
+    def fortschritt(self):
+        """0..1 nach Position der aktuellen Stufe; Stufen aus dem Cache werden übersprungen."""
+        if self.status == FERTIG:
+            return 1.0
+        if self.stufe not in self.stufen:
+            return 0.0
+        return self.stufen.index(self.stufe) / len(self.stufen)
+
+    def abbrechen(self):
+        self._abbruch.set()
+
+    def warten(self, timeout=None):
+        """True, sobald der Job fertig ist (auch mit Fehler oder abgebrochen)."""
+        return self._fertig.wait(timeout)
+
+    def _stufe_beginnen(self, name):
+        if self._abbruch.is_set():
+            raise Abgebrochen(name)
+        self.stufe = name
+
+    def _ausfuehren(self, fn):
+        try:
+            if self._abbruch.is_set():
+                raise Abgebrochen(None)
+            self.status = LAEUFT
+            self.ergebnis = fn(self.messung)
+            self.status = FERTIG
+        except Abgebrochen:
+            self.status = ABGEBROCHEN
+        except Exception as e:
+            self.fehler = e
+            self.status = FEHLER
+        finally:
+            self.messung.ende()
+            self._fertig.set()
+
+
+class JobPool:
+    """Begrenzter Thread-Pool für Jobs aller Sitzungen.
+
+    Threads statt Prozesse: Ergebnisse landen im gemeinsamen FrameCache, und
+    die großen Schritte (pandas, numpy, Einlesen) geben das GIL ohnehin frei.
+    """
+
+    def __init__(self, worker=JOB_WORKER):
+        self._pool = ThreadPoolExecutor(max_workers=worker, thread_name_prefix='hr_job')
+        self._laufend = {}   # Schlüssel -> Job, bis er fertig ist
+        self._lock = threading.Lock()
+
+    def starten(self, schluessel, fn, stufen=(), speicher=False, kontext=None):
+        """Job für fn(messung); läuft schon einer mit diesem Schlüssel, wird er geteilt."""
+        with self._lock:
+            job = self._laufend.get(schluessel)
+            if job is not None and not job._abbruch.is_set():
+                job.nutzer += 1
+                return job
+            job = Job(schluessel, stufen, speicher, kontext)
+            self._laufend[schluessel] = job
+        self._pool.submit(self._ausfuehren, job, fn)
+        return job
+
+    def loslassen(self, job):
+        """Eine Sitzung braucht den Job nicht mehr; ohne weitere Nutzer wird er abgebrochen."""
+        with self._lock:
+            job.nutzer -= 1
+            if job.nutzer <= 0 and not job.fertig:
+                job.abbrechen()
+
+    def _ausfuehren(self, job, fn):
+        try:
+            job._ausfuehren(fn)
+        finally:
+            with self._lock:
+                if self._laufend.get(job.schluessel) is job:
+                    del self._laufend[job.schluessel]
@@ -0,0 +1,70 @@
+"""Bestätigte Spaltenzuordnungen je Kopfzeilen-Fingerabdruck.
+
+Der Fingerabdruck ist ein Hash über alle Spaltenköpfe in ihrer Reihenfolge.
+Hat der Benutzer die Zuordnung für einen Aufbau einmal bestätigt oder
+korrigiert, wird sie gespeichert; jede weitere Datei mit demselben Aufbau
+übernimmt sie ohne Erkennung und lädt direkt die benötigten Spalten.
+
+Gespeichert wird als eine JSON-Datei {Fingerabdruck: {Rolle: Spalte}}.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from hr_engine import SUCHBEGRIFFE, find_columns
+
+
+def header_fingerprint(header):
+    return hashlib.sha256('\x1f'.join(str(c) for c in header).encode('utf-8')).hexdigest()[:16]
+
+
+def unique_mapping(cols):
+    """Zuordnung mit jeder Spalte höchstens einmal (spätere Rollen gehen leer aus).
+
+    Liefert die bereinigte Zuordnung und die Rollen, die dabei entfielen.
+    """
+    bereinigt, belegt, doppelt = {}, set(), []
+    for rolle in SUCHBEGRIFFE:
+        spalte = cols.get(rolle)
+        if spalte is not None and spalte in belegt:
+            doppelt.append(rolle)
+            spalte = None
+        bereinigt[rolle] = spalte
+        if spalte is not None:
+            belegt.add(spalte)
+    return bereinigt, doppelt
+
+
+class MappingStore:
+    """Spaltenzuordnungen aller bestätigten Aufbauten in einer JSON-Datei."""
+
+    def __init__(self, pfad):
+        self.pfad = Path(pfad)
+
+    def _alle(self):
+        if not self.pfad.exists():
+            return {}
+        return json.loads(self.pfad.read_text(encoding='utf-8'))
+
+    def laden(self, header):
+        """Gespeicherte Zuordnung für diesen Aufbau oder None."""
+        cols = self._alle().get(header_fingerprint(header))
+        if cols is None:
+            return None
+        return {rolle: cols.get(rolle) if cols.get(rolle) in header else None for rolle in SUCHBEGRIFFE}
+
+    def zuordnung(self, header):
+        """(Zuordnung, gespeichert?): die bestätigte, sonst die erkannte."""
+        cols = self.laden(header)
+        return (cols, True) if cols is not None else (find_columns(header), False)
+
+    def speichern(self, header, cols):
+        alle = self._alle()
+        alle[header_fingerprint(header)] = {r: s for r, s in unique_mapping(cols)[0].items() if s is not None}
+        self.pfad.parent.mkdir(parents=True, exist_ok=True)
+        self.pfad.write_text(json.dumps(alle, ensure_ascii=False, indent=1), encoding='utf-8')
+
+    def entfernen(self, header):
+        alle = self._alle()
+        if alle.pop(header_fingerprint(header), None) is not None:
+            self.pfad.write_text(json.dumps(alle, ensure_ascii=False, indent=1), encoding='utf-8')
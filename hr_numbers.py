@@ -0,0 +1,111 @@
+"""Zahlen-Normalisierung für Jahres- und Gehaltsspalten.
+
+Excel liefert Zahlen meist schon als Zahlen; die werden unverändert
+übernommen. Nur Text-Zellen werden gelesen, und zwar je verschiedenem Wert
+einmal (pd.factorize): Währungszeichen und Leerzeichen fallen weg,
+Tausender- und Dezimaltrennzeichen werden je Spalte aus einer Stichprobe
+erkannt:
+
+    45.000,50 €   -> Dezimalkomma   -> 45000.5
+    45,000.50     -> Dezimalpunkt   -> 45000.5
+    45.000        -> nur Dreiergruppe, also Tausenderpunkt -> 45000
+
+Texte, die danach keine Zahl sind, werden als UnparsedCells gemeldet statt
+stillschweigend zu fehlenden Werten.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+STICHPROBE = 2000          # verschiedene Texte für die Trennzeichen-Erkennung
+RAUSCHEN = r"[\s'’€$£]|EUR|CHF|USD"   # Leerzeichen, Apostroph-Tausender, Währung
+
+_DEZIMAL_KOMMA = r'^-?\d*,(?:\d{1,2}|\d{4,})$|^-?\d{1,3}(?:\.\d{3}){2,}$|\.\d{3},\d*$'
+_DEZIMAL_PUNKT = r'^-?\d*\.(?:\d{1,2}|\d{4,})$|^-?\d{1,3}(?:,\d{3}){2,}$|,\d{3}\.\d*$'
+
+
+@dataclass
+class UnparsedCells:
+    pos: np.ndarray          # Zeilenpositionen mit Text, der keine Zahl ist
+    roh: np.ndarray          # deren Originaltext (object)
+
+    def __len__(self):
+        return len(self.pos)
+
+    def auswahl(self, maske):
+        """Dieselben Zellen in df[maske] (Positionen neu durchgezählt)."""
+        behalten = maske[self.pos]
+        neu = np.cumsum(maske) - 1
+        return UnparsedCells(neu[self.pos[behalten]], self.roh[behalten])
+
+    def je_zeile(self, n):
+        """Originaltext als object-Array über alle n Zeilen (sonst None)."""
+        roh = np.full(n, None, dtype=object)
+        roh[self.pos] = self.roh
+        return roh
+
+
+def decimal_separator(texte):
+    """',' oder '.' für bereinigte Zahlentexte; eindeutige Muster entscheiden
+    per Mehrheit, sonst gilt ein allein stehendes Trennzeichen vor einer
+    Dreiergruppe als Tausendertrennzeichen."""
+    texte = pd.Series(texte, dtype=object).astype(str)
+    komma = int(texte.str.contains(_DEZIMAL_KOMMA, regex=True).sum())
+    punkt = int(texte.str.contains(_DEZIMAL_PUNKT, regex=True).sum())
+    if komma != punkt:
+        return ',' if komma > punkt else '.'
+    return '.' if texte.str.contains(',', regex=False).any() and not texte.str.contains('.', regex=False).any() else ','
+
+
+def parse_numbers(s, stichprobe=STICHPROBE):
+    """Spalte als float64-Array plus die Zellen, die sich nicht lesen ließen.
+
+    Leere Zellen und Leerstrings werden NaN, ohne gemeldet zu werden.
+    """
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return (s.to_numpy(dtype='float64', na_value=np.nan),
+                UnparsedCells(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object)))
+
+    codes, werte = pd.factorize(s)
+    werte = np.asarray(werte, dtype=object)
+    zahlen = np.full(len(werte), np.nan)
+    ist_text = np.array([isinstance(w, str) for w in werte], dtype=bool)
+    # schneller Weg: Zellen, die schon Zahlen sind (gemischte Excel-Spalten)
+    if (~ist_text).any():
+        zahlen[~ist_text] = pd.to_numeric(pd.Series(werte[~ist_text]), errors='coerce').to_numpy(dtype='float64')
+
+    unlesbar_wert = np.zeros(len(werte), dtype=bool)
+    if ist_text.any():
+        texte = pd.Series(werte[ist_text], dtype=object)
+        bereinigt = texte.str.replace(RAUSCHEN, '', regex=True)
+        dezimal = decimal_separator(bereinigt.iloc[:stichprobe])
+        tausender = '.' if dezimal == ',' else ','
+        gelesen = pd.to_numeric(bereinigt.str.replace(tausender, '', regex=False)
+                                .str.replace(dezimal, '.', regex=False), errors='coerce')
+        zahlen[ist_text] = gelesen.to_numpy(dtype='float64', na_value=np.nan)
+        unlesbar_wert[ist_text] = (gelesen.isna() & (bereinigt != '')).to_numpy()
+
+    ergebnis = np.where(codes >= 0, zahlen[codes], np.nan)
+    pos = np.flatnonzero(unlesbar_wert[codes] & (codes >= 0))
+    return ergebnis, UnparsedCells(pos, werte[codes[pos]])
+
+
+def compact_years(s):
+    """Jahresspalte als int16, solange alle Werte ganze Jahre sind; mit
+    fehlenden oder gebrochenen Werten als float32 (NaN läuft durch numpy)."""
+    werte = s.to_numpy(dtype='float64', na_value=np.nan)
+    if len(werte) and not np.isnan(werte).any() and (werte == np.round(werte)).all() \
+            and np.abs(werte).max() < 2**15:
+        return s.astype('int16')
+    return s.astype('float32')
+
+
+def year_display(werte):
+    """Jahre für Tabellen und Texte: ganze Zahlen ohne '.0', fehlende leer."""
+    werte = pd.Series(werte).reset_index(drop=True)
+    if pd.api.types.is_float_dtype(werte):
+        gefuellt = werte.dropna()
+        if (gefuellt == np.round(gefuellt)).all():
+            return werte.astype('Int64')
+    return werte
@@ -0,0 +1,114 @@
+"""Zeitmessung pro Abschnitt für App, Batch und Benchmarks.
+
+Jeder Abschnitt wird mit Laufzeit, Zeilenzahl und optional dem Spitzen-
+Speicherzuwachs (tracemalloc) erfasst und als JSON-Zeile ins Log geschrieben:
+
+    {"abschnitt": "Rente", "phase": "berechnung", "sekunden": 0.0123, "speicher_mb": null, "zeilen": 1500}
+
+tracemalloc verlangsamt pandas/numpy deutlich, daher ist die Speichermessung
+nur auf Wunsch aktiv (Messung(speicher=True)).
+"""
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+
+import pandas as pd
+
+log = logging.getLogger('hr_analyse.perf')
+
+
+@dataclass
+class Eintrag:
+    abschnitt: str
+    phase: str              # 'berechnung', 'darstellung' oder 'export'
+    sekunden: float
+    speicher_mb: float = None
+    zeilen: int = None
+
+
+class Messung:
+    """Sammelt Einträge eines Analyse-Durchlaufs.
+
+    kontext wird jeder Log-Zeile beigefügt (z. B. Datei-Hash).
+    """
+
+    def __init__(self, speicher=False, kontext=None):
+        self.speicher = speicher
+        self.kontext = dict(kontext or {})
+        self.eintraege = []
+        self._offen = None
+        self._eigenes_tracing = False
+        if speicher and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._eigenes_tracing = True
+
+    @contextmanager
+    def abschnitt(self, name, zeilen=None, phase='berechnung'):
+        if self.speicher:
+            tracemalloc.reset_peak()
+            start_mem = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            sekunden = time.perf_counter() - t0
+            speicher_mb = None
+            if self.speicher:
+                speicher_mb = (tracemalloc.get_traced_memory()[1] - start_mem) / 2**20
+            self._erfassen(Eintrag(name, phase, sekunden, speicher_mb, zeilen))
+
+    def weiter(self, name, zeilen=None, phase='darstellung'):
+        """Beendet den laufenden Abschnitt und startet den nächsten.
+
+        Für lange, linear aufgebaute Seiten, in denen ein with-Block pro
+        Abschnitt unpraktisch ist.
+        """
+        self.stopp()
+        self._offen = self.abschnitt(name, zeilen, phase)
+        self._offen.__enter__()
+
+    def stopp(self):
+        if self._offen is not None:
+            offen, self._offen = self._offen, None
+            offen.__exit__(None, None, None)
+
+    def ende(self):
+        """Schließt offene Abschnitte und beendet das eigene tracemalloc."""
+        self.stopp()
+        if self._eigenes_tracing:
+            tracemalloc.stop()
+            self._eigenes_tracing = False
+
+    def _erfassen(self, eintrag):
+        self.eintraege.append(eintrag)
+        zeile = {**asdict(eintrag), **self.kontext}
+        zeile['sekunden'] = round(eintrag.sekunden, 4)
+        if eintrag.speicher_mb is not None:
+            zeile['speicher_mb'] = round(eintrag.speicher_mb, 2)
+        log.info(json.dumps(zeile, ensure_ascii=False))
+
+    @property
+    def gesamt(self):
+        return sum(e.sekunden for e in self.eintraege)
+
+    def frame(self):
+        return pd.DataFrame([asdict(e) for e in self.eintraege],
+                            columns=['abschnitt', 'phase', 'sekunden', 'speicher_mb', 'zeilen'])
+
+
+def abschnitt(messung, name, zeilen=None, phase='berechnung'):
+    """messung.abschnitt(...) oder nichts, wenn keine Messung übergeben wurde."""
+    return messung.abschnitt(name, zeilen, phase) if messung is not None else nullcontext()
+
+
+def log_einrichten(level=logging.INFO):
+    """Gibt die Mess-Zeilen auf stderr aus (einmalig, falls noch kein Handler da ist)."""
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(level)
@@ -0,0 +1,230 @@
+"""Personalprognose: Rente, Kündigungen und Nachbesetzung als Monte-Carlo-Simulation.
+
+Die Mitarbeiter werden zu Zellen (Abteilung, Rentenjahr, Dienstjahre)
+zusammengefasst. Je Zelle steht fest, mit welcher Wahrscheinlichkeit ein
+Mitarbeiter in Jahr 1..N kündigt, in Rente geht oder bleibt:
+
+    Kündigung in Jahr y = P(bis y-1 geblieben) × Quote(Dienstjahr-Gruppe in y)
+    Rente im Rentenjahr  = P(bis dahin geblieben)
+
+Die Kündigungsquoten gelten je Dienstjahr-Gruppe (dieselben Gruppen wie
+tenure() in hr_engine). Ein Lauf zieht für alle Zellen auf einmal eine
+Multinomialverteilung; Nachbesetzungen (Anteil ersatzquote der Abgänge) werden
+Jahr für Jahr gezogen und bilden eigene Kohorten mit 0 Dienstjahren und dem
+typischen Einstiegsalter der Abteilung.
+
+Die Läufe werden in Blöcken auf einen Prozess-Pool verteilt. Jeder Block hat
+einen eigenen Zufallsstrom (SeedSequence.spawn), das Ergebnis hängt daher
+nicht von der Zahl der Prozesse ab. Der Pool startet seine Prozesse per
+forkserver, nicht per fork: ein Fork aus einem Prozess mit laufenden Threads
+(Streamlit, Job-Pool) kann an geerbten Locks hängen bleiben. In der App
+läuft die Prognose als Job des JobPool, der Prozess-Pool darunter.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from hr_engine import DJ_GRUPPEN, department_codes
+
+AUSTRITTSQUOTEN = (0.15, 0.10, 0.07, 0.05, 0.04, 0.03)   # Kündigungen pro Jahr je DJ_GRUPPEN_NAMEN
+EINSTIEGSALTER = 30           # falls sich aus den Daten keins ableiten lässt
+BLOCK_ELEMENTE = 4_000_000    # Läufe × Zellen × Ausgänge je Block (Speicher ca. 32 MB)
+
+
+@dataclass(frozen=True)
+class ProjectionScenario:
+    jahre: int = 15
+    laeufe: int = 5000
+    ersatzquote: float = 0.9                  # Anteil der Abgänge, der nachbesetzt wird
+    austrittsquoten: tuple = AUSTRITTSQUOTEN  # freiwillige Kündigungen je Dienstjahr-Gruppe
+    seed: int = 0
+
+
+@dataclass
+class ProjectionResult:
+    jahre: list              # Stichjahr .. Stichjahr + Horizont
+    laeufe: int
+    abteilungen: list
+    bestand: np.ndarray      # Läufe × Abteilung × Jahr
+    rente: np.ndarray        # Abteilung × Jahr (ab Jahr 1), Mittel über die Läufe
+    kuendigung: np.ndarray
+    einstellung: np.ndarray
+
+    def baender(self, quantile=(0.05, 0.5, 0.95)):
+        """Mittel und Quantile des Bestands je Abteilung und Jahr (plus 'Gesamt').
+
+        Index (Abteilung, Jahr), Spalten 'Mittel' und 'P5', 'P50', 'P95'.
+        """
+        bestand = np.concatenate([self.bestand, self.bestand.sum(axis=1, keepdims=True)], axis=1)
+        q = np.quantile(bestand, quantile, axis=0)                   # Quantil × Abteilung × Jahr
+        index = pd.MultiIndex.from_product([self.abteilungen + ['Gesamt'], self.jahre],
+                                           names=['Abteilung', 'Jahr'])
+        daten = {'Mittel': bestand.mean(axis=0).ravel()}
+        daten.update({f"P{round(p * 100)}": q[i].ravel() for i, p in enumerate(quantile)})
+        return pd.DataFrame(daten, index=index)
+
+    def bewegungen(self):
+        """Erwartete Renteneintritte, Kündigungen und Einstellungen je Jahr (alle Abteilungen)."""
+        return pd.DataFrame({'Rente': self.rente.sum(axis=0),
+                             'Kündigung': self.kuendigung.sum(axis=0),
+                             'Einstellung': self.einstellung.sum(axis=0)},
+                            index=pd.Index(self.jahre[1:], name='Jahr'))
+
+
+# ============================================
+# WAHRSCHEINLICHKEITEN JE ZELLE
+# ============================================
+def _gruppe(dj):
+    """Index der Dienstjahr-Gruppe (wie pd.cut mit DJ_GRUPPEN, Ränder abgeschnitten)."""
+    return np.searchsorted(DJ_GRUPPEN[1:-1], dj, side='left')
+
+
+def _ausgaenge(dj, rentenjahr, start, jahre, quoten):
+    """Wahrscheinlichkeiten (Zellen × jahre+2): Kündigung in Jahr 1..jahre, Rente, bleibt.
+
+    dj: Dienstjahre zu Beginn von Jahr start+1; rentenjahr: Jahr des
+    Renteneintritts (> jahre = nicht im Horizont); start: Eintrittsjahr der
+    Kohorte (0 = heutiger Bestand).
+    """
+    y = np.arange(1, jahre + 1)
+    start = np.broadcast_to(start, dj.shape)[:, None]
+    aktiv = (y > start) & (y < rentenjahr[:, None])
+    quote = np.where(aktiv, np.asarray(quoten)[_gruppe(dj[:, None] + (y - start - 1))], 0.0)
+    geblieben = np.cumprod(1 - quote, axis=1)
+    vorher = np.hstack([np.ones((len(dj), 1)), geblieben[:, :-1]])
+    rente = rentenjahr <= jahre
+    return np.column_stack([vorher * quote,
+                            np.where(rente, geblieben[:, -1], 0.0),
+                            np.where(rente, 0.0, geblieben[:, -1])])
+
+
+def _rentenjahr(alter, rentenalter, jahre, start=0):
+    """Erstes Jahr, in dem das Rentenalter erreicht ist (jahre+1 = nicht im Horizont)."""
+    ry = start + np.maximum(np.ceil(rentenalter - alter), 1)
+    return np.where(np.isnan(ry), jahre + 1, np.minimum(ry, jahre + 1)).astype(np.int64)
+
+
+def _modell(df, cols, rentenalter, szenario):
+    """Zellen des heutigen Bestands und Kohorten der Nachbesetzungen."""
+    jahre = szenario.jahre
+    n = len(df)
+    abt, abteilungen = department_codes(df, cols)
+    d = len(abteilungen)
+
+    def spalte(name):
+        if name not in df.columns:
+            return np.full(n, np.nan)
+        return df[name].to_numpy(dtype='float64', na_value=np.nan)
+
+    alter, dj = spalte('Alter'), spalte('DJ')
+    # Fehlende Dienstjahre zählen wie der Median; ohne Alter keine Rente im Horizont
+    dj = np.where(np.isnan(dj), np.nanmedian(dj) if np.isfinite(dj).any() else 0.0, dj)
+    rentenjahr = _rentenjahr(alter, rentenalter, jahre)
+    # Über 20 Dienstjahre bleibt die Gruppe gleich: zusammenfassen
+    dj = np.where(dj > DJ_GRUPPEN[-2], DJ_GRUPPEN[-2] + 1, dj)
+    zellen, anzahl = np.unique(np.column_stack([abt, rentenjahr, dj]), axis=0, return_counts=True)
+    z_abt, z_rj, z_dj = zellen[:, 0].astype(np.int64), zellen[:, 1].astype(np.int64), zellen[:, 2]
+
+    # Einstiegsalter je Abteilung: Median von Alter - Dienstjahre
+    eintritt = alter - spalte('DJ')
+    einstieg = pd.Series(eintritt).groupby(abt).median().reindex(range(d))
+    gesamt = np.nanmedian(eintritt) if np.isfinite(eintritt).any() else EINSTIEGSALTER
+    einstieg = einstieg.fillna(gesamt).to_numpy()
+
+    # Kohorte, die am Ende von Jahr s eingestellt wird, je Abteilung (s = 0..jahre)
+    s = np.repeat(np.arange(jahre + 1), d)
+    neu_rj = _rentenjahr(np.tile(einstieg, jahre + 1), rentenalter, jahre, start=s)
+    p_neu = _ausgaenge(np.zeros(len(s)), neu_rj, s, jahre, szenario.austrittsquoten)
+
+    # Zellen mit gleichen Wahrscheinlichkeiten (z. B. Rente vor dem nächsten
+    # Gruppenwechsel) lassen sich zu einer Multinomial-Ziehung zusammenlegen
+    p = _ausgaenge(z_dj, z_rj, 0, jahre, szenario.austrittsquoten)
+    zellen, zu = np.unique(np.column_stack([z_abt, z_rj, p]), axis=0, return_inverse=True)
+    anzahl = np.bincount(zu.ravel(), weights=anzahl).astype(np.int64)
+
+    return dict(
+        abteilungen=abteilungen,
+        start=np.bincount(abt, minlength=d),
+        anzahl=anzahl, abt=zellen[:, 0].astype(np.int64), rentenjahr=zellen[:, 1].astype(np.int64),
+        p=zellen[:, 2:],
+        p_neu=p_neu.reshape(jahre + 1, d, -1),
+        neu_rentenjahr=neu_rj.reshape(jahre + 1, d),
+    )
+
+
+# ============================================
+# SIMULATION
+# ============================================
+def _block(m, ersatzquote, laeufe, seed):
+    """Simuliert laeufe Läufe (läuft im Worker)."""
+    rng = np.random.default_rng(seed)
+    p, abt, rj = m['p'], m['abt'], m['rentenjahr']
+    k, jahre, d = len(abt), p.shape[1] - 2, len(m['abteilungen'])
+
+    # Heutiger Bestand: ein Multinomial-Zug je Zelle und Lauf. Die Zellen sind
+    # nach (Abteilung, Rentenjahr) sortiert, summiert wird blockweise (reduceat).
+    ziehung = rng.multinomial(m['anzahl'], p, size=(laeufe, k))
+    neu_abt = np.flatnonzero(np.r_[True, abt[1:] != abt[:-1]])
+    kuend = np.add.reduceat(ziehung[:, :, :jahre], neu_abt, axis=1)
+    gruppe = np.flatnonzero(np.r_[True, (abt[1:] != abt[:-1]) | (rj[1:] != rj[:-1])])
+    g_abt, g_rj = abt[gruppe], rj[gruppe]
+    im_horizont = g_rj <= jahre
+    rente = np.zeros((laeufe, d, jahre), dtype=np.int64)
+    rente[:, g_abt[im_horizont], g_rj[im_horizont] - 1] = (
+        np.add.reduceat(ziehung[:, :, jahre], gruppe, axis=1)[:, im_horizont])
+
+    # Jahr für Jahr nachbesetzen; neue Kohorten scheiden später selbst aus
+    bestand = np.empty((laeufe, d, jahre + 1), dtype=np.int64)
+    bestand[:, :, 0] = m['start']
+    einstellung = np.zeros((laeufe, d, jahre), dtype=np.int64)
+    alle_abt = np.arange(d)
+    for y in range(1, jahre + 1):
+        weg = kuend[:, :, y - 1] + rente[:, :, y - 1]
+        ein = rng.binomial(weg, ersatzquote)
+        einstellung[:, :, y - 1] = ein
+        bestand[:, :, y] = bestand[:, :, y - 1] - weg + ein
+        if y < jahre:
+            neu = rng.multinomial(ein, m['p_neu'][y])          # Läufe × Abteilung × Ausgänge
+            kuend += neu[:, :, :jahre]
+            nrj = m['neu_rentenjahr'][y]
+            im_horizont = nrj <= jahre
+            rente[:, alle_abt[im_horizont], nrj[im_horizont] - 1] += neu[:, im_horizont, jahre]
+    return (bestand.astype(np.int32), rente.sum(axis=0), kuend.sum(axis=0), einstellung.sum(axis=0))
+
+
+def project(prep, rentenalter, szenario=ProjectionScenario(), jobs=None):
+    """Monte-Carlo-Prognose des Personalbestands je Abteilung.
+
+    prep: PreparedData aus hr_engine.prepare(). jobs: Anzahl Prozesse
+    (Standard: alle Kerne, 1 = ohne Pool, z. B. im Server).
+    """
+    m = _modell(prep.df, prep.cols, rentenalter, szenario)
+    zellen_ausgaenge = max(len(m['abt']) * (szenario.jahre + 2), 1)
+    groesse = max(1, min(szenario.laeufe, BLOCK_ELEMENTE // zellen_ausgaenge))
+    bloecke = [min(groesse, szenario.laeufe - i) for i in range(0, szenario.laeufe, groesse)]
+    seeds = np.random.SeedSequence(szenario.seed).spawn(len(bloecke))
+
+    arbeit = partial(_block, m, szenario.ersatzquote)
+    jobs = min(jobs or os.cpu_count() or 1, len(bloecke))
+    if jobs == 1:
+        teile = list(map(arbeit, bloecke, seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('forkserver')) as pool:
+            teile = list(pool.map(arbeit, bloecke, seeds))
+
+    bestand, rente, kuend, ein = zip(*teile)
+    laeufe = szenario.laeufe
+    return ProjectionResult(
+        jahre=[prep.jahr + y for y in range(szenario.jahre + 1)],
+        laeufe=laeufe,
+        abteilungen=m['abteilungen'],
+        bestand=np.concatenate(bestand),
+        rente=sum(rente) / laeufe,
+        kuendigung=sum(kuend) / laeufe,
+        einstellung=sum(ein) / laeufe,
+    )
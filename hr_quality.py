@@ -0,0 +1,572 @@
+"""Spaltenweise Regel-Engine für Problem-Datensätze und Daten-Matrix.
+
+Jede Regel liefert eine boolesche Maske über alle Zeilen. Die Masken werden zu
+einem Bitset pro Zeile zusammengefasst; Problem-Texte entstehen erst, wenn
+Zeilen angezeigt oder exportiert werden. Die Daten-Matrix wird ebenso als
+int8-Array aus Spaltenmasken berechnet und bei Bedarf zu Zeilengruppen
+zusammengefasst.
+
+Neben den festen Grenzen (Alter 16–70, Dienstjahre 0–50, Gehalt
+15.000–300.000 €) prüft group_outliers, ob ein Wert für seine Gruppe
+(Abteilung, Level, Standort) untypisch ist: robuste Grenzen Median ± 3,5 ·
+Streuung je Gruppe, mit der Streuung aus dem MAD (median absolute
+deviation). Alle Gruppen einer Gruppierung in einem groupby().transform.
+
+find_duplicates sucht doppelte Datensätze über Hash-Indizes (factorize,
+duplicated) in O(n): mehrfache Mitarbeiter-IDs, IDs mit widersprüchlichem
+Geburts- oder Eintrittsjahr und Zeilen ohne ID mit gleichen Merkmalen.
+"""
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from hr_numbers import year_display
+
+MAX_TEXTE = 3   # Probleme pro Zeile in der Spalte 'Probleme'
+MAD_FAKTOR = 3.5          # Abstand vom Gruppenmedian in robusten Standardabweichungen
+MAD_NORMAL = 1.4826       # MAD -> Standardabweichung bei normalverteilten Werten
+MAD_UNTERGRENZE = 0.25    # Streuung je Gruppe mindestens dieser Anteil der Gesamtstreuung
+MIN_GRUPPE = 5            # kleinere Gruppen werden nicht geprüft
+# Darstellung der geprüften Werte in Texten: (Bezeichnung, Zahl)
+WERT_MUSTER = {'Gehalt': ('Gehalt {}', '{:,.0f}€'), 'Alter': ('Alter {}', '{:.0f}'),
+               'DJ': ('{} Dienstjahre', '{:.0f}')}
+
+
+@dataclass
+class Regel:
+    name: str
+    maske: np.ndarray                  # bool, eine Zeile pro Mitarbeiter
+    text: Callable[[np.ndarray], list]  # Zeilenpositionen -> Texte
+
+
+def _werte(df, col):
+    return df[col].to_numpy() if col in df.columns else None
+
+
+# ============================================
+# GRUPPEN-AUSREISSER
+# ============================================
+@dataclass
+class GroupOutliers:
+    """Werte, die für mindestens eine ihrer Gruppen untypisch sind.
+
+    Je Wert-Spalte (z. B. 'Gehalt') eine Maske über alle Zeilen; für
+    Treffer außerdem die erste auffällige Gruppe und deren Median.
+    """
+    maske: dict              # Wert-Spalte -> bool je Zeile
+    gruppe: dict             # Wert-Spalte -> 'Abteilung IT' je Zeile (None ohne Treffer)
+    median: dict             # Wert-Spalte -> Median dieser Gruppe je Zeile
+    werte: dict              # Wert-Spalte -> Werte als float64
+
+    def anzahl(self, wert):
+        return int(self.maske[wert].sum()) if wert in self.maske else 0
+
+    def texte(self, wert, pos, bezeichnung=True):
+        """'Gehalt 25,000€ untypisch für Abteilung IT (Median 90,000€)' je Zeilenposition."""
+        bez, zahl = WERT_MUSTER.get(wert, (wert + ' {}', '{:g}'))
+        bez = bez if bezeichnung else '{}'
+        return [f"{bez.format(zahl.format(x))} untypisch für {g} (Median {zahl.format(m)})"
+                for x, g, m in zip(self.werte[wert][pos], self.gruppe[wert][pos], self.median[wert][pos])]
+
+
+def group_outliers(df, cols, gruppen, werte):
+    """Robuste Ausreißer je Gruppe: |x - Median| > MAD_FAKTOR · Streuung.
+
+    gruppen: [(Rolle, Anzeigename)], z. B. Abteilung, Level, Standort.
+    werte: numerische Spalten, z. B. ['Gehalt', 'Alter', 'DJ'].
+    Streuung = MAD_NORMAL · MAD der Gruppe, aber mindestens MAD_UNTERGRENZE
+    der Gesamtstreuung, damit Gruppen mit (fast) gleichen Werten, etwa
+    einem Tarifgehalt, nicht jede kleine Abweichung melden. Je Gruppierung
+    zwei groupby().transform (Median, MAD) über alle Wert-Spalten zugleich.
+    """
+    werte = [w for w in werte if w in df.columns]
+    n = len(df)
+    x = df[werte].astype('float64')
+    res = GroupOutliers({w: np.zeros(n, dtype=bool) for w in werte},
+                        {w: np.full(n, None, dtype=object) for w in werte},
+                        {w: np.full(n, np.nan) for w in werte},
+                        {w: x[w].to_numpy() for w in werte})
+    if not werte or n == 0:
+        return res
+    untergrenze = MAD_UNTERGRENZE * MAD_NORMAL * (x - x.median()).abs().median().to_numpy()
+
+    for rolle, name in gruppen:
+        col = cols.get(rolle)
+        if not col or col not in df.columns:
+            continue
+        # Gruppiert wird nach Codes statt nach den (Text-)Werten selbst
+        codes, namen = pd.factorize(df[col])
+        median = x.groupby(codes).transform('median')
+        abw = (x - median).abs()
+        mad = abw.groupby(codes).transform('median').to_numpy()
+        vorhanden = x.notna().to_numpy()
+        anzahl = np.column_stack([np.bincount(codes[(codes >= 0) & vorhanden[:, j]], minlength=len(namen))
+                                  for j in range(len(werte))])
+        gross = (codes >= 0)[:, None] & (anzahl[np.maximum(codes, 0)] >= MIN_GRUPPE)
+        streuung = np.maximum(MAD_NORMAL * mad, untergrenze)
+        treffer = gross & (abw.to_numpy() > MAD_FAKTOR * streuung)
+        median = median.to_numpy()
+        namen = np.asarray(namen, dtype=object)
+        for j, w in enumerate(werte):
+            neu = treffer[:, j] & ~res.maske[w]
+            if not neu.any():
+                continue
+            res.maske[w] |= neu
+            res.gruppe[w][neu] = [f"{name} {v}" for v in namen[codes[neu]]]
+            res.median[w][neu] = median[neu, j]
+    return res
+
+
+# ============================================
+# DUPLIKATE
+# ============================================
+def _erste(codes, werte, anzahl):
+    """Wert des ersten Vorkommens je Code (Codes >= 0)."""
+    erste = np.full(anzahl, -1, dtype=np.int64)
+    # bei mehrfachen Indizes gewinnt die letzte Zuweisung -> rückwärts zuweisen
+    erste[codes[::-1]] = werte[::-1]
+    return erste
+
+
+class DuplicateReport:
+    """Doppelte und widersprüchliche Datensätze als Masken über alle Zeilen.
+
+    Beim Bereinigen bleibt je ID (bzw. je Merkmals-Kombination ohne ID) das
+    erste Vorkommen; spätere Vorkommen stehen in wiederholung.
+    """
+
+    def __init__(self, df, cols, id_mehrfach, exakt, konflikt, ohne_id, wiederholung):
+        self.df = df
+        self.cols = cols
+        self.id_mehrfach = id_mehrfach     # ID kommt mehrfach vor (alle Vorkommen)
+        self.exakt = exakt                 # exakte Kopie einer früheren Zeile
+        self.konflikt = konflikt           # gleiche ID, anderes Geburts- oder Eintrittsjahr (alle Vorkommen)
+        self.ohne_id = ohne_id             # ohne ID, gleiche Merkmale wie eine andere Zeile (alle Vorkommen)
+        self.wiederholung = wiederholung   # spätere Vorkommen, fallen beim Bereinigen weg
+        self.zeilen = np.flatnonzero(id_mehrfach | exakt | ohne_id)
+
+    def __len__(self):
+        return len(self.zeilen)
+
+    def __bool__(self):
+        return len(self.zeilen) > 0
+
+    def texte(self, pos):
+        """Befund je Zeilenposition."""
+        return ["Geburts- oder Eintrittsjahr widerspricht gleicher ID" if k
+                else "exakte Kopie" if e
+                else "ID mehrfach" if i
+                else "vermutlich doppelt (ohne ID)" if o else ""
+                for k, e, i, o in zip(self.konflikt[pos], self.exakt[pos], self.id_mehrfach[pos], self.ohne_id[pos])]
+
+    def frame(self, limit=None):
+        """Betroffene Datensätze, gleiche IDs bzw. Merkmale untereinander."""
+        df, cols = self.df, self.cols
+        pos = self.zeilen
+        spalten = {'ID': 'Mitarbeiter_ID', 'Geburtsjahr': cols['geb'], 'Eintrittsjahr': cols['ein'],
+                   'Abteilung': cols['abt'], 'Position': cols['akt_pos']}
+        tabelle = pd.DataFrame({name: df[col].to_numpy()[pos] for name, col in spalten.items()
+                                if col and col in df.columns})
+        for name in ('Geburtsjahr', 'Eintrittsjahr'):
+            if name in tabelle.columns:
+                tabelle[name] = year_display(tabelle[name])
+        tabelle['Befund'] = self.texte(pos)
+        tabelle = tabelle.sort_values(list(tabelle.columns[:-1]), kind='stable', na_position='last')
+        return (tabelle if limit is None else tabelle.head(limit)).reset_index(drop=True)
+
+
+def find_duplicates(df, cols, merkmale):
+    """Doppelte Datensätze mit Hash-Indizes in O(n).
+
+    merkmale: Rollen, die ohne ID eine Person kennzeichnen (z. B. Geburtsjahr,
+    Eintrittsjahr, Abteilung, Position); alle müssen ausgefüllt sein.
+    """
+    n = len(df)
+    zeile = np.arange(n)
+    exakt = df.duplicated(keep='first').to_numpy()
+    id_mehrfach = np.zeros(n, dtype=bool)
+    konflikt = np.zeros(n, dtype=bool)
+    wiederholung = exakt.copy()
+
+    hat_id = np.zeros(n, dtype=bool)
+    if 'Mitarbeiter_ID' in df.columns:
+        codes, ids = pd.factorize(df['Mitarbeiter_ID'])
+        hat_id = codes >= 0
+        c = codes[hat_id]
+        id_mehrfach[hat_id] = np.bincount(c, minlength=len(ids))[c] > 1
+        wiederholung[hat_id] |= _erste(c, zeile[hat_id], len(ids))[c] != zeile[hat_id]
+        # Widerspruch: Jahr weicht vom ersten (ausgefüllten) Vorkommen derselben ID ab
+        for rolle in ('geb', 'ein'):
+            col = cols[rolle]
+            if not col or col not in df.columns:
+                continue
+            werte = pd.factorize(df[col])[0]
+            ok = hat_id & (werte >= 0)
+            abweichend = _erste(codes[ok], werte[ok], len(ids))[codes[ok]] != werte[ok]
+            betroffen = np.bincount(codes[ok][abweichend], minlength=len(ids)) > 0
+            konflikt[hat_id] |= betroffen[c]
+
+    spalten = [cols[r] for r in merkmale if cols.get(r) and cols[r] in df.columns]
+    ohne_id = np.zeros(n, dtype=bool)
+    if spalten:
+        kandidat = ~hat_id & df[spalten].notna().all(axis=1).to_numpy()
+        if kandidat.any():
+            merkmal = df.loc[kandidat, spalten]
+            ohne_id[kandidat] = merkmal.duplicated(keep=False).to_numpy()
+            wiederholung[kandidat] |= merkmal.duplicated(keep='first').to_numpy()
+
+    return DuplicateReport(df, cols, id_mehrfach, exakt, konflikt, ohne_id, wiederholung)
+
+
+def build_rules(df, cols, spalten, unlesbar=None, gruppen=None, duplikate=None):
+    """Alle Regeln in der Reihenfolge, in der ihre Texte erscheinen.
+
+    spalten: [(Rolle, Anzeigename)] für die Fehlend-Prüfung.
+    unlesbar: {Rolle: UnparsedCells}, Zellen mit Text statt Zahl.
+    gruppen: GroupOutliers; gemeldet, wo keine feste Grenze schon greift.
+    duplikate: DuplicateReport für doppelte Datensätze.
+    """
+    unlesbar = unlesbar or {}
+    regeln = []
+
+    # Fehlende Werte; Text statt Zahl ist nicht fehlend, sondern falsch
+    for rolle, name in spalten:
+        col = cols[rolle]
+        if col and col in df.columns:
+            text = f"❌ {name} fehlt"
+            fehlt = df[col].isna().to_numpy().copy()
+            if rolle in unlesbar:
+                fehlt[unlesbar[rolle].pos] = False
+            regeln.append(Regel(f"fehlt:{name}", fehlt, lambda pos, t=text: [t] * len(pos)))
+    for rolle, name in spalten:
+        if rolle in unlesbar:
+            roh = unlesbar[rolle].je_zeile(len(df))
+            maske = np.zeros(len(df), dtype=bool)
+            maske[unlesbar[rolle].pos] = True
+            regeln.append(Regel(f"keine_zahl:{name}", maske,
+                                lambda pos, n=name, r=roh: [f"❌ {n} „{x}“ ist keine Zahl" for x in r[pos]]))
+
+    # Ausreißer
+    alter = _werte(df, 'Alter')
+    if alter is not None:
+        regeln.append(Regel("alter_jung", alter < 16,
+                            lambda pos: [f"⚠️ Alter {a:.0f} (zu jung)" for a in alter[pos]]))
+        regeln.append(Regel("alter_alt", alter > 70,
+                            lambda pos: [f"⚠️ Alter {a:.0f} (sehr alt)" for a in alter[pos]]))
+
+    dj = _werte(df, 'DJ')
+    if dj is not None:
+        regeln.append(Regel("dj_negativ", dj < 0,
+                            lambda pos: [f"⚠️ {x:.0f} Dienstjahre (negativ!)" for x in dj[pos]]))
+        regeln.append(Regel("dj_lang", dj > 50,
+                            lambda pos: [f"⚠️ {x:.0f} Dienstjahre (sehr lang)" for x in dj[pos]]))
+
+    gehalt = _werte(df, 'Gehalt')
+    if gehalt is not None:
+        regeln.append(Regel("gehalt_niedrig", gehalt < 15000,
+                            lambda pos: [f"⚠️ Gehalt {g:,.0f}€ (niedrig)" for g in gehalt[pos]]))
+        regeln.append(Regel("gehalt_hoch", gehalt > 300000,
+                            lambda pos: [f"⚠️ Gehalt {g:,.0f}€ (hoch)" for g in gehalt[pos]]))
+
+    # Untypisch für die eigene Gruppe (nur, wo keine feste Grenze greift)
+    if gruppen is not None:
+        fest = {'Alter': lambda x: (x < 16) | (x > 70), 'DJ': lambda x: (x < 0) | (x > 50),
+                'Gehalt': lambda x: (x < 15000) | (x > 300000)}
+        for wert, maske in gruppen.maske.items():
+            if wert in fest:
+                maske = maske & ~fest[wert](gruppen.werte[wert])
+            regeln.append(Regel(f"gruppe:{wert}", maske,
+                                lambda pos, w=wert: [f"⚠️ {t}" for t in gruppen.texte(w, pos)]))
+
+    # Logik-Fehler (auf den Rohwerten wie in der Vorlage eingetragen)
+    col_geb, col_ein = cols['geb'], cols['ein']
+    if col_geb and col_ein and col_geb in df.columns and col_ein in df.columns:
+        geb, ein = df[col_geb], df[col_ein]
+        beide = (geb.notna() & ein.notna()).to_numpy()
+        vor_geburt = beide & (ein < geb).to_numpy(dtype=bool, na_value=False)
+        zu_frueh = beide & ~vor_geburt & ((ein - geb) < 14).to_numpy(dtype=bool, na_value=False)
+        geb_w, ein_w = geb.to_numpy(), ein.to_numpy()
+        regeln.append(Regel("eintritt_vor_geburt", vor_geburt,
+                            lambda pos: ["🚫 Eintritt vor Geburt!"] * len(pos)))
+        regeln.append(Regel("eintritt_zu_frueh", zu_frueh,
+                            lambda pos: [f"🚫 Eintritt mit {e - g:g} Jahren" for e, g in zip(ein_w[pos], geb_w[pos])]))
+
+    # Doppelte Datensätze
+    if duplikate is not None:
+        maske = np.zeros(len(df), dtype=bool)
+        maske[duplikate.zeilen] = True
+        regeln.append(Regel("duplikat", maske,
+                            lambda pos: [f"🚫 {t}" for t in duplikate.texte(pos)]))
+
+    return regeln
+
+
+class ProblemIndex:
+    """Bitset aller Regeltreffer; Texte werden nur für abgefragte Zeilen gebaut."""
+
+    def __init__(self, df, cols, regeln):
+        if len(regeln) > 64:
+            raise ValueError("Zu viele Regeln für ein 64-Bit-Set")
+        dtype = np.uint32 if len(regeln) <= 32 else np.uint64
+        bits = np.zeros(len(df), dtype=dtype)
+        for i, r in enumerate(regeln):
+            bits |= r.maske.astype(dtype) << dtype(i)
+        self.df = df
+        self.cols = cols
+        self.regeln = regeln
+        self.bits = bits
+        self.zeilen = np.flatnonzero(bits)   # Positionen mit mindestens einem Problem
+
+    def __len__(self):
+        return len(self.zeilen)
+
+    def __bool__(self):
+        return len(self.zeilen) > 0
+
+    def anzahl(self, name):
+        """Anzahl Zeilen, die eine bestimmte Regel verletzen."""
+        i = next(i for i, r in enumerate(self.regeln) if r.name == name)
+        return int(((self.bits >> i) & 1).sum())
+
+    def texte(self, pos):
+        """Problem-Spalte für die Zeilenpositionen pos."""
+        listen = [[] for _ in range(len(pos))]
+        for i, r in enumerate(self.regeln):
+            treffer = ((self.bits[pos] >> i) & 1).astype(bool)
+            if treffer.any():
+                for k, t in zip(np.flatnonzero(treffer), r.text(pos[treffer])):
+                    listen[k].append(t)
+        return [' | '.join(p[:MAX_TEXTE]) + ('...' if len(p) > MAX_TEXTE else '') for p in listen]
+
+    def frame(self, limit=None):
+        """Tabelle wie Problem_Datensaetze.csv (optional nur die ersten limit Zeilen)."""
+        pos = self.zeilen if limit is None else self.zeilen[:limit]
+        df = self.df
+        if 'Mitarbeiter_ID' in df.columns:
+            ids = df['Mitarbeiter_ID'].iloc[pos].reset_index(drop=True)
+        else:
+            ids = [f'Zeile {i+1}' for i in df.index[pos]]
+
+        def jahr_spalte(col):
+            if not col:
+                return ['-'] * len(pos)
+            return year_display(df[col].iloc[pos])
+
+        return pd.DataFrame({
+            'ID': ids,
+            'Geburtsjahr': jahr_spalte(self.cols['geb']),
+            'Eintrittsjahr': jahr_spalte(self.cols['ein']),
+            'Probleme': self.texte(pos),
+        })
+
+    def csv(self):
+        return self.frame().to_csv(index=False).encode('utf-8')
+
+
+# ============================================
+# DATEN-MATRIX
+# ============================================
+OK, FEHLT, AUSREISSER = 0, 1, 2
+GRUPPEN_QUELLE = {'Alter': 'geb', 'DJ': 'ein', 'Gehalt': 'geh'}   # Wert-Spalte -> Rolle der Rohspalte
+
+
+def _gruppen_spalten(cols, gruppen):
+    """Rohspalte -> Wert-Spalte der Gruppen-Ausreißer, z. B. 'Geburtsjahr' -> 'Alter'."""
+    if gruppen is None:
+        return {}
+    return {cols[GRUPPEN_QUELLE[w]]: w for w in gruppen.maske if cols.get(GRUPPEN_QUELLE.get(w))}
+
+
+def _zahlen(df, col):
+    if not col or col not in df.columns:
+        return None
+    return pd.to_numeric(df[col], errors='coerce').to_numpy()
+
+
+def status_grid(df, cols, spalten, jahr, unlesbar=None, gruppen=None):
+    """Status je Mitarbeiter × Datenfeld als int8-Array (0=OK, 1=Fehlend, 2=Ausreißer).
+
+    Liefert (Anzeigenamen, Spaltennamen, Array) für alle vorhandenen Spalten.
+    Text statt Zahl (unlesbar: {Rolle: UnparsedCells}) zählt als Ausreißer,
+    ebenso Werte, die für ihre Gruppe untypisch sind (gruppen: GroupOutliers;
+    Alter -> Geburtsjahr, DJ -> Eintrittsjahr).
+    """
+    unlesbar = unlesbar or {}
+    col_geb, col_ein, col_geh = cols['geb'], cols['ein'], cols['geh']
+    geb, ein = _zahlen(df, col_geb), _zahlen(df, col_ein)
+    gruppe = _gruppen_spalten(cols, gruppen)
+
+    namen, quellen, status = [], [], []
+    for rolle, name in spalten:
+        col = cols[rolle]
+        if not (col and col in df.columns):
+            continue
+        aus = np.zeros(len(df), dtype=bool)
+        if col == col_geb and 'Alter' in df.columns:
+            alter = jahr - geb
+            aus |= (alter < 16) | (alter > 70)
+        if col == col_ein:
+            dj = jahr - ein
+            aus |= (dj < 0) | (dj > 50)
+            if geb is not None:
+                aus |= (ein - geb) < 14     # schließt "Eintritt vor Geburt" ein
+        if col == col_geh and 'Gehalt' in df.columns:
+            g = df['Gehalt'].to_numpy()
+            aus |= (g < 15000) | (g > 300000)
+        if col in gruppe:
+            aus |= gruppen.maske[gruppe[col]]
+        s = np.where(aus, AUSREISSER, OK).astype(np.int8)
+        s[df[col].isna().to_numpy()] = FEHLT
+        if rolle in unlesbar:
+            s[unlesbar[rolle].pos] = AUSREISSER
+        namen.append(name)
+        quellen.append(col)
+        status.append(s)
+
+    grid = np.column_stack(status) if status else np.zeros((len(df), 0), dtype=np.int8)
+    return namen, quellen, grid
+
+
+@dataclass
+class DataMatrix:
+    namen: list              # Datenfelder (x-Achse)
+    modus: str               # 'zeilen', 'block' oder 'abteilung'
+    labels: list             # Beschriftung der angezeigten Zeilen (y-Achse)
+    z: np.ndarray            # zeilen: Status 0/1/2, sonst Anteil Problemzellen 0..1
+    fehlend: np.ndarray      # Anzahl fehlender Zellen je angezeigter Zeile × Feld
+    ausreisser: np.ndarray   # Anzahl Ausreißer-Zellen je angezeigter Zeile × Feld
+    groesse: np.ndarray      # Mitarbeiter je angezeigter Zeile
+    n_gesamt: int
+    ok_gesamt: int
+    fehlend_gesamt: int
+    ausreisser_gesamt: int
+    _hover: Callable = field(default=None, repr=False)
+
+    def hover(self):
+        """Hover-Texte, erst bei Bedarf und nur für die angezeigten Zeilen gebaut."""
+        return self._hover()
+
+
+def _zeilen_hover(df, cols, quellen, namen, status, jahr, unlesbar=None, gruppen=None):
+    col_geb, col_ein, col_geh = cols['geb'], cols['ein'], cols['geh']
+    gruppe = _gruppen_spalten(cols, gruppen)
+    keine_zahl = {cols[r]: z.je_zeile(len(df)) for r, z in (unlesbar or {}).items()}
+    geb, ein = _zahlen(df, col_geb), _zahlen(df, col_ein)
+    gehalt = df['Gehalt'].to_numpy() if 'Gehalt' in df.columns else None
+    if 'Mitarbeiter_ID' in df.columns:
+        ids = df['Mitarbeiter_ID'].to_numpy()
+    else:
+        ids = [f'Zeile {i+1}' for i in df.index]
+    roh = [year_display(df[c]).to_numpy(dtype=object) if c in (col_geb, col_ein) else df[c].to_numpy() for c in quellen]
+
+    def grund(col, i):
+        if col in keine_zahl and keine_zahl[col][i] is not None:
+            return f"„{keine_zahl[col][i]}“ ist keine Zahl"
+        text = ""
+        if col == col_geb:
+            alter = jahr - geb[i]
+            if alter < 16:
+                text = f"Alter {alter:g} (zu jung!)"
+            elif alter > 70:
+                text = f"Alter {alter:g} (sehr alt)"
+        if col == col_ein:
+            dj_val = jahr - ein[i]
+            if dj_val < 0:
+                text = f"Eintritt {ein[i]:g} (Zukunft!)"
+            elif dj_val > 50:
+                text = f"{dj_val:g} Dienstjahre (sehr lang)"
+            if geb is not None and not np.isnan(geb[i]):
+                if ein[i] < geb[i]:
+                    text = f"Eintritt {ein[i]:g} vor Geburt {geb[i]:g}!"
+                elif ein[i] - geb[i] < 14:
+                    text = f"Eintritt mit {ein[i] - geb[i]:g} Jahren (Kind!)"
+        if col == col_geh:
+            if gehalt[i] < 15000:
+                text = f"{gehalt[i]:,.0f}€ (sehr niedrig)"
+            elif gehalt[i] > 300000:
+                text = f"{gehalt[i]:,.0f}€ (sehr hoch)"
+        if not text and col in gruppe:
+            text = gruppen.texte(gruppe[col], np.array([i]), bezeichnung=col != col_geh)[0]
+        return text
+
+    hover = []
+    for i in range(len(df)):
+        zeile = []
+        for j, (col, name) in enumerate(zip(quellen, namen)):
+            s = status[i, j]
+            if s == FEHLT:
+                zeile.append(f"{ids[i]}<br>{name}: FEHLT")
+            elif s == AUSREISSER:
+                zeile.append(f"{ids[i]}<br>{name}: {grund(col, i)}")
+            elif col == col_geh and gehalt is not None and not np.isnan(gehalt[i]):
+                zeile.append(f"{ids[i]}<br>{name}: {gehalt[i]:,.0f}€")
+            else:
+                zeile.append(f"{ids[i]}<br>{name}: {roh[j][i]}")
+        hover.append(zeile)
+    return hover
+
+
+def _bin_hover(labels, namen, groesse, fehlend, ausreisser):
+    return [[f"{label} ({g} MA)<br>{name}: {f} fehlend, {a} Ausreißer"
+             for name, f, a in zip(namen, fz, az)]
+            for label, g, fz, az in zip(labels, groesse, fehlend, ausreisser)]
+
+
+def build_matrix(df, cols, spalten, jahr, max_zeilen=200, nach='block', unlesbar=None, gruppen=None):
+    """Daten-Matrix über alle Mitarbeiter.
+
+    Bis max_zeilen Mitarbeiter wird jede Zeile einzeln gezeigt. Darüber werden
+    Zeilen zusammengefasst: nach='abteilung' je Abteilung (sofern vorhanden und
+    nicht mehr als max_zeilen), sonst in Blöcken zu je N Mitarbeitern.
+    """
+    namen, quellen, status = status_grid(df, cols, spalten, jahr, unlesbar, gruppen)
+    if not namen:
+        return None
+
+    n = len(df)
+    fehlt = status == FEHLT
+    aus = status == AUSREISSER
+    fehlend_gesamt = int(fehlt.sum())
+    ausreisser_gesamt = int(aus.sum())
+    ok_gesamt = status.size - fehlend_gesamt - ausreisser_gesamt
+
+    if n <= max_zeilen:
+        labels = [f"MA {i+1}" for i in range(n)]
+        return DataMatrix(namen, 'zeilen', labels, status, fehlt.astype(np.int32), aus.astype(np.int32),
+                          np.ones(n, dtype=np.int32), n, ok_gesamt, fehlend_gesamt, ausreisser_gesamt,
+                          lambda: _zeilen_hover(df, cols, quellen, namen, status, jahr, unlesbar, gruppen))
+
+    codes = None
+    col_abt = cols['abt']
+    if nach == 'abteilung' and col_abt and col_abt in df.columns:
+        codes, uniques = pd.factorize(df[col_abt], sort=True)
+        labels = [str(u) for u in uniques]
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(labels), codes)
+            labels.append("(ohne Abteilung)")
+        if len(labels) > max_zeilen:
+            codes = None
+
+    if codes is not None:
+        modus = 'abteilung'
+        groesse = np.bincount(codes, minlength=len(labels))
+        fehlend = np.column_stack([np.bincount(codes, weights=fehlt[:, j], minlength=len(labels))
+                                   for j in range(len(namen))]).astype(np.int64)
+        ausreisser = np.column_stack([np.bincount(codes, weights=aus[:, j], minlength=len(labels))
+                                      for j in range(len(namen))]).astype(np.int64)
+    else:
+        modus = 'block'
+        block = -(-n // max_zeilen)
+        starts = np.arange(0, n, block)
+        enden = np.minimum(starts + block, n)
+        labels = [f"MA {s+1}–{e}" for s, e in zip(starts, enden)]
+        groesse = enden - starts
+        fehlend = np.add.reduceat(fehlt.astype(np.int64), starts, axis=0)
+        ausreisser = np.add.reduceat(aus.astype(np.int64), starts, axis=0)
+
+    z = (fehlend + ausreisser) / groesse[:, None]
+    return DataMatrix(namen, modus, labels, z, fehlend, ausreisser, groesse, n,
+                      ok_gesamt, fehlend_gesamt, ausreisser_gesamt,
+                      lambda: _bin_hover(labels, namen, groesse, fehlend, ausreisser))
@@ -0,0 +1,73 @@
+"""Risikomodell für den Wissensverlust.
+
+Jeder Mitarbeiter wird in einem Array-Schritt als OK, WARNUNG oder KRITISCH
+eingestuft:
+
+    KRITISCH: gewichtete DJ >= krit_dj  und  JbR <= krit_jbr
+    WARNUNG:  gewichtete DJ >= warn_dj  und  JbR <= warn_jbr   (sonst)
+
+Gewichtete DJ = Dienstjahre × Level-Gewicht × Knappheitsfaktor. Das Level-
+Gewicht kommt aus level_gewichte (Standard 1). Der Knappheitsfaktor gilt für
+Mitarbeiter, deren aktuelle Position höchstens knappheit_max Personen
+innehaben. Mit den Standardwerten entspricht das Modell den bisherigen festen
+Schwellen (15/5 und 10/10 Jahre).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+KLASSEN = ('OK', 'WARNUNG', 'KRITISCH')   # Code 0, 1, 2
+OK, WARNUNG, KRITISCH = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class RiskModel:
+    krit_dj: float = 15
+    krit_jbr: float = 5
+    warn_dj: float = 10
+    warn_jbr: float = 10
+    level_gewichte: tuple = ()     # ((Level, Gewicht), ...) – hashbar für Cache-Schlüssel
+    knappheit_max: int = 1         # Positionen mit höchstens so vielen Inhabern gelten als knapp
+    knappheit_faktor: float = 1.0  # 1.0 = aus
+
+    def gewichte(self, df, cols):
+        """Gewicht je Zeile von df (None, wenn alle Gewichte 1 sind)."""
+        gewicht = None
+        col_lvl, col_pos = cols.get('lvl'), cols.get('akt_pos')
+        if self.level_gewichte and col_lvl:
+            gewicht = (df[col_lvl].map(dict(self.level_gewichte)).astype('float64')
+                       .fillna(1.0).to_numpy())
+        if self.knappheit_faktor != 1.0 and col_pos:
+            codes, _ = pd.factorize(df[col_pos])
+            inhaber = np.bincount(codes[codes >= 0])
+            knapp = (codes >= 0) & (inhaber[np.maximum(codes, 0)] <= self.knappheit_max)
+            faktor = np.where(knapp, self.knappheit_faktor, 1.0)
+            gewicht = faktor if gewicht is None else gewicht * faktor
+        return gewicht
+
+    def klassen(self, dj, jbr, gewicht=None):
+        """Klassen-Codes (int8) für Arrays von Dienstjahren und Jahren bis Rente."""
+        dj = np.asarray(dj, dtype='float64')
+        jbr = np.asarray(jbr, dtype='float64')
+        if gewicht is not None:
+            dj = dj * gewicht
+        krit = (dj >= self.krit_dj) & (jbr <= self.krit_jbr)
+        warn = ~krit & (dj >= self.warn_dj) & (jbr <= self.warn_jbr)
+        return np.where(krit, KRITISCH, np.where(warn, WARNUNG, OK)).astype(np.int8)
+
+
+def parse_level_gewichte(text):
+    """'Senior=1,2; Lead=1.5' -> (('Senior', 1.2), ('Lead', 1.5)).
+
+    Trennung mit ';' oder Zeilenumbruch, Dezimalkomma erlaubt; fehlerhafte
+    Teile werden ignoriert.
+    """
+    paare = []
+    for teil in str(text or '').replace('\n', ';').split(';'):
+        name, _, wert = teil.partition('=')
+        try:
+            paare.append((name.strip(), float(wert.strip().replace(',', '.'))))
+        except ValueError:
+            continue
+    return tuple(p for p in paare if p[0])
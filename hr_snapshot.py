@@ -0,0 +1,270 @@
+"""Monatsstände je Mitarbeiter_ID und Veränderung zum letzten Stand.
+
+Ein Snapshot enthält pro Mitarbeiter nur die Felder, die Rentenwelle und
+Wissensverlust bestimmen (Geburts-/Eintrittsjahr, Abteilung, Level, Position,
+Gehalt), dazu die daraus berechneten Kennzahlen samt dem RiskModel, nach dem
+sie eingestuft sind. Beim nächsten Upload werden Eintritte, Austritte und
+geänderte Mitarbeiter ermittelt; die Kennzahlen werden nur um deren Beiträge
+fortgeschrieben:
+
+    neu = alt - Beitrag(Austritte + Geänderte, alter Stand)
+              + Beitrag(Eintritte + Geänderte, neuer Stand)
+
+Ausnahme Knappheitsfaktor: ob eine Position knapp ist, hängt vom ganzen
+Bestand ab, dann wird der neue Stand komplett bewertet.
+
+Gespeichert wird als Parquet (Daten) plus JSON (Kennzahlen, Verlauf) im
+Ordner des SnapshotStore.
+"""
+import json
+from dataclasses import asdict, dataclass, field, replace
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from hr_risk import KRITISCH, WARNUNG, RiskModel
+
+ID_SPALTE = 'Mitarbeiter_ID'
+ZAHLEN = ('geb', 'ein', 'geh')
+TEXTE = ('abt', 'lvl', 'akt_pos')
+WECHSEL = {'abt': 'Abteilung', 'lvl': 'Level', 'geh': 'Gehalt'}
+
+
+# ============================================
+# KENNZAHLEN (additiv über Mitarbeiter)
+# ============================================
+@dataclass
+class Kennzahlen:
+    jahr: int
+    rentenalter: int
+    n: int                   # Mitarbeiter mit ID
+    welle: pd.Series         # Rentenjahr -> Anzahl (alle mit Geburtsjahr)
+    verlust: pd.Series       # Rentenjahr -> Erfahrungsjahre (mit Geburts- und Eintrittsjahr)
+    krit: int
+    warn: int
+    modell: RiskModel = RiskModel()   # Einstufung von krit/warn
+
+    def _verrechnen(self, other, vorzeichen):
+        if (self.jahr, self.rentenalter, self.modell) != (other.jahr, other.rentenalter, other.modell):
+            raise ValueError("Kennzahlen mit unterschiedlichem Jahr/Rentenalter/Risikomodell")
+
+        def reihe(a, b):
+            s = a.add(vorzeichen * b, fill_value=0)
+            return s[s != 0].sort_index()
+
+        return replace(self, n=self.n + vorzeichen * other.n,
+                       welle=reihe(self.welle, other.welle).astype('int64'),
+                       verlust=reihe(self.verlust, other.verlust),
+                       krit=self.krit + vorzeichen * other.krit,
+                       warn=self.warn + vorzeichen * other.warn)
+
+    def __add__(self, other):
+        return self._verrechnen(other, 1)
+
+    def __sub__(self, other):
+        return self._verrechnen(other, -1)
+
+    @property
+    def r5(self):
+        return int(self.welle[self.welle.index <= self.jahr + 5].sum())
+
+    @property
+    def r10(self):
+        i = self.welle.index
+        return int(self.welle[(i > self.jahr + 5) & (i <= self.jahr + 10)].sum())
+
+    @property
+    def verl5(self):
+        return float(self.verlust[self.verlust.index <= self.jahr + 5].sum())
+
+    def to_dict(self):
+        return {'jahr': self.jahr, 'rentenalter': self.rentenalter, 'n': self.n,
+                'krit': self.krit, 'warn': self.warn, 'modell': asdict(self.modell),
+                'welle': [[float(k), int(v)] for k, v in self.welle.items()],
+                'verlust': [[float(k), float(v)] for k, v in self.verlust.items()]}
+
+    @classmethod
+    def from_dict(cls, d):
+        def reihe(paare, dtype):
+            return pd.Series({k: v for k, v in paare}, dtype=dtype).sort_index()
+        # ältere Stände ohne Modell wurden mit dem Standard-RiskModel eingestuft
+        m = dict(d.get('modell', {}))
+        m['level_gewichte'] = tuple(tuple(p) for p in m.get('level_gewichte', ()))
+        return cls(d['jahr'], d['rentenalter'], d['n'], reihe(d['welle'], 'int64'),
+                   reihe(d['verlust'], 'float64'), d['krit'], d['warn'], RiskModel(**m))
+
+
+def kennzahlen(daten, jahr, rentenalter, modell=RiskModel()):
+    """Kennzahlen für einen Snapshot-Frame (oder einen Ausschnitt davon).
+
+    Gleiche Definitionen wie retirement() und knowledge_loss() in hr_engine:
+    RJ = Geburtsjahr + Rentenalter, Risikoklassen nach modell (Level-Gewichte
+    und Knappheit über die Snapshot-Spalten lvl und akt_pos).
+    """
+    geb, ein = daten['geb'], daten['ein']
+    rj = geb + rentenalter
+    hat_alter = geb.notna()
+    welle = rj[hat_alter].value_counts().sort_index().astype('int64')
+
+    beide = hat_alter & ein.notna()
+    jbr = (rj - jahr)[beide]
+    dj = (jahr - ein)[beide]
+    verlust = dj.groupby(rj[beide]).sum().sort_index().astype('float64')
+    gewicht = modell.gewichte(daten, {r: r if r in daten.columns else None for r in ('lvl', 'akt_pos')})
+    klasse = modell.klassen(dj, jbr, None if gewicht is None else gewicht[beide.to_numpy()])
+    return Kennzahlen(jahr, rentenalter, len(daten), welle, verlust[verlust != 0],
+                      int((klasse == KRITISCH).sum()), int((klasse == WARNUNG).sum()), modell)
+
+
+# ============================================
+# SNAPSHOT & DIFF
+# ============================================
+def snapshot_frame(prep):
+    """Snapshot-Felder aus PreparedData, Index = Mitarbeiter_ID.
+
+    Zeilen ohne ID lassen sich nicht zuordnen und bleiben außen vor; bei
+    doppelten IDs zählt die erste Zeile. Ohne ID-Spalte: None.
+    """
+    df, cols = prep.df, prep.cols
+    if ID_SPALTE not in df.columns:
+        return None
+    ids = df[ID_SPALTE].astype('str').str.strip()
+    gueltig = df[ID_SPALTE].notna() & (ids != '')
+    daten = pd.DataFrame(index=pd.Index(ids[gueltig], name=ID_SPALTE))
+    for rolle in ZAHLEN:
+        spalte = cols[rolle]
+        werte = pd.to_numeric(df[spalte], errors='coerce') if spalte else np.nan
+        if rolle == 'geh' and 'Gehalt' in df.columns:
+            werte = df['Gehalt']
+        daten[rolle] = np.asarray(werte[gueltig] if spalte else werte, dtype='float64')
+    for rolle in TEXTE:
+        spalte = cols[rolle]
+        daten[rolle] = (df.loc[gueltig, spalte].astype('str').to_numpy() if spalte
+                        else pd.Series(pd.NA, index=daten.index, dtype='str'))
+    return daten[~daten.index.duplicated()]
+
+
+@dataclass
+class SnapshotDiff:
+    eintritte: pd.Index
+    austritte: pd.Index
+    geaendert: pd.Index
+    wechsel: dict            # 'Abteilung'/'Level'/'Gehalt' -> Anzahl geänderter Mitarbeiter
+    unveraendert: int
+    _raus: np.ndarray = None  # Positionen im alten Stand (Austritte + Geänderte)
+    _rein: np.ndarray = None  # Positionen im neuen Stand (Eintritte + Geänderte)
+
+
+def diff(alt, neu):
+    """Vergleicht zwei Snapshot-Frames über die Mitarbeiter_ID.
+
+    Die IDs werden einmal gehasht (get_indexer); verglichen wird spaltenweise
+    auf den Arrays.
+    """
+    pos = alt.index.get_indexer(neu.index)
+    treffer = pos >= 0
+    alt_pos, neu_pos = pos[treffer], np.flatnonzero(treffer)
+    noch_da = np.zeros(len(alt), dtype=bool)
+    noch_da[alt_pos] = True
+
+    anders = {}
+    # ältere Stände haben noch keine Positionsspalte
+    for rolle in neu.columns.intersection(alt.columns, sort=False):
+        a = alt[rolle].to_numpy()[alt_pos]
+        b = neu[rolle].to_numpy()[neu_pos]
+        anders[rolle] = ~((a == b) | (pd.isna(a) & pd.isna(b)))
+    geaendert = np.logical_or.reduce(list(anders.values()))
+
+    return SnapshotDiff(
+        eintritte=neu.index[~treffer],
+        austritte=alt.index[~noch_da],
+        geaendert=neu.index[neu_pos[geaendert]],
+        wechsel={name: int(anders[rolle].sum()) for rolle, name in WECHSEL.items()},
+        unveraendert=int((~geaendert).sum()),
+        _raus=np.concatenate([np.flatnonzero(~noch_da), alt_pos[geaendert]]),
+        _rein=np.concatenate([np.flatnonzero(~treffer), neu_pos[geaendert]]),
+    )
+
+
+@dataclass
+class Snapshot:
+    stichtag: str            # 'JJJJ-MM'
+    daten: pd.DataFrame      # snapshot_frame()
+    kennzahlen: Kennzahlen
+    verlauf: list = field(default_factory=list)  # [{'stichtag', 'mitarbeiter', 'r5', ...}]
+
+
+def vergleichen(alt, daten, jahr, rentenalter, modell=RiskModel()):
+    """Diff zum gespeicherten Snapshot und fortgeschriebene Kennzahlen.
+
+    Liefert (diff, kennzahlen_alt, kennzahlen_neu). Nur die Beiträge der
+    geänderten Mitarbeiter werden neu berechnet; haben sich Jahr, Rentenalter
+    oder Risikomodell geändert, wird der alte Stand einmal komplett neu
+    bewertet (mit Knappheitsfaktor auch der neue, siehe Moduldoku).
+    """
+    d = diff(alt.daten, daten)
+    alt_kz = alt.kennzahlen
+    if (alt_kz.jahr, alt_kz.rentenalter, alt_kz.modell) != (jahr, rentenalter, modell):
+        alt_kz = kennzahlen(alt.daten, jahr, rentenalter, modell)
+    if modell.knappheit_faktor != 1.0:
+        return d, alt_kz, kennzahlen(daten, jahr, rentenalter, modell)
+    raus = alt.daten.iloc[d._raus]
+    rein = daten.iloc[d._rein]
+    neu_kz = alt_kz - kennzahlen(raus, jahr, rentenalter, modell) + kennzahlen(rein, jahr, rentenalter, modell)
+    return d, alt_kz, neu_kz
+
+
+def verlauf_eintrag(stichtag, kz, d=None):
+    eintrag = {'stichtag': stichtag, 'mitarbeiter': kz.n, 'r5': kz.r5, 'r10': kz.r10,
+               'krit': kz.krit, 'warn': kz.warn, 'verl5': kz.verl5}
+    if d is not None:
+        eintrag.update(eintritte=len(d.eintritte), austritte=len(d.austritte),
+                       geaendert=len(d.geaendert))
+    return eintrag
+
+
+def naechster_stand(alt, daten, kz, d=None, stichtag=None):
+    """Neuer Snapshot; ein Stand desselben Monats ersetzt den letzten Verlaufseintrag."""
+    stichtag = stichtag or date.today().strftime('%Y-%m')
+    verlauf = list(alt.verlauf) if alt is not None else []
+    if verlauf and verlauf[-1]['stichtag'] == stichtag:
+        verlauf.pop()
+    verlauf.append(verlauf_eintrag(stichtag, kz, d))
+    return Snapshot(stichtag, daten, kz, verlauf)
+
+
+# ============================================
+# ABLAGE
+# ============================================
+class SnapshotStore:
+    """Letzter Stand je Datenbestand als <name>.parquet + <name>.json."""
+
+    def __init__(self, ordner):
+        self.ordner = Path(ordner)
+
+    def _pfade(self, name):
+        return self.ordner / f"{name}.parquet", self.ordner / f"{name}.json"
+
+    def version(self, name):
+        """Änderungsmarke für Cache-Schlüssel (None, wenn nichts gespeichert ist)."""
+        _, meta = self._pfade(name)
+        return meta.stat().st_mtime_ns if meta.exists() else None
+
+    def laden(self, name):
+        daten_pfad, meta_pfad = self._pfade(name)
+        if not (daten_pfad.exists() and meta_pfad.exists()):
+            return None
+        meta = json.loads(meta_pfad.read_text(encoding='utf-8'))
+        return Snapshot(meta['stichtag'], pd.read_parquet(daten_pfad),
+                        Kennzahlen.from_dict(meta['kennzahlen']), meta.get('verlauf', []))
+
+    def speichern(self, name, snapshot):
+        self.ordner.mkdir(parents=True, exist_ok=True)
+        daten_pfad, meta_pfad = self._pfade(name)
+        snapshot.daten.to_parquet(daten_pfad)
+        meta = {'stichtag': snapshot.stichtag, 'kennzahlen': snapshot.kennzahlen.to_dict(),
+                'verlauf': snapshot.verlauf}
+        # JSON zuletzt schreiben: es dient als Versionsmarke
+        meta_pfad.write_text(json.dumps(meta, ensure_ascii=False, indent=1), encoding='utf-8')